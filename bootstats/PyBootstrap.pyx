@@ -1,24 +1,148 @@
 from libcpp.vector cimport vector
+from libc.stdint cimport uint16_t, uint32_t, uint64_t
 import numpy as np
+import h5py
+import os
 
 cdef extern from "complex.h":
     double complex cexp(double complex)
 
+## Single precision complex type (template argument)
+ctypedef float complex floatcomplex
+
 #-----------------------------------------------------------
 # -----------------------Bootstrapper---------------------
 #-----------------------------------------------------------
-cdef extern from "cFiles/Bootstrap.hpp":
-  cdef cppclass Bootstrapper[T]:
+cdef extern from "cFiles/Bootstrap.hpp" nogil:
+  cdef enum SampleKernel:
+    automaticKernel
+    gatherKernel
+    denseKernel
+
+  cdef enum IndexType:
+    index16
+    index32
+    index64
+
+  IndexType smallestIndexType(const size_t NBins)
+
+  void seedIndices[I](
+    const uint64_t seed,
+    const size_t NBins,
+    const size_t NSize,
+    const size_t s0,
+    const size_t s1,
+    I *out,
+    const size_t nThreads
+  )
+
+  void poissonWeights[R](
+    const uint64_t seed,
+    const size_t s0,
+    const size_t s1,
+    const size_t b0,
+    const size_t b1,
+    R *out,
+    const size_t nThreads
+  )
+
+  void binData[In, T](
+    const In *Indata,
+    const size_t NVars,
+    const size_t NConfigs,
+    const Py_ssize_t varStride,
+    const Py_ssize_t configStride,
+    const size_t NBinSize,
+    T *out,
+    const size_t ldOut,
+    const size_t nThreads
+  )
+
+  void jackknifeSamples[T](
+    const T *data,
+    const size_t ldData,
+    const size_t NBins,
+    const T *totals,
+    const size_t v0,
+    const size_t v1,
+    const size_t s0,
+    const size_t s1,
+    T *out,
+    const size_t nThreads
+  )
+
+  cdef enum BlockScheme:
+    movingBlocks
+    stationaryBlocks
+
+  void drawBlocks(
+    const uint64_t seed,
+    const size_t NConfigs,
+    const double blockLength,
+    const BlockScheme scheme,
+    const size_t s,
+    vector[size_t] &starts,
+    vector[size_t] &lengths
+  )
+
+  void prefixSums[T](
+    const T *Indata,
+    const size_t NVars,
+    const size_t NConfigs,
+    const Py_ssize_t varStride,
+    const Py_ssize_t configStride,
+    T *mean,
+    T *prefix,
+    const size_t nThreads
+  )
+
+  void blockSamples[T](
+    const T *prefix,
+    const T *mean,
+    const size_t NConfigs,
+    const double blockLength,
+    const BlockScheme scheme,
+    const uint64_t seed,
+    const size_t v0,
+    const size_t v1,
+    const size_t s0,
+    const size_t s1,
+    T *out,
+    const size_t nThreads
+  )
+
+  ## Bootstrapper with storage type T and accumulation type A
+  cdef cppclass Bootstrapper[T, A]:
     Bootstrapper(
-      const vector[vector[T]] &data, 
+      const T *data,
+      const size_t NVars,
+      const size_t NConfigs,
+      const Py_ssize_t varStride,
+      const Py_ssize_t configStride,
       const size_t NSamples,
       const size_t NSize,
-      const size_t NBinSize
+      const size_t NBinSize,
+      const uint64_t seed,
+      T *binnedBuffer,
+      void *indicesBuffer,
+      const size_t nThreads,
+      const bint storeIndices,
+      const size_t NGroups
     ) except +
     Bootstrapper(
-      const vector[vector[T]] &data, 
-      const vector[vector[size_t]] &indices,
-      const size_t NBinSize
+      const T *data,
+      const size_t NVars,
+      const size_t NConfigs,
+      const Py_ssize_t varStride,
+      const Py_ssize_t configStride,
+      const void *indices,
+      const IndexType indexType,
+      const size_t NSamples,
+      const size_t NSize,
+      const size_t NBinSize,
+      T *binnedBuffer,
+      const size_t nThreads,
+      const size_t NGroups
     ) except +
 
 
@@ -28,146 +152,469 @@ cdef extern from "cFiles/Bootstrap.hpp":
     const size_t getNConfigs() const;
     const size_t getNVars()    const;
     const size_t getNBins()    const;
+    const size_t getNGroups()  const;
+    uint64_t getSeed()         const;
+    bint getStoreIndices()     const;
+    IndexType getIndexType()   const;
 
-    const vector[vector[T]]      &getData()    const;
-    const vector[vector[size_t]] &getIndices() const;
+    void getData(T *out)         const;
+    void getIndices(size_t *out) const;
+    void generateIndices(
+      void *out, const size_t s0, const size_t s1, const size_t nThreads
+    ) const;
 
-    const vector[T] &getMean() const;
-    const vector[vector[T]] &getSamples() const;
+    void getMean(A *out)    const;
+    void getSamples(
+      T *out, const size_t nThreads, const SampleKernel kernel
+    ) const;
+    void getSamples(
+      T *out,
+      const size_t v0,
+      const size_t v1,
+      const size_t s0,
+      const size_t s1,
+      const size_t nThreads,
+      const SampleKernel kernel
+    ) const;
+    SampleKernel getSampleKernel(const SampleKernel kernel) const;
 
-    const vector[vector[T]] &getCov() const;
-    const vector[vector[T]] &getCov(vector[vector[T]]) const;
+    void getCov(
+      A *out, const size_t nThreads, const SampleKernel kernel
+    ) const;
+    void getCov(const T *samples, A *out, const size_t nThreads) const;
+    void getMoments(
+      A *mean,
+      double *var,
+      A *cov,
+      const size_t nThreads,
+      const SampleKernel kernel
+    ) const;
+    void getMoments(
+      const T *samples,
+      const size_t NS,
+      A *mean,
+      double *var,
+      A *cov,
+      const size_t nThreads
+    ) const;
 
-#--------------- python version-----------------------------
-cdef class DoubleBootstrapper(object):
-  cdef Bootstrapper[double] *ptr
-  #------------
-  def __cinit__(
-    self,
-    vector[vector[double]] data,
-    NSamples=None,
-    NSize=None,
-    NBinSize=None,
-    indices=None,
-  ):
-    if not(NSamples is None) and not(NSize is None) and not(NBinSize is None):
-      self.ptr = new Bootstrapper[double](
-        data, NSamples, NSize, NBinSize
+#-----------------------------------------------------------
+## Names of the kernels for computing the samples
+_KERNELS = {
+  "auto":   automaticKernel,
+  "gather": gatherKernel,
+  "dense":  denseKernel,
+}
+
+#-----------------------------------------------------------
+def _kernel(name):
+  """Returns the 'SampleKernel' for the kernel name."""
+  if not(name in _KERNELS):
+    raise KeyError(
+      "Unknown kernel '{}'. Choose one of {}.".format(name, list(_KERNELS))
+    )
+  return _KERNELS[name]
+
+#-----------------------------------------------------------
+def randomSeed():
+  """Returns a random 64 bit seed drawn from the system entropy source."""
+  return int.from_bytes(os.urandom(8), "little")
+
+#-----------------------------------------------------------
+## NumPy types of the bootstrap indices
+_INDEX_DTYPES = {
+  index16: np.uint16,
+  index32: np.uint32,
+  index64: np.uintp,
+}
+
+#-----------------------------------------------------------
+def indexDtype(size_t NBins):
+  """
+  Returns the smallest unsigned NumPy type which holds indices in [0, NBins).
+  """
+  return _INDEX_DTYPES[smallestIndexType(NBins)]
+
+#-----------------------------------------------------------
+def indicesFromSeed(
+  uint64_t seed, size_t NBins, size_t NSize, size_t s0, size_t s1,
+  size_t nThreads=1
+):
+  """
+  Returns the bootstrap indices of size '(s1-s0) x NSize' of the samples
+  [s0, s1) drawn from [0, NBins) with given seed. They are equal to the
+  indices of a 'Bootstrapper' with this seed but do not require the data.
+  """
+  out = np.empty([s1-s0, NSize], dtype=indexDtype(NBins))
+  cdef uint16_t[:, ::1] out16
+  cdef uint32_t[:, ::1] out32
+  cdef size_t[:, ::1] out64
+  if out.size == 0:
+    return out
+  indexType = smallestIndexType(NBins)
+  if indexType == index16:
+    out16 = out
+    with nogil:
+      seedIndices(seed, NBins, NSize, s0, s1, &out16[0, 0], nThreads)
+  elif indexType == index32:
+    out32 = out
+    with nogil:
+      seedIndices(seed, NBins, NSize, s0, s1, &out32[0, 0], nThreads)
+  else:
+    out64 = out
+    with nogil:
+      seedIndices(seed, NBins, NSize, s0, s1, &out64[0, 0], nThreads)
+  return out
+
+#-----------------------------------------------------------
+def getPoissonWeights(
+  uint64_t seed, size_t s0, size_t s1, size_t b0, size_t b1,
+  size_t nThreads=1
+):
+  """
+  Returns the Poisson weights (mean one) of size '(s1-s0) x (b1-b0)' of the
+  bins [b0, b1) in the samples [s0, s1) of the online bootstrap with given
+  seed (see 'PoissonBootstrapper').
+  """
+  out = np.empty([s1-s0, b1-b0], dtype=np.float64)
+  cdef double[:, ::1] outView = out
+  if out.size > 0:
+    with nogil:
+      poissonWeights(seed, s0, s1, b0, b1, &outView[0, 0], nThreads)
+  return out
+
+#-----------------------------------------------------------
+def _indexBuffer(indices, size_t NBins):
+  """
+  Returns a read-only view of the indices as C-contiguous array of type
+  'indexDtype(NBins)' (copies only if the input has a different layout or type).
+  Raises a 'ValueError' if the indices are not integers in [0, NBins).
+  """
+  indices = np.asarray(indices)
+  if not(np.issubdtype(indices.dtype, np.integer)):
+    raise ValueError(
+      "Indices must be integers. Received type {}".format(indices.dtype)
+    )
+  if indices.size > 0 and (indices.min() < 0 or indices.max() >= NBins):
+    raise ValueError(
+      "Indices must be in [0, {}). Received indices in [{}, {}]".format(
+        NBins, indices.min(), indices.max()
       )
-    elif not(indices is None) and not(NBinSize is None):
-      self.ptr = new Bootstrapper[double](
-        data, indices, NBinSize
+    )
+  buffer = np.ascontiguousarray(indices, dtype=indexDtype(NBins)).view()
+  buffer.flags.writeable = False
+  return buffer
+
+#-----------------------------------------------------------
+## Number of entries which are read at once when binning datasets
+_CHUNK_SIZE = 2**23
+
+#-----------------------------------------------------------
+def _iterChunks(dataset, size_t NBinSize):
+  """
+  Iterates the bins of the dataset of shape 'varShape x NConfigs' chunk by
+  chunk. Yields the first bin of the chunk and the data of the chunk as array
+  of shape 'NVars x (NChunkBins*NBinSize)' which contains whole bins.
+  """
+  NConfigs  = dataset.shape[-1]
+  NVars     = int(np.prod(dataset.shape[:-1]))
+  NBins     = NConfigs // NBinSize
+  mod       = NConfigs % NBinSize
+  chunkBins = max(_CHUNK_SIZE // max(NVars*NBinSize, 1), 1)
+  for b0 in range(0, NBins, chunkBins):
+    b1    = min(b0 + chunkBins, NBins)
+    chunk = dataset[..., mod+b0*NBinSize:mod+b1*NBinSize]
+    yield b0, np.asarray(chunk).reshape([NVars, (b1-b0)*NBinSize])
+
+#-----------------------------------------------------------
+def _outBuffer(out, shape, dtype):
+  """
+  Returns a new array of given shape and type if 'out' is None. Otherwise
+  checks that 'out' is a C-contiguous array of given shape and type, e.g., a
+  'np.memmap', and returns it.
+  """
+  if out is None:
+    return np.empty(shape, dtype=dtype)
+  if list(out.shape) != list(shape) or out.dtype != dtype or \
+     not(out.flags.c_contiguous):
+    raise ValueError(
+      "Output buffer must be a C-contiguous array of shape {} and type {}."
+      .format(list(shape), np.dtype(dtype))
+    )
+  return out
+
+#-----------------------------------------------------------
+cdef void *_bufferPointer(array):
+  """Returns the pointer to the first element of a C-contiguous array."""
+  cdef const unsigned char[::1] raw = array.reshape(-1).view(np.uint8)
+  return <void*> &raw[0]
+
+#-----------------------------------------------------------
+cdef _binChunk(chunk, size_t NBinSize, out, size_t b0, size_t nThreads):
+  """
+  Bins the array 'chunk' of shape 'NVars x NConfigs' into the columns
+  '[b0, b0 + NConfigs//NBinSize)' of the C-contiguous array 'out'.
+  Bins are accumulated in double precision.
+  """
+  cdef const double[:, :] dChunk
+  cdef const float[:, :] fChunk
+  cdef double[:, ::1] dOut
+  cdef float[:, ::1] fOut
+  cdef const double complex[:, :] cChunk
+  cdef const float complex[:, :] zChunk
+  cdef double complex[:, ::1] cOut
+  cdef float complex[:, ::1] zOut
+  if chunk.shape[1] // NBinSize == 0 or chunk.shape[0] == 0:
+    return
+  if chunk.dtype == np.float64:
+    dChunk = chunk
+    dOut   = out
+    with nogil:
+      binData[double, double](
+        &dChunk[0, 0], dChunk.shape[0], dChunk.shape[1],
+        dChunk.strides[0] // sizeof(double), dChunk.strides[1] // sizeof(double),
+        NBinSize, &dOut[0, b0], dOut.shape[1], nThreads
+      )
+  elif chunk.dtype == np.float32 and out.dtype == np.float64:
+    fChunk = chunk
+    dOut   = out
+    with nogil:
+      binData[float, double](
+        &fChunk[0, 0], fChunk.shape[0], fChunk.shape[1],
+        fChunk.strides[0] // sizeof(float), fChunk.strides[1] // sizeof(float),
+        NBinSize, &dOut[0, b0], dOut.shape[1], nThreads
       )
-    else:
-      raise ValueError(
-        "Either construct Bootstrapper from [data, NSampels, NSize, NBinSize]"+
-        " or [data, indices, NBinSize]."
+  elif chunk.dtype == np.float32:
+    fChunk = chunk
+    fOut   = out
+    with nogil:
+      binData[float, float](
+        &fChunk[0, 0], fChunk.shape[0], fChunk.shape[1],
+        fChunk.strides[0] // sizeof(float), fChunk.strides[1] // sizeof(float),
+        NBinSize, &fOut[0, b0], fOut.shape[1], nThreads
       )
-  #------------
-  @property
-  def NSamples(self):
-    return  self.ptr.getNSamples()
-  @property
-  def NSize(self):
-    return  self.ptr.getNSize()
-  @property
-  def NBinSize(self):
-    return  self.ptr.getNBinSize()
-  @property
-  def NConfigs(self):
-    return  self.ptr.getNConfigs()
-  @property
-  def NVars(self):
-    return  self.ptr.getNVars()
-  @property
-  def NBins(self):
-    return  self.ptr.getNBins()
-  @property
-  def data(self):
-    return  np.array(self.ptr.getData())
-  @property
-  def indices(self):
-    return  np.array(self.ptr.getIndices())
-  @property
-  def mean(self):
-    return np.array(self.ptr.getMean())
-  #------------
-  def __str__(self):
-    return "ComplexBootstrapper({NSamples},{NSize},{NBinSize})".format(
-      NSamples=self.NSamples, NSize=self.NSize, NBinSize=self.NBinSize
+  elif chunk.dtype == np.complex128:
+    cChunk = chunk
+    cOut   = out
+    with nogil:
+      binData[complex, complex](
+        &cChunk[0, 0], cChunk.shape[0], cChunk.shape[1],
+        cChunk.strides[0] // sizeof(double complex),
+        cChunk.strides[1] // sizeof(double complex),
+        NBinSize, &cOut[0, b0], cOut.shape[1], nThreads
+      )
+  elif out.dtype == np.complex128:
+    zChunk = chunk
+    cOut   = out
+    with nogil:
+      binData[floatcomplex, complex](
+        &zChunk[0, 0], zChunk.shape[0], zChunk.shape[1],
+        zChunk.strides[0] // sizeof(float complex),
+        zChunk.strides[1] // sizeof(float complex),
+        NBinSize, &cOut[0, b0], cOut.shape[1], nThreads
+      )
+  else:
+    zChunk = chunk
+    zOut   = out
+    with nogil:
+      binData[floatcomplex, floatcomplex](
+        &zChunk[0, 0], zChunk.shape[0], zChunk.shape[1],
+        zChunk.strides[0] // sizeof(float complex),
+        zChunk.strides[1] // sizeof(float complex),
+        NBinSize, &zOut[0, b0], zOut.shape[1], nThreads
+      )
+
+#-----------------------------------------------------------
+## Supported input types and the default types of the binned data
+_BINNED_DTYPES = {
+  np.dtype(np.float64):    np.float64,
+  np.dtype(np.float32):    np.float64,
+  np.dtype(np.complex128): np.complex128,
+  np.dtype(np.complex64):  np.complex128,
+}
+
+#-----------------------------------------------------------
+def binArray(data, size_t NBinSize=1, out=None, size_t nThreads=1):
+  """
+  Returns the data of shape 'varShape x NConfigs' binned into bins of
+  'NBinSize' configurations as array of shape 'NVars x NBins' (written to
+  'out' if specified). The remainder 'NConfigs % NBinSize' is skipped at the
+  beginning. The data can be an array or a 'h5py.Dataset' (binned chunk by
+  chunk) of single or double precision. The bins are accumulated in double
+  precision and are returned in double precision (or in the type of 'out',
+  which can also be the type of the data).
+  """
+  if not(data.dtype in _BINNED_DTYPES):
+    raise TypeError("Input data needs to be of type 'float' or 'complex'")
+  if NBinSize < 1:
+    raise ValueError(
+      "NBinSize must be larger then zero. Received {}".format(NBinSize)
     )
-  def __repr__(self):
-    return str(self)
-  #------------
-  def _getSamples(self):
-    return np.array(self.ptr.getSamples())
-  #------------
-  def getCov(self, samples=None):
-    if samples is None:
-      return np.array(self.ptr.getCov())
-    else:
-      return np.array(self.ptr.getCov(samples))
+  dtype = _BINNED_DTYPES[data.dtype]
+  if not(out is None) and out.dtype == data.dtype:
+    dtype = data.dtype
+  NVars = int(np.prod(data.shape[:-1]))
+  out   = _outBuffer(out, [NVars, data.shape[-1]//NBinSize], dtype)
+  if isinstance(data, h5py.Dataset):
+    for b0, chunk in _iterChunks(data, NBinSize):
+      _binChunk(chunk, NBinSize, out, b0, nThreads)
+  else:
+    _binChunk(
+      np.asarray(data).reshape([NVars, data.shape[-1]]), NBinSize, out, 0,
+      nThreads
+    )
+  return out
 
-#--------------- python version-----------------------------
-cdef class ComplexBootstrapper(object):
-  cdef Bootstrapper[complex] *ptr
-  #------------
-  def __cinit__(
-    self,
-    vector[vector[complex]] data, 
-    NSamples=None,
-    NSize=None,
-    NBinSize=None,
-    indices=None,
-  ):
-    if not(NSamples is None) and not(NSize is None) and not(NBinSize is None):
-      self.ptr = new Bootstrapper[complex](
-        data, NSamples, NSize, NBinSize
+#-----------------------------------------------------------
+def jackknifeMeans(
+  data, totals, size_t v0=0, v1=None, size_t s0=0, s1=None, size_t nThreads=1
+):
+  """
+  Returns the jackknife (leave-one-out) means of the binned data of shape
+  'NVars x NBins' for the variables '[v0, v1)' and left out bins '[s0, s1)'.
+  The 'totals' are the sums of the data over the bins. Each mean is computed
+  as '(totals[v] - data[v, s])/(NBins-1)'.
+  """
+  cdef size_t vEnd = data.shape[0] if v1 is None else v1
+  cdef size_t sEnd = data.shape[1] if s1 is None else s1
+  cdef const double[:, ::1] dData
+  cdef const double[::1] dTotals
+  cdef double[:, ::1] dOut
+  cdef const double complex[:, ::1] cData
+  cdef const double complex[::1] cTotals
+  cdef double complex[:, ::1] cOut
+  out = np.empty([vEnd-v0, sEnd-s0], dtype=data.dtype)
+  if out.size == 0:
+    return out
+  if data.dtype == np.float64:
+    dData   = np.ascontiguousarray(data)
+    dTotals = np.ascontiguousarray(totals, dtype=np.float64)
+    dOut    = out
+    with nogil:
+      jackknifeSamples[double](
+        &dData[0, 0], dData.shape[1], dData.shape[1], &dTotals[0],
+        v0, vEnd, s0, sEnd, &dOut[0, 0], nThreads
       )
-    elif not(indices is None) and not(NBinSize is None):
-      self.ptr = new Bootstrapper[complex](
-        data, indices, NBinSize
+  elif data.dtype == np.complex128:
+    cData   = np.ascontiguousarray(data)
+    cTotals = np.ascontiguousarray(totals, dtype=np.complex128)
+    cOut    = out
+    with nogil:
+      jackknifeSamples[complex](
+        &cData[0, 0], cData.shape[1], cData.shape[1], &cTotals[0],
+        v0, vEnd, s0, sEnd, &cOut[0, 0], nThreads
       )
-    else:
-      raise ValueError(
-        "Either construct Bootstrapper from [data, NSampels, NSize, NBinSize]"+
-        " or [data, indices, NBinSize]."
+  else:
+    raise TypeError("Input data needs to be of type 'float' or 'complex'")
+  return out
+
+#-----------------------------------------------------------
+## Names of the block resampling schemes
+_BLOCK_SCHEMES = {
+  "moving":     movingBlocks,
+  "stationary": stationaryBlocks,
+}
+
+#-----------------------------------------------------------
+def _blockScheme(name):
+  """Returns the 'BlockScheme' for the scheme name."""
+  if not(name in _BLOCK_SCHEMES):
+    raise KeyError(
+      "Unknown block scheme '{}'. Choose one of {}.".format(
+        name, list(_BLOCK_SCHEMES)
       )
-  #------------
-  @property
-  def NSamples(self):
-    return  self.ptr.getNSamples()
-  @property
-  def NSize(self):
-    return  self.ptr.getNSize()
-  @property
-  def NBinSize(self):
-    return  self.ptr.getNBinSize()
-  @property
-  def NConfigs(self):
-    return  self.ptr.getNConfigs()
-  @property
-  def NVars(self):
-    return  self.ptr.getNVars()
-  @property
-  def NBins(self):
-    return  self.ptr.getNBins()
-  @property
-  def data(self):
-    return  np.array(self.ptr.getData())
-  @property
-  def indices(self):
-    return  np.array(self.ptr.getIndices())
-  @property
-  def mean(self):
-    return np.array(self.ptr.getMean())
-  #------------
-  def __str__(self):
-    return "ComplexBootstrapper({NSamples},{NSize},{NBinSize})".format(
-      NSamples=self.NSamples, NSize=self.NSize, NBinSize=self.NBinSize
     )
-  def __repr__(self):
-    return str(self)
-  #------------
-  def _getSamples(self):
-    return np.array(self.ptr.getSamples())
+  return _BLOCK_SCHEMES[name]
+
+#-----------------------------------------------------------
+def getBlocks(
+  uint64_t seed, size_t NConfigs, double blockLength, scheme, size_t s
+):
+  """
+  Returns the first configurations and the lengths of the circular blocks of
+  sample 's' of the block bootstrap with given seed (see 'BlockBootstrapper').
+  """
+  cdef vector[size_t] starts, lengths
+  drawBlocks(
+    seed, NConfigs, blockLength, _blockScheme(scheme), s, starts, lengths
+  )
+  return np.array(starts, dtype=np.uintp), np.array(lengths, dtype=np.uintp)
+
+#-----------------------------------------------------------
+def getPrefixSums(data, size_t nThreads=1):
+  """
+  Returns the means 'NVars' and the centered prefix sums 'NVars x (NConfigs+1)'
+  >>> prefix[v, c] = sum(data[v, :c] - mean[v])
+  of the data of shape 'NVars x NConfigs' (float or complex).
+  """
+  cdef const double[:, :] dData
+  cdef double[::1] dMean
+  cdef double[:, ::1] dPrefix
+  cdef const double complex[:, :] cData
+  cdef double complex[::1] cMean
+  cdef double complex[:, ::1] cPrefix
+  if not(data.dtype in _BINNED_DTYPES):
+    raise TypeError("Input data needs to be of type 'float' or 'complex'")
+  data   = data.astype(_BINNED_DTYPES[data.dtype], copy=False)
+  mean   = np.empty(data.shape[0], dtype=data.dtype)
+  prefix = np.empty([data.shape[0], data.shape[1]+1], dtype=data.dtype)
+  if mean.size == 0 or data.shape[1] == 0:
+    return mean, prefix
+  if data.dtype == np.float64:
+    dData, dMean, dPrefix = data, mean, prefix
+    with nogil:
+      prefixSums[double](
+        &dData[0, 0], dData.shape[0], dData.shape[1],
+        dData.strides[0] // sizeof(double), dData.strides[1] // sizeof(double),
+        &dMean[0], &dPrefix[0, 0], nThreads
+      )
+  else:
+    cData, cMean, cPrefix = data, mean, prefix
+    with nogil:
+      prefixSums[complex](
+        &cData[0, 0], cData.shape[0], cData.shape[1],
+        cData.strides[0] // sizeof(double complex),
+        cData.strides[1] // sizeof(double complex),
+        &cMean[0], &cPrefix[0, 0], nThreads
+      )
+  return mean, prefix
+
+#-----------------------------------------------------------
+def getBlockSamples(
+  prefix, mean, double blockLength, scheme, uint64_t seed,
+  size_t v0, size_t v1, size_t s0, size_t s1, size_t nThreads=1, out=None
+):
+  """
+  Returns the block bootstrap samples '[s0, s1)' of the variables '[v0, v1)'
+  computed from the output of 'getPrefixSums' (see 'BlockBootstrapper').
+  """
+  cdef size_t NConfigs = prefix.shape[1] - 1
+  cdef BlockScheme blockScheme = _blockScheme(scheme)
+  cdef const double[:, ::1] dPrefix
+  cdef const double[::1] dMean
+  cdef double[:, ::1] dOut
+  cdef const double complex[:, ::1] cPrefix
+  cdef const double complex[::1] cMean
+  cdef double complex[:, ::1] cOut
+  out = _outBuffer(out, [v1-v0, s1-s0], prefix.dtype)
+  if out.size == 0:
+    return out
+  if prefix.dtype == np.float64:
+    dPrefix, dMean, dOut = prefix, mean, out
+    with nogil:
+      blockSamples[double](
+        &dPrefix[0, 0], &dMean[0], NConfigs, blockLength, blockScheme, seed,
+        v0, v1, s0, s1, &dOut[0, 0], nThreads
+      )
+  else:
+    cPrefix, cMean, cOut = prefix, mean, out
+    with nogil:
+      blockSamples[complex](
+        &cPrefix[0, 0], &cMean[0], NConfigs, blockLength, blockScheme, seed,
+        v0, v1, s0, s1, &cOut[0, 0], nThreads
+      )
+  return out
+
+#--------------- python version-----------------------------
+# The wrappers of each data type are generated from 'Bootstrapper.pxi.in'
+include "Bootstrapper.pxi"
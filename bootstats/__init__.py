@@ -3,6 +3,10 @@ from bootstats import PyBootstrap
 import numpy as np
 import h5py
 import os
+import concurrent.futures
+import contextlib
+import hashlib
+import shutil
 
 
 NUMPREC = 1.e-14
@@ -19,6 +23,13 @@ class Bootstrapper(object):
     NBinSize=None,
     indices=None,
     h5Info=None,
+    seed=None,
+    nThreads=1,
+    storeIndices=True,
+    mmapDir=None,
+    NGroups=1,
+    cache=None,
+    lazy=False,
   ):
     """
     Bootstrapper class which can be used to compute the bootstrapped 
@@ -27,7 +38,7 @@ class Bootstrapper(object):
 
     The class can be initialized in three different ways:
         1. Parameter initialization with [NSamples, NSize, NBinsize] or 
-           [NSamples, NBinsize] specified,
+           [NSamples, NBinsize] specified (optionally with a seed),
         2. Indices initialization with [indices, NBinSize] specified,
         3. File initialization with h5Info specified.
     Independent on the initialization choice, one must specify the input data.
@@ -36,10 +47,17 @@ class Bootstrapper(object):
     ----------
     data : ndarray (varShape x NConfigs), float or complex
         Input data which is used to compute the bootstrapped distribution of 
-        the means. The first dimensions are the number of variables contained in
-        the data. It is the final goal to find the mean distribution for each 
-        variable after bootstrapping. The last dimension is the number of
+        the means. The first dimensions are the number of variables contained
+        in the data. It is the final goal to find the mean distribution for
+        each variable after bootstrapping. The last dimension is the number of
         'Configurations' -- the random values each variable is drawn from.
+        The data can also be a 'h5py.Dataset' or a dictionary with values for
+        the keys 'fileName' and 'datasetName' pointing to a dataset in a HDF5
+        file. In this case, the data is read and binned chunk by chunk along
+        the configurations and only the binned data is kept in memory.
+        Single precision data ('np.float32' or 'np.complex64') is stored in
+        single precision (binned data and samples) while sums, means and
+        (co)variances are accumulated in double precision.
 
     NSamples : integer, (initialization method 1)
         The number of different bootstrap configurations which will be drawn
@@ -60,11 +78,17 @@ class Bootstrapper(object):
         'self.data[i] = mean(data[i:i+NBinSize])'.
         This can reduce auto correlations within the data.
 
-    indices : two-dimensional ndarray (NSamples x NSize), int
-              (initialization method 2)
+    indices : two-dimensional ndarray (NGroups*NSamples x NSize), int, or
+              'BootstrapIndices' (initialization method 2)
         The random indices for computing the bootstrap distribution of the mean.
+        'BootstrapIndices' (e.g. 'self.indexSet' of another 'Bootstrapper')
+        are shared without copy and determine 'NSamples', 'NSize', 'NGroups'
+        and the seed.
         They are drawn from an uniform distribution 'U(0, NBins-1)' -- 
         corresponding to indices for the binned data.
+        The indices are stored in the smallest unsigned integer type which
+        holds 'NBins-1' (see 'PyBootstrap.indexDtype'), e.g., 'uint16' for
+        'NBins <= 65536'. Input of different type is converted.
 
     h5Info: dictionary with values for keys 'fileName' and 'groupName'
             (initialization method 3)
@@ -72,6 +96,64 @@ class Bootstrapper(object):
         The fileName must point to a valid HDF5 file while the groupName
         must point group conainting the exported 'bootstrap' group.
         This reads the indices and parameters contained in the HDF5 file.
+        If the file contains a seed, the indices are regenerated from the seed
+        instead of being read.
+
+    seed : integer or None, (initialization method 1)
+        The 64 bit seed of the counter based random number generator which
+        draws the indices. Each index is a pure function of the seed, the
+        sample and the position within the sample. Thus, the same seed always
+        yields the same indices -- independent of the number of threads.
+        If None, a random seed is drawn from the system entropy source.
+
+    nThreads : integer, optional
+        The number of threads used for generating the indices and computing the
+        bootstrap samples.
+        The threads share the work over variables (or samples if there are
+        less variables than threads). If zero, all available cores are used.
+        The samples do not depend on the number of threads.
+
+    storeIndices : boolean, optional (initialization method 1 and 3)
+        If False, the indices are never stored. The C++ routines regenerate
+        them from the seed for each block of samples while computing the
+        samples. This reduces the memory from 'NSamples x NSize' indices to one
+        block. Accessing 'self.indices' generates all indices in this case.
+
+    mmapDir : string or None, optional
+        If specified, the binned data and the samples are stored in the
+        memory mapped '.npy' files 'data.npy' and 'samples.npy' in this
+        directory (created if needed, existing files are overwritten). The
+        C++ routines write directly into these files. Other processes can
+        share the arrays through the page cache by loading the files with
+        'np.load(fileName, mmap_mode="r")'. Use one directory per
+        'Bootstrapper'.
+
+    NGroups : integer, optional (initialization method 1 and 2)
+        The number of groups of variables with independent indices. The
+        flattened variables are split into 'NGroups' consecutive groups of
+        equal size ('NVars' must be a multiple of 'NGroups'). Group 'g' uses
+        the indices 'self.indices[g*NSamples:(g+1)*NSamples]' -- which are the
+        indices of the samples '[g*NSamples, (g+1)*NSamples)' of a
+        'Bootstrapper' with one group and 'NGroups*NSamples' samples. Thus all
+        groups are bootstrapped in one call of the C++ routines.
+        See also 'BatchBootstrapper'.
+
+    cache : 'BootstrapCache', string or None, optional
+        A persistent cache (or its directory) of the binned data and samples
+        (initialization method 1 and 2). The key is the hash of the input
+        data, the parameters and the seed (or indices). If the key is in the
+        cache, the binned data and the samples are loaded instead of being
+        computed. Otherwise they are stored in the cache once computed. If
+        no seed is specified, a random seed is drawn (thus a new key).
+
+    lazy : boolean, optional
+        If True, the data is neither binned nor are the indices generated
+        during the initialization. The binned data, the indices, the mean and
+        the samples are computed on first access and can be released again
+        (see 'self.release'). The parameters and the seed are available
+        immediately. Indices are generated from the seed without binning the
+        data. The input data (or the file and dataset name) is kept and must
+        not be modified while the 'Bootstrapper' is in use.
 
     See Also
     --------
@@ -82,7 +164,9 @@ class Bootstrapper(object):
     This class is a wrapper for a C++ file. Thus, the routines are more 
     efficient than numpy routines (tested on my machine only).
     The actual data handeled by the C++ routines are two-dimensional. This
-    wrapper reshapes the data internally.
+    wrapper reshapes the data internally. The C++ routines read the input
+    array directly through its buffer (including strides), thus the data is
+    not copied before binning.
 
     Examples
     --------
@@ -98,14 +182,14 @@ class Bootstrapper(object):
     >>> )
     >>> bs1
     Bootstrapper(NSamples=1000, NSize=400, NBinSize=5, NConfigs=2000, 
-    NVars=128, NBins=400)
+    NVars=128, NBins=400, NGroups=1)
 
     Indices initialization:
 
     >>> bs2  = boot.Bootstrapper(data, indices=bs1.indices)
     >>> print(bs2, bs2 == bs1)
     Bootstrapper(NSamples=1000, NSize=400, NBinSize=5, NConfigs=2000, 
-    NVars=128, NBins=400), True
+    NVars=128, NBins=400, NGroups=1), True
 
     H5File initialization:
 
@@ -114,8 +198,32 @@ class Bootstrapper(object):
     >>> bs3 = boot.Bootstrapper(data, h5Info=h5Info)
     >>> print(bs3, bs3 == bs1)
     Bootstrapper(NSamples=1000, NSize=400, NBinSize=5, NConfigs=2000, 
-    NVars=128, NBins=400), True
+    NVars=128, NBins=400, NGroups=1), True
     """
+    # Open the dataset if data is given by file and dataset name
+    if isinstance(data, dict):
+      with _openData(data) as dataset:
+        Bootstrapper.__init__(
+          self,
+          dataset,
+          NSamples=NSamples,
+          NSize=NSize,
+          NBinSize=NBinSize,
+          indices=indices,
+          h5Info=h5Info,
+          seed=seed,
+          nThreads=nThreads,
+          storeIndices=storeIndices,
+          mmapDir=mmapDir,
+          NGroups=NGroups,
+          cache=cache,
+          lazy=lazy,
+        )
+      # The dataset is closed: open it again when the data is binned
+      if lazy:
+        self._input = data
+      return
+
     # Check whether input is given by HDF5 file
     if not(h5Info is None):
       # Check if input is correct
@@ -128,100 +236,154 @@ class Bootstrapper(object):
         )
 
       # Open group
-      bootAddress = os.path.join("/", groupName, "bootstrap")
       with h5py.File(fileName, "r") as f:
-        bootGroup = f.get(bootAddress)
-        # Check wether group exists
-        if bootGroup is None:
-          raise KeyError("Could not open group: {}".format(bootAddress))
+        bootGroup  = _getBootGroup(f, groupName)
+        parameters = _readParameters(bootGroup)
 
         # Read file
         ## Read NBinSize
-        NBinSize = bootGroup.get("NBinSize").value
-        ## Read indices
-        indices = bootGroup.get("indices").value
+        NBinSize = parameters["NBinSize"]
+        ## Read NGroups (not present in files with one group)
+        NGroups = int(parameters.get("NGroups", 1))
+        ## Regenerate indices from seed if present, else read indices
+        if "seed" in parameters:
+          seed     = int(parameters["seed"])
+          NSamples = parameters["NSamples"]
+          NSize    = parameters["NSize"]
+        else:
+          indices = bootGroup["indices"][()]
     else:
       if indices is None: # Check if not constructed by indices
         if not(NSamples is None) and \
            not(NBinSize is None) and \
                NSize    is None:
-          # Set NSize to be NConfigs/NBinSize = NBins
-          NSize = max(int(data.shape[-1]/NBinSize), 1)
-
-          # Check wether numbers are in right range
-          if NSize < 1:
-            raise ValueError(
-              "NSize must be larger then zero. Received {}".format(NSize)
-            )
-          if NBinSize < 1:
-            raise ValueError(
-              "NBinSize must be larger then zero. Received {}".format(NBinSize)
-            )
-          if NSamples < 1:
-            raise ValueError(
-              "NSamples must be larger then zero. Received {}".format(NSamples)
-            )
-
-
-    # Flatten the data for C++ module
-    data = np.array(data)
+          # Set NSize to be NConfigs/NBinSize = NBins (NBinSize checked below)
+          NSize = max(data.shape[-1] // max(int(NBinSize), 1), 1)
+
+
+    # Flatten the data for C++ module (no copy for strided ndarrays)
+    # Datasets are read and flattened chunk by chunk while binning
+    streamed = isinstance(data, h5py.Dataset)
+    if not(streamed):
+      data = np.asarray(data)
     if len(data.shape) > 2:
       # Store old shape
       self._varShape = list(data.shape[:-1])
       # and make two-dimensional
-      data = data.reshape([np.prod(self._varShape), data.shape[-1]])
+      if not(streamed):
+        data = data.reshape([np.prod(self._varShape), data.shape[-1]])
     # If already in correct shape
     else:
       self._varShape = None
 
+    # Shared indices determine the index parameters
+    indexSet = None
+    if isinstance(indices, BootstrapIndices):
+      indexSet, indices = indices, None
+      NSamples = indexSet.NSamples
+      NSize    = indexSet.NSize
+      NGroups  = indexSet.NGroups
+      seed     = indexSet.seed
+      if seed is None: # The indices are shared without copy
+        indices = indexSet.array
+      if not(NBinSize is None) and data.shape[-1]//NBinSize != indexSet.NBins:
+        raise ValueError(
+          "The indices are drawn from {} bins. Received {} bins".format(
+            indexSet.NBins, data.shape[-1]//NBinSize
+          )
+        )
 
-    # initialize the C++ object
-    # Check data type
-    if isinstance(data[0,0], float):
-      self.boot = PyBootstrap.DoubleBootstrapper(
-        data, 
-        NSamples=NSamples, 
-        NSize=NSize, 
-        NBinSize=NBinSize, 
-        indices=indices
-      )
-    elif isinstance(data[0,0], complex):
-      self.boot = PyBootstrap.ComplexBootstrapper(
-        data, 
-        NSamples=NSamples, 
-        NSize=NSize, 
-        NBinSize=NBinSize, 
-        indices=indices
+    # Check whether the variables can be split into groups
+    NVars = int(np.prod(data.shape[:-1]))
+    if NGroups < 1 or NVars % NGroups != 0:
+      raise ValueError(
+        "NGroups must divide the number of variables {}. Received {}".format(
+          NVars, NGroups
+        )
+      )
+    if not(indices is None) and np.shape(indices)[0] % NGroups != 0:
+      raise ValueError(
+        "The number of index rows must be a multiple of NGroups."
+        + " Received {} rows for {} groups".format(
+          np.shape(indices)[0], NGroups
+        )
       )
+
+    # Check data type
+    if data.dtype == np.float64:
+      bootstrapper = PyBootstrap.DoubleBootstrapper
+    elif data.dtype == np.complex128:
+      bootstrapper = PyBootstrap.ComplexBootstrapper
+    elif data.dtype == np.float32:
+      bootstrapper = PyBootstrap.FloatBootstrapper
+    elif data.dtype == np.complex64:
+      bootstrapper = PyBootstrap.ComplexFloatBootstrapper
     else:
       raise TypeError("Input data needs to be of type 'float' or 'complex'")
 
+    # Check the initialization method
+    if NBinSize is None or \
+       (indices is None and (NSamples is None or NSize is None)):
+      raise ValueError(
+        "Either construct Bootstrapper from [data, NSampels, NSize, NBinSize]"+
+        " or [data, indices, NBinSize]."
+      )
+    if indices is None:
+      if seed is None:
+        seed = PyBootstrap.randomSeed()
+    else:
+      NSamples = np.shape(indices)[0] // NGroups
+      NSize    = np.shape(indices)[1]
+
+    # Check wether numbers are in right range (for all initializations)
+    if NBinSize < 1:
+      raise ValueError(
+        "NBinSize must be larger then zero. Received {}".format(NBinSize)
+      )
+    if NBinSize > data.shape[-1]:
+      raise ValueError(
+        "NBinSize must not be larger than the number of configurations {}."
+        .format(data.shape[-1]) + " Received {}".format(NBinSize)
+      )
+    if NSamples < 1:
+      raise ValueError(
+        "NSamples must be larger then zero. Received {}".format(NSamples)
+      )
+    if NSize < 1:
+      raise ValueError(
+        "NSize must be larger then zero. Received {}".format(NSize)
+      )
+
     # set the members
     ## The number of to be generated bootstrap samples.
-    self.NSamples = self.boot.NSamples
+    self.NSamples = int(NSamples)
     ## The number of bins contained in each individual bootstrap sample.
-    self.NSize    = self.boot.NSize
+    self.NSize    = int(NSize)
     ## The number of configurations contained in one bin.
-    self.NBinSize = self.boot.NBinSize
+    self.NBinSize = int(NBinSize)
     ## The number of configurations in the ensemble. 
     ## This is the first dimension of the input array.
-    self.NConfigs = self.boot.NConfigs
+    self.NConfigs = data.shape[-1]
     ## The number of variables in the ensemble.
     ## Second dimension of the input array.
-    self.NVars    = self.boot.NVars
+    self.NVars    = NVars
     ## The number of bins given by 'NConfigs/NBinSize'.
     ## In case 'NConfigs % NBinSize != 0', the remainder is skipped at the 
     #  beginning of the input data array.
-    self.NBins    = self.boot.NBins
-    ## The binned data of size 'NVars x NBins'.
-    # Note that this is not the input data.
-    self._data     = self.boot.data
-    ## The bootstrap indicies of size 'NSamples x NSize'.
-    self._indices  = self.boot.indices
-    ## Returns the mean of the 'data'.
-    # Note: This mean is also equal to the mean of the input data modulo the 
-    # binning cutoff.
-    self._mean     = self.boot.mean
+    self.NBins    = self.NConfigs // self.NBinSize
+    ## The number of groups of variables with independent indices.
+    self.NGroups  = NGroups
+    ## The seed of the indices (None if initialized by indices without seed).
+    self.seed     = None if seed is None else int(seed)
+    ## Whether the C++ object stores the indices.
+    self.storeIndices = storeIndices
+    ## Directory of the memory mapped binned data and samples (or None).
+    self.mmapDir  = mmapDir
+    ## Whether the binned data and indices are computed on first use.
+    self.lazy     = lazy
+
+    ## The number of threads used for computing the samples.
+    self.nThreads = nThreads
 
     ## Dictionary containing informative parameters
     self.parameters = {
@@ -231,16 +393,323 @@ class Bootstrapper(object):
       "NConfigs": self.NConfigs,
       "NVars":    self.NVars,
       "NBins":    self.NBins,
+      "NGroups":  self.NGroups,
     }
 
-    ## Dictionary containing informative parameters
-    self._samples = None
+    ## The type of the C++ object.
+    self._bootstrapper = bootstrapper
+    ## The C++ object holding the binned data (and indices). Constructed by
+    #  'self._construct' on first use of 'self.boot'.
+    self._boot        = None
+    ## The (flattened) input data. Only kept in lazy mode to construct the
+    #  C++ object after a release.
+    self._input       = data if lazy else None
+    ## Whether the instance was constructed from indices.
+    self._byIndices   = not(indices is None)
+    ## The indices shared with the C++ object (None if stored by the C++
+    #  object, generated on the fly or not generated yet).
+    self._indexBuffer = None
+    if self._byIndices:
+      self._indexBuffer = PyBootstrap._indexBuffer(indices, self.NBins)
+    ## The shared indices (created on first access of 'self.indexSet').
+    self._indexSet    = indexSet
+    ## The mean of the binned data once computed.
+    self._meanBuffer  = None
+    ## The bootstrap samples of size 'NVars x NSamples' once computed.
+    self._samples     = None
+    ## The cache of the binned data and samples (or None).
+    self._cache       = None
+    if not(cache is None):
+      self._cache = cache if isinstance(cache, BootstrapCache) \
+        else BootstrapCache(cache)
+    ## The key of the binned data and samples in the cache once computed.
+    self._cacheKey    = None
+    ## The binned data of an extended ensemble (see 'self.extend').
+    self._binned      = None
+    ## The appended configurations which do not fill a bin yet.
+    self._pending     = None
+
+    if not(lazy):
+      self._construct(data)
+
+  #------------------
+  @contextlib.contextmanager
+  def _openInput(self, data=None):
+    """
+    Yields the input data 'data' or, if None, the stored input data. Input
+    given by file and dataset name is opened for the time of the context.
+    """
+    data = self._input if data is None else data
+    if data is None:
+      raise ValueError(
+        "The input data is not kept. Construct the Bootstrapper with"
+        + " 'lazy=True' to release the binned data or indices."
+      )
+    with _openData(data) as data:
+      yield data
+
+  #------------------
+  def _getCacheKey(self, data=None):
+    """Returns the key of the binned data and samples in 'self._cache'."""
+    if self._cacheKey is None:
+      with self._openInput(data) as data:
+        self._cacheKey = self._cache.key(data, {
+          "varShape": self._varShape,
+          "NSamples": self.NSamples,
+          "NSize":    self.NSize,
+          "NBinSize": self.NBinSize,
+          "NGroups":  self.NGroups,
+          "seed":     None if self._byIndices else self.seed,
+        }, indices=self._indexBuffer if self._byIndices else None)
+    return self._cacheKey
+
+  #------------------
+  def _construct(self, data=None):
+    """
+    Constructs the C++ object: bins the input data 'data' (or the stored
+    input data) and generates the indices (if stored). Uses the binned data
+    and samples of the cache if present.
+    """
+    cached = {}
+    if not(self._cache is None):
+      cached = self._cache.load(self._getCacheKey(data))
+    # The binned data of an extended ensemble replaces the input data
+    if not(self._binned is None):
+      cached = {"data": self._binned}
+      opened = contextlib.nullcontext(np.broadcast_to(
+        np.zeros(1, dtype=self._binned.dtype),
+        [self.NVars, self.NBins*self.NBinSize]
+      ))
+    else:
+      opened = self._openInput(data)
+
+    with opened as data:
+      # Bin data directly into the memory mapped file
+      dataOut = None
+      if not(self.mmapDir is None):
+        dataOut = _openMemmap(
+          self.mmapDir, "data.npy", data.dtype, [self.NVars, self.NBins]
+        )
+      # Use the cached binned data instead of binning
+      if "data" in cached:
+        if dataOut is None:
+          dataOut = cached["data"]
+        else:
+          dataOut[...] = cached["data"]
+
+      # Indices are passed if given (or already generated)
+      if self._indexBuffer is None and self.storeIndices and \
+         not(self._indexSet is None):
+        self._indexBuffer = self._indexSet.array
+      byIndices = not(self._indexBuffer is None)
+      self._boot = self._bootstrapper(
+        data,
+        NSamples=None if byIndices else self.NSamples,
+        NSize=None if byIndices else self.NSize,
+        NBinSize=self.NBinSize,
+        indices=self._indexBuffer,
+        seed=self.seed,
+        nThreads=self.nThreads,
+        storeIndices=self.storeIndices,
+        dataOut=dataOut,
+        NGroups=self.NGroups,
+        dataBinned="data" in cached,
+      )
+    if isinstance(dataOut, np.memmap):
+      dataOut.flush()
+
+    if self._samples is None:
+      self._samples = cached.get("samples")
+    if not(self._cache is None) and not("data" in cached):
+      self._cache.store(self._cacheKey, "data", self._boot.data)
+
+  #------------------
+  @property
+  def boot(self):
+    """
+    Returns the C++ object (constructed on first access).
+    """
+    if self._boot is None:
+      self._construct()
+    return self._boot
+
+  #------------------
+  @property
+  def _data(self):
+    """The binned data of size 'NVars x NBins' (not the input data)."""
+    return self.boot.data
+
+  #------------------
+  @property
+  def _mean(self):
+    """
+    The mean of the binned data.
+    Note: This mean is also equal to the mean of the input data modulo the 
+    binning cutoff.
+    """
+    if self._meanBuffer is None:
+      self._meanBuffer = self.boot.mean
+    return self._meanBuffer
+
+  #------------------
+  @property
+  def _indices(self):
+    """
+    The bootstrap indicies of size 'NGroups*NSamples x NSize'.
+    None if generated on the fly (or not generated yet).
+    """
+    if not(self._indexBuffer is None):
+      return self._indexBuffer
+    if not(self._boot is None) and self._boot.storeIndices:
+      return self._boot.indices
+    return None
+
+  #------------------
+  def release(self, *names):
+    """
+    Releases the binned data, the indices, the mean and/or the samples. They
+    are computed again on the next access.
+
+    Parameters
+    ----------
+    names : strings, optional
+        The members to release: 'data', 'indices', 'mean' and 'samples'.
+        If none are given, all are released.
+
+    Notes
+    -----
+    The binned data and the indices stored by the C++ routines are released
+    together. Thus releasing either requires the input data which is only
+    kept in lazy mode. Indices which were passed to the constructor (without
+    seed) are never released.
+
+    Examples
+    --------
+    >>> bs = boot.Bootstrapper(data, NSamples=1000, NBinSize=5, lazy=True)
+    >>> mean, var = bs.moments() # bins the data and generates the indices
+    >>> bs.release() # keeps the parameters and the seed
+    """
+    allNames = ["data", "indices", "mean", "samples"]
+    names = names if names else allNames
+    for name in names:
+      if not(name in allNames):
+        raise ValueError(
+          "Can only release {}. Received '{}'".format(allNames, name)
+        )
+    if "samples" in names:
+      self._samples = None
+    if "mean" in names:
+      self._meanBuffer = None
+    releaseIndices = "indices" in names and not(self._byIndices)
+    if "data" in names or releaseIndices:
+      if not(self._boot is None) and self._input is None and \
+         self._binned is None:
+        raise ValueError(
+          "The input data is not kept. Construct the Bootstrapper with"
+          + " 'lazy=True' to release the binned data or indices."
+        )
+      self._boot = None
+    if releaseIndices:
+      self._indexBuffer = None
+
+  #------------------
+  def extend(self, newConfigs):
+    """
+    Appends configurations to the ensemble, e.g., of a growing Monte Carlo
+    chain. Only the new configurations are binned; the existing bins are
+    kept. The samples are not updated incrementally: every index depends on
+    the number of bins, thus all samples are resampled (at the full cost of
+    'self.samples') on the next access.
+
+    Parameters
+    ----------
+    newConfigs : ndarray (varShape x NNew), float or complex
+        The configurations which are appended to the input data. New
+        configurations which do not fill a bin are kept until the next call.
+
+    Notes
+    -----
+    The indices are drawn again from the seed for the new number of bins.
+    Thus the instance is equal to a 'Bootstrapper' with the same seed and
+    parameters for the concatenated data without the pending configurations
+    (the remainder 'NConfigs % NBinSize' is still skipped at the beginning).
+    'NConfigs' does not count pending configurations. 'NSize' follows the
+    number of bins if it was equal to it. The samples, mean and indices are
+    computed again on the next access. The cache is not used after
+    extending. Shared indices are not extended (a new 'self.indexSet' is
+    created). For samples which are updated with each new bin at a cost
+    proportional to the new bins, see 'PoissonBootstrapper.extend'.
+
+    Examples
+    --------
+    >>> bs = boot.Bootstrapper(data[..., :1000], NSamples=1000, NBinSize=5)
+    >>> bs.extend(data[..., 1000:2000])
+    >>> bs == boot.Bootstrapper(data, NSamples=1000, NBinSize=5, seed=bs.seed)
+    True
+    """
+    if self._byIndices:
+      raise ValueError(
+        "Can only extend Bootstrappers with seed."
+        + " Received a Bootstrapper initialized by indices."
+      )
+    # Flatten the new configurations (the type of the binned data is kept)
+    binned     = self._data
+    newConfigs = np.asarray(newConfigs, dtype=binned.dtype)
+    varShape   = [self.NVars] if self._varShape is None else self._varShape
+    if list(newConfigs.shape[:-1]) != list(varShape):
+      raise ValueError(
+        "New configurations must be of shape 'varShape x NNew' = {}."
+        .format(list(varShape) + ["NNew"])
+        + " Received {}".format(list(newConfigs.shape))
+      )
+    newConfigs = newConfigs.reshape([self.NVars, newConfigs.shape[-1]])
+    if not(self._pending is None):
+      newConfigs = np.concatenate([self._pending, newConfigs], axis=1)
+
+    # Bin the complete bins of the new configurations
+    NNew = newConfigs.shape[1] // self.NBinSize
+    newBins = PyBootstrap.binArray(
+      newConfigs[:, :NNew*self.NBinSize], self.NBinSize,
+      out=np.empty([self.NVars, NNew], dtype=binned.dtype),
+      nThreads=self.nThreads,
+    )
+    self._pending = newConfigs[:, NNew*self.NBinSize:].copy()
+    # Pending configurations are counted once they fill a bin
+    self.NConfigs += NNew*self.NBinSize
+    # Copy the bins before the C++ object (and memory map) is released
+    self._binned = np.concatenate([binned, newBins], axis=1)
+    self._boot   = None
+
+    # Update the parameters
+    if self.NSize == self.NBins:
+      self.NSize = self.NBins + NNew
+    self.NBins += NNew
+    self.parameters.update({
+      "NSize":    self.NSize,
+      "NConfigs": self.NConfigs,
+      "NBins":    self.NBins,
+    })
+
+    # Release everything which depends on the number of bins
+    self._input       = None
+    self._samples     = None
+    self._meanBuffer  = None
+    self._indexBuffer = None
+    self._indexSet    = None
+    self._cache       = None
+    self._cacheKey    = None
 
   #------------------
-  def _getSamples(self):
+  def _getSamples(self, out=None):
     """
     Returns the bootstrap samples.
 
+    Parameters
+    ----------
+    out : ndarray or None, optional
+        C-contiguous array of size 'self.NVars x self.NSamples' and type of
+        'self.data' (e.g. a 'np.memmap') the samples are written to.
+
     Returns
     ----------
     out : ndarray
@@ -252,12 +721,14 @@ class Bootstrapper(object):
     -----
     This is the most expensive computation. The output array is not stored
     within this class. Make sure, if you want to use it, to store it elsewhere.
+    The computation is distributed over 'self.nThreads' threads and releases
+    the GIL.
 
     See Also
     --------
     'samples'
     """
-    return self.boot._getSamples()
+    return self.boot._getSamples(self.nThreads, out=out)
 
   #------------------
   @property
@@ -276,16 +747,441 @@ class Bootstrapper(object):
     -----
     This is the most expensive computation. For this reason this array
     is initialized only after accesing this member and stored afterwards.
+    If 'self.mmapDir' is specified, the samples are stored in the memory
+    mapped file 'samples.npy' in this directory.
     """
-    # Compute if not already computed
+    # Compute if not already computed (or cached)
+    boot = self.boot
     if self._samples is None:
-      self._samples = self._getSamples()
+      if self.mmapDir is None:
+        self._samples = self._getSamples()
+      else: # directly write to the memory mapped file
+        self._samples = self._getSamples(out=_openMemmap(
+          self.mmapDir, "samples.npy", self._data.dtype,
+          [self.NVars, self.NSamples]
+        ))
+        self._samples.flush()
+      if not(self._cache is None):
+        self._cache.store(self._cacheKey, "samples", self._samples)
     # Reshape if required
     if self._varShape is None:
       return self._samples
     else:
       return self._samples.reshape(self._varShape + [self.NSamples])
 
+  #------------------
+  def iterSamples(self, blockVars=None, blockSamples=None):
+    """
+    Iterates the bootstrap samples block by block.
+
+    Parameters
+    ----------
+    blockVars : integer or None, optional
+        The (maximal) number of variables of each block. If None, each block
+        contains all variables.
+
+    blockSamples : integer or None, optional
+        The (maximal) number of samples of each block. If None, each block
+        contains all samples.
+
+    Yields
+    ----------
+    varSlice, sampleSlice : slice
+        The variables and samples of the block. Variables are counted in the
+        flattened variable dimension of size 'self.NVars'.
+
+    block : ndarray
+        The bootstrap samples of size 'blockVars x blockSamples' (or smaller
+        for the last blocks). It is equal to
+        >>> self.samples.reshape([self.NVars, self.NSamples])[varSlice, sampleSlice]
+
+    Notes
+    -----
+    The blocks are computed when they are requested and are not stored
+    within this class. Thus only one block has to fit into memory. Blocks
+    iterate all variables for each range of samples. The computation is
+    distributed over 'self.nThreads' threads and releases the GIL.
+
+    See Also
+    --------
+    'samples'
+    """
+    blockVars    = self.NVars    if blockVars    is None else blockVars
+    blockSamples = self.NSamples if blockSamples is None else blockSamples
+    if blockVars < 1 or blockSamples < 1:
+      raise ValueError(
+        "Block sizes must be larger then zero. Received {}".format(
+          (blockVars, blockSamples)
+        )
+      )
+    for s0 in range(0, self.NSamples, blockSamples):
+      s1 = min(s0 + blockSamples, self.NSamples)
+      for v0 in range(0, self.NVars, blockVars):
+        v1 = min(v0 + blockVars, self.NVars)
+        # Use the stored samples if already computed
+        if self._samples is None:
+          block = self.boot._getSampleBlock(v0, v1, s0, s1, self.nThreads)
+        else:
+          block = self._samples[v0:v1, s0:s1]
+        yield slice(v0, v1), slice(s0, s1), block
+
+  #------------------
+  def getDerivedSamples(self, estimators, blockSamples=None):
+    """
+    Returns the bootstrap samples of derived quantities.
+
+    The estimators are applied to blocks of samples while the samples are
+    computed. Only the derived samples are stored.
+
+    Parameters
+    ----------
+    estimators : callable or dictionary of callables
+        Vectorised functions (e.g. NumPy expressions) which map the samples
+        of shape 'varShape x NBlockSamples' to the derived samples of shape
+        'derivedShape x NBlockSamples'. The last dimension must be the
+        samples dimension, each sample must be mapped independently.
+
+    blockSamples : integer or None, optional
+        The number of samples per block. If None, blocks contain about 2^22
+        entries.
+
+    Returns
+    ----------
+    out : ndarray 'derivedShape x NSamples' or dictionary of ndarrays
+        The derived samples for each estimator (same keys as 'estimators').
+
+    Examples
+    --------
+    Effective masses of correlators 'C(t)' stored as 'data[t, config]':
+
+    >>> effMass = bs.getDerivedSamples(
+    >>>     lambda corr: np.log(corr[:-1] / corr[1:])
+    >>> )
+    >>> effMass.mean(axis=-1), effMass.std(axis=-1)
+
+    Several estimators at once:
+
+    >>> derived = bs.getDerivedSamples({
+    >>>     "ratio": lambda x: x[0] / x[1],
+    >>>     "product": lambda x: x[0] * x[1],
+    >>> })
+    """
+    asDict = isinstance(estimators, dict)
+    if not(asDict):
+      estimators = {None: estimators}
+    if blockSamples is None:
+      blockSamples = max(2**22 // self.NVars, 1)
+    varShape = [self.NVars] if self._varShape is None else self._varShape
+
+    derived = {}
+    for _, sampleSlice, block in self.iterSamples(blockSamples=blockSamples):
+      block = block.reshape(varShape + [block.shape[-1]])
+      for key, estimator in estimators.items():
+        derivedBlock = np.asarray(estimator(block))
+        if not(key in derived): # allocate once the derived shape is known
+          derived[key] = np.empty(
+            list(derivedBlock.shape[:-1]) + [self.NSamples],
+            dtype=derivedBlock.dtype
+          )
+        derived[key][..., sampleSlice] = derivedBlock
+
+    return derived if asDict else derived[None]
+
+  #------------------
+  def getCov(self):
+    """
+    Returns the covariance matrix of the bootstrap samples.
+
+    Returns
+    ----------
+    out : ndarray 'varShape x varShape'
+        The entries are
+        >>> cov[i, j] = sum_s (x[i, s] - mu[i]) * conj(x[j, s] - mu[j])/(NSamples-1)
+        where 'x' are the samples of size 'NVars x NSamples'.
+
+    Notes
+    -----
+    If the samples have not been computed yet, the computation of the samples
+    is fused with the computation of the covariance: blocks of samples are
+    computed and directly reduced. Thus the samples are never stored.
+    Only one triangle of the matrix is computed in tiles which are distributed
+    over 'self.nThreads' threads. The GIL is released.
+    """
+    boot = self.boot # Loads cached samples
+    if self._samples is None:
+      cov = boot.getCov(nThreads=self.nThreads)
+    else:
+      cov = boot.getCov(self._samples, nThreads=self.nThreads)
+    if self._varShape is None:
+      return cov
+    else:
+      return cov.reshape(self._varShape + self._varShape)
+
+  #------------------
+  def moments(self, cov=False):
+    """
+    Returns the moments of the bootstrap distribution.
+
+    Parameters
+    ----------
+    cov : boolean, optional
+        If True, also returns the covariance matrix.
+
+    Returns
+    ----------
+    mean : ndarray 'varShape'
+        The mean of the bootstrap samples.
+
+    var : ndarray 'varShape', float
+        The variance of the bootstrap samples (with 'NSamples-1' degrees of
+        freedom). Its square root is the bootstrap standard error.
+
+    cov : ndarray 'varShape x varShape', optional
+        The covariance matrix of the bootstrap samples (see 'getCov').
+
+    Notes
+    -----
+    If the samples have not been computed yet, blocks of samples are computed
+    and merged into running moments (pairwise Welford update). Thus the
+    samples are never stored and the memory is 'O(NVars)' (or 'O(NVars^2)'
+    for the covariance).
+    """
+    boot = self.boot # Loads cached samples
+    moments = boot.getMoments(self._samples, cov=cov, nThreads=self.nThreads)
+    if self._varShape is None:
+      return moments
+    shapes = [self._varShape, self._varShape, self._varShape + self._varShape]
+    return tuple(
+      moment.reshape(shape) for moment, shape in zip(moments, shapes)
+    )
+
+  #------------------
+  def _distributedTasks(self, blockVars, blockSamples):
+    """
+    Partitions the samples into blocks of at most 'blockVars' variables and
+    'blockSamples' samples which do not cross groups of variables.
+
+    Yields
+    ----------
+    v0, v1, s0, s1 : integer
+        The variables '[v0, v1)' and samples '[s0, s1)' of the block.
+
+    sOffset : integer
+        The offset of the index rows of the group of the variables.
+    """
+    NGroupVars = self.NVars // self.NGroups
+    for group in range(self.NGroups):
+      vEnd = (group + 1) * NGroupVars
+      for v0 in range(group * NGroupVars, vEnd, blockVars):
+        v1 = min(v0 + blockVars, vEnd)
+        for s0 in range(0, self.NSamples, blockSamples):
+          s1 = min(s0 + blockSamples, self.NSamples)
+          yield v0, v1, s0, s1, group * self.NSamples
+
+  #------------------
+  def _submitTasks(self, executor, tasks, moments, workerThreads):
+    """
+    Submits one '_bootstrapTask' per block of 'tasks' to 'executor'.
+    Only the binned data of the variables of the block and the seed (or the
+    indices of the block) are sent to the worker.
+
+    Returns
+    ----------
+    out : list of (v0, v1, s0, s1, future)
+    """
+    futures = []
+    for v0, v1, s0, s1, sOffset in tasks:
+      indices = None
+      if self.seed is None: # Send the indices of the samples
+        indices = self.indices[sOffset + s0:sOffset + s1]
+      futures.append((v0, v1, s0, s1, executor.submit(
+        _bootstrapTask,
+        np.asarray(self._data[v0:v1]),
+        self.NSize,
+        self.seed,
+        indices,
+        sOffset + s0,
+        sOffset + s1,
+        moments,
+        workerThreads,
+      )))
+    return futures
+
+  #------------------
+  def distributedSamples(
+    self, executor=None, NTasks=None, blockVars=None, blockSamples=None,
+    workerThreads=1
+  ):
+    """
+    Computes the bootstrap samples by distributing blocks of samples and
+    variables over the workers of an executor.
+
+    Parameters
+    ----------
+    executor : 'concurrent.futures.Executor' or None, optional
+        Any executor which implements 'submit(fn, *args)' and returns futures
+        with a 'result()' method, e.g. 'concurrent.futures.ProcessPoolExecutor',
+        'mpi4py.futures.MPIPoolExecutor' or a 'dask.distributed.Client'.
+        The tasks and results must be picklable. If None, a local
+        'ProcessPoolExecutor' with 'NTasks' workers is used.
+
+    NTasks : integer or None, optional
+        The number of blocks if 'blockVars' and 'blockSamples' are None.
+        Defaults to the number of cores. The samples are split into 'NTasks'
+        blocks of samples (each containing all variables of a group).
+
+    blockVars, blockSamples : integer or None, optional
+        The (maximal) number of variables and samples of each block. Blocks
+        never cross groups of variables (see 'NGroups').
+
+    workerThreads : integer, optional
+        The number of threads of each worker.
+
+    Returns
+    ----------
+    out : ndarray 'varShape x NSamples'
+        The bootstrap samples. They are stored as 'self.samples'.
+
+    Notes
+    -----
+    Each worker constructs a 'Bootstrapper' from the binned data of its
+    variables ('NBinSize=1') and regenerates the indices of its samples from
+    the seed. Without seed, the indices of the block are sent. Since each
+    sample only depends on the binned data, the seed and the sample index,
+    the merged samples are bit for bit equal to 'self.samples' computed in
+    one process -- independent of the partitioning.
+
+    Examples
+    --------
+    >>> from concurrent.futures import ProcessPoolExecutor
+    >>> with ProcessPoolExecutor(8) as executor:
+    >>>     samples = bs.distributedSamples(executor, blockSamples=1000)
+    """
+    if executor is None:
+      with concurrent.futures.ProcessPoolExecutor(NTasks) as executor:
+        return self.distributedSamples(
+          executor, NTasks, blockVars, blockSamples, workerThreads
+        )
+    NTasks = os.cpu_count() if NTasks is None else NTasks
+    blockVars = self.NVars if blockVars is None else blockVars
+    if blockSamples is None:
+      blockSamples = -(-self.NSamples // NTasks) # ceil
+    if blockVars < 1 or blockSamples < 1:
+      raise ValueError(
+        "Block sizes must be larger then zero. Received {}".format(
+          (blockVars, blockSamples)
+        )
+      )
+
+    if self.mmapDir is None:
+      samples = np.empty([self.NVars, self.NSamples], dtype=self._data.dtype)
+    else: # directly write to the memory mapped file
+      samples = _openMemmap(
+        self.mmapDir, "samples.npy", self._data.dtype,
+        [self.NVars, self.NSamples]
+      )
+    tasks = self._distributedTasks(blockVars, blockSamples)
+    for v0, v1, s0, s1, future in self._submitTasks(
+      executor, tasks, False, workerThreads
+    ):
+      samples[v0:v1, s0:s1] = future.result()
+    if not(self.mmapDir is None):
+      samples.flush()
+
+    self._samples = samples
+    if not(self._cache is None):
+      self._cache.store(self._cacheKey, "samples", samples)
+    return self.samples
+
+  #------------------
+  def distributedMoments(
+    self, cov=False, executor=None, NTasks=None, blockVars=None,
+    workerThreads=1
+  ):
+    """
+    Computes the moments of the bootstrap distribution by distributing blocks
+    of variables over the workers of an executor.
+
+    Parameters
+    ----------
+    cov : boolean, optional
+        If True, also returns the covariance matrix. In this case, the
+        samples are computed by 'distributedSamples' (and stored) and the
+        moments are computed from the samples in this process.
+
+    executor, NTasks, workerThreads : optional
+        See 'distributedSamples'.
+
+    blockVars : integer or None, optional
+        The (maximal) number of variables of each block. If None, the
+        variables are split into 'NTasks' blocks.
+
+    Returns
+    ----------
+    mean, var(, cov) : ndarray
+        See 'moments'. The moments are bit for bit equal to 'self.moments'.
+
+    Notes
+    -----
+    Each worker computes the samples of all 'NSamples' samples of its
+    variables and reduces them to their mean and variance. Only the moments
+    are sent back. The moments of each variable only depend on its own
+    samples, thus the merged moments are equal to the moments computed in one
+    process.
+    """
+    if cov:
+      self.distributedSamples(
+        executor, NTasks, blockVars, workerThreads=workerThreads
+      )
+      return self.moments(cov=True)
+    if executor is None:
+      with concurrent.futures.ProcessPoolExecutor(NTasks) as executor:
+        return self.distributedMoments(
+          False, executor, NTasks, blockVars, workerThreads
+        )
+    NTasks = os.cpu_count() if NTasks is None else NTasks
+    if blockVars is None:
+      blockVars = -(-self.NVars // NTasks) # ceil
+    if blockVars < 1:
+      raise ValueError(
+        "Block sizes must be larger then zero. Received {}".format(blockVars)
+      )
+
+    mean = np.empty(self.NVars, dtype=self._mean.dtype)
+    var  = np.empty(self.NVars, dtype=np.float64)
+    tasks = self._distributedTasks(blockVars, self.NSamples)
+    for v0, v1, _, _, future in self._submitTasks(
+      executor, tasks, True, workerThreads
+    ):
+      mean[v0:v1], var[v0:v1] = future.result()
+
+    if self._varShape is None:
+      return mean, var
+    return mean.reshape(self._varShape), var.reshape(self._varShape)
+
+  #------------------
+  def getCorr(self):
+    """
+    Returns the correlation matrix of the bootstrap samples.
+
+    Returns
+    ----------
+    out : ndarray 'varShape x varShape'
+        The covariance matrix normalized by the standard deviations
+        >>> corr[i, j] = cov[i, j] / sqrt(cov[i, i] * cov[j, j])
+
+    See Also
+    --------
+    'getCov'
+    """
+    cov = self.getCov().reshape([self.NVars, self.NVars])
+    sdev = np.sqrt(np.abs(np.diagonal(cov)))
+    corr = cov / np.outer(sdev, sdev)
+    if self._varShape is None:
+      return corr
+    else:
+      return corr.reshape(self._varShape + self._varShape)
+
   #------------------
   @property
   def data(self):
@@ -331,15 +1227,67 @@ class Bootstrapper(object):
 
     Returns
     ----------
-    out : ndarray 'NSamples x NSize'
+    out : ndarray 'NGroups*NSamples x NSize', unsigned integer
         Indices are uniformly distributed in the interval [0, NBins).
+        The rows '[g*NSamples, (g+1)*NSamples)' are the indices of group 'g'.
+        The type is the smallest unsigned integer type which holds 'NBins-1'.
+
+    Note
+    ----------
+        If the indices are not stored, they are generated from the seed
+        on each access.
     """
-    return self._indices
+    indices = self._indices
+    if not(indices is None):
+      return indices
+    if self._boot is None: # Generate indices without binning the data
+      if self._indexSet is None:
+        indices = PyBootstrap.indicesFromSeed(
+          self.seed, self.NBins, self.NSize, 0, self.NGroups*self.NSamples,
+          self.nThreads
+        )
+      else:
+        indices = self._indexSet.array
+      if self.storeIndices: # shared with the C++ object once constructed
+        indices.flags.writeable = False
+        self._indexBuffer = indices
+      return indices
+    return self.boot.generateIndices(nThreads=self.nThreads)
+
+  #------------------
+  @property
+  def indexSet(self):
+    """
+    Returns the indices as 'BootstrapIndices' which can be shared with other
+    'Bootstrapper' instances.
+
+    Returns
+    ----------
+    out : BootstrapIndices
+        The same instance is returned on each access. If the indices are
+        stored, the array is shared as well.
+
+    Examples
+    --------
+    >>> bs1 = boot.Bootstrapper(data1, NSamples=1000, NBinSize=5)
+    >>> bs2 = boot.Bootstrapper(data2, indices=bs1.indexSet, NBinSize=5)
+    """
+    if self._indexSet is None:
+      self._indexSet = BootstrapIndices(
+        self.NBins,
+        NSize=self.NSize,
+        NSamples=self.NSamples,
+        seed=self.seed,
+        NGroups=self.NGroups,
+        indices=self._indices,
+        nThreads=self.nThreads,
+      )
+    return self._indexSet
 
   #------------------
   def __str__(self):
     """Returns name and input parameters"""
-    return "Bootstrapper(" + ", ".join([
+    return type(self).__name__ + "(" + ", ".join([
       "{key}={val}".format(key=key, val=val)
         for key, val in self.parameters.items()
     ]) + ")"
@@ -365,15 +1313,22 @@ class Bootstrapper(object):
     out : boolean
     """
     # Check whether other is Bootstrapper
-    if not(isinstance(other, Bootstrapper)):
+    if self is other:
+      return True
+    elif not(isinstance(other, Bootstrapper)):
       return False
     else:
       # Iterate through parameters
       for key, val in self.parameters.items():
-        if other.parameters[key] != val:
+        if other.parameters.get(key) != val:
           return False
-      # Compare indices
-      if not( (self.indices == other.indices).all() ):
+      # Compare indices (equal seeds generate equal indices)
+      if not(self._indexSet is None) and self._indexSet is other._indexSet:
+        pass # shared indices
+      elif self.seed is None or other.seed is None:
+        if not( (self.indices == other.indices).all() ):
+          return False
+      elif self.seed != other.seed:
         return False
       # Check data
       diff = 2*np.mean( np.abs(self.data - other.data) )
@@ -385,11 +1340,15 @@ class Bootstrapper(object):
       return True
 
   #------------------
-  def exportHDF5(self, fileName, groupName=None, writeSamples=False):
+  def exportHDF5(
+    self, fileName, groupName=None, writeSamples=False, writeIndices=True,
+    compression=None, compressionOpts=None, shuffle=True
+  ):
     """
     Exports the bootstrap data to the HDF5 file 'fileName'.
 
-    It exports the 'parameters' as well as the indices to the group
+    It exports the 'parameters' and the seed as attributes and the indices
+    as dataset of the group
     >>> groupAddress = '/' + groupName + '/bootstrap'
 
     Parameters
@@ -407,6 +1366,22 @@ class Bootstrapper(object):
     writeSamples : boolean, optional
         If set to true, also exports the computed samples to the hdf5 file.
 
+    writeIndices : boolean, optional
+        If set to false and the seed is known, the indices are not exported.
+        They are regenerated from the seed when reading the file.
+
+    compression : string or None, optional
+        The compression filter of the indices and samples, e.g. 'gzip' or
+        'lzf' (see 'h5py.Group.create_dataset').
+
+    compressionOpts : optional
+        The options of the compression filter, e.g. the level of 'gzip'.
+
+    shuffle : boolean, optional
+        If True and 'compression' is specified, the bytes of the indices are
+        shuffled before compression. This groups the (mostly zero) high bytes
+        of the indices and improves the compression ratio.
+
     See Also
     --------
     Bootstrapper initialization
@@ -415,6 +1390,12 @@ class Bootstrapper(object):
     -----
     This routine does not store the initial data. For full reproducability,
     the data must be exported elsewhere.
+    The indices are written in their compact type (see 'self.indices').
+    The datasets are chunked: index chunks contain whole samples and sample
+    chunks contain blocks of variables and samples of about 256 KiB. Thus
+    single variables or ranges of samples can be read without reading the
+    whole dataset (see 'readSamples'). If the samples have not been computed,
+    they are computed and written block by block and are not stored.
 
     Examples
     --------
@@ -456,14 +1437,47 @@ class Bootstrapper(object):
         )
       bootGroup = f.create_group(bootAddress)
 
-      # Now write parameters
+      # Now write parameters and seed
       for key, val in self.parameters.items():
-        bootGroup.create_dataset(key, data=val)
-      # Write indices
-      bootGroup.create_dataset("indices", data=self.indices)
+        bootGroup.attrs[key] = val
+      if not(self.seed is None):
+        bootGroup.attrs["seed"] = np.uint64(self.seed)
+      # Write indices in chunks of whole samples
+      if writeIndices or self.seed is None:
+        indices = self.indices
+        bootGroup.create_dataset(
+          "indices",
+          data=indices,
+          chunks=_chunkShape(
+            indices.shape, indices.dtype.itemsize, indices.shape[-1]
+          ),
+          compression=compression,
+          compression_opts=compressionOpts,
+          shuffle=shuffle and not(compression is None),
+        )
       # Write samples if requested
       if writeSamples:
-        bootGroup.create_dataset("samples", data=self.samples)
+        shape = (
+          [self.NVars] if self._varShape is None else self._varShape
+        ) + [self.NSamples]
+        dtype = self._data.dtype
+        chunks = _chunkShape(shape, dtype.itemsize, _H5_SAMPLE_CHUNK)
+        dataset = bootGroup.create_dataset(
+          "samples",
+          shape=shape,
+          dtype=dtype,
+          chunks=chunks,
+          compression=compression,
+          compression_opts=compressionOpts,
+        )
+        # Write blocks of whole chunks of samples
+        blockSamples = self.NSamples if chunks is None else chunks[-1]
+        for _, sampleSlice, block in self.iterSamples(
+          blockSamples=blockSamples
+        ):
+          dataset[..., sampleSlice] = block.reshape(
+            shape[:-1] + [block.shape[-1]]
+          )
 
   #------------------
   def inHDF5(self, fileName, groupName=None):
@@ -492,6 +1506,1490 @@ class Bootstrapper(object):
     return bootstrapperInHDF5(fileName, groupName=groupName)
 
 
+#-------------------------------------------------------------------------------
+class BatchBootstrapper(Bootstrapper):
+  """Bootstrapper class for a batch of ensembles."""
+  #------------------
+  def __init__(
+    self,
+    data,
+    NSamples=None,
+    NSize=None,
+    NBinSize=None,
+    indices=None,
+    h5Info=None,
+    seed=None,
+    nThreads=1,
+    storeIndices=True,
+    mmapDir=None,
+    shareIndices=False,
+    cache=None,
+    lazy=False,
+  ):
+    """
+    Bootstrapper class which bootstraps a batch of ensembles with the same
+    number of configurations in one call of the C++ routines. Each member of
+    the batch either has its own indices or all members share one index set.
+    The samples, means and covariances are stacked along the leading batch
+    dimension.
+
+    Parameters
+    ----------
+    data : ndarray (NBatch x memberShape x NConfigs) or list of ndarrays
+           (memberShape x NConfigs), float or complex
+        The input data of the ensembles. Lists are stacked along a new leading
+        batch dimension. See 'Bootstrapper' for the other data types.
+
+    shareIndices : boolean, optional
+        If True, all members are bootstrapped with the same indices. This
+        preserves correlations between members (e.g. ensembles computed on
+        the same configurations). If False, each member 'b' has independent
+        indices: the indices of the samples '[b*NSamples, (b+1)*NSamples)' of
+        a 'Bootstrapper' with 'NBatch*NSamples' samples and the same seed.
+
+    See 'Bootstrapper' for the other parameters. The indices are of size
+    'NBatch*NSamples x NSize' (or 'NSamples x NSize' if 'shareIndices').
+
+    Notes
+    -----
+    Compared to one 'Bootstrapper' per ensemble, the binning, the index
+    generation and the sampling of the whole batch are distributed over
+    'nThreads' threads at once. This avoids the overhead of many small calls
+    if the ensembles are small.
+    The covariance ('getCov') includes the covariance between members.
+    Members with independent indices are uncorrelated up to statistical
+    fluctuations.
+
+    Examples
+    --------
+    >>> ensembles = [np.random.normal(size=[16, 200]) for _ in range(100)]
+    >>> bs = boot.BatchBootstrapper(ensembles, NSamples=500, NBinSize=1)
+    >>> bs.samples.shape
+    (100, 16, 500)
+    """
+    # Stack the members along the batch dimension
+    if isinstance(data, (list, tuple)):
+      data = np.stack([np.asarray(member) for member in data])
+
+    # Open the dataset if data is given by file and dataset name
+    if isinstance(data, dict):
+      with _openData(data) as dataset:
+        self.__init__(
+          dataset,
+          NSamples=NSamples,
+          NSize=NSize,
+          NBinSize=NBinSize,
+          indices=indices,
+          h5Info=h5Info,
+          seed=seed,
+          nThreads=nThreads,
+          storeIndices=storeIndices,
+          mmapDir=mmapDir,
+          shareIndices=shareIndices,
+          cache=cache,
+          lazy=lazy,
+        )
+      # The dataset is closed: open it again when the data is binned
+      if lazy:
+        self._input = data
+      return
+
+    if len(data.shape) < 2:
+      raise ValueError(
+        "Data must be of shape 'NBatch x memberShape x NConfigs'."
+        + " Received {}".format(data.shape)
+      )
+
+    ## The number of ensembles in the batch.
+    self.NBatch = data.shape[0]
+    ## Whether all members are bootstrapped with the same indices.
+    self.shareIndices = shareIndices
+
+    Bootstrapper.__init__(
+      self,
+      data,
+      NSamples=NSamples,
+      NSize=NSize,
+      NBinSize=NBinSize,
+      indices=indices,
+      h5Info=h5Info,
+      seed=seed,
+      nThreads=nThreads,
+      storeIndices=storeIndices,
+      mmapDir=mmapDir,
+      NGroups=1 if shareIndices else self.NBatch,
+      cache=cache,
+      lazy=lazy,
+    )
+    # The number of groups of an imported file determines the index sharing
+    if self.NBatch > 1:
+      self.shareIndices = self.NGroups == 1
+    self.parameters["NBatch"] = self.NBatch
+
+
+#-------------------------------------------------------------------------------
+class BootstrapIndices(object):
+  """Immutable bootstrap indices which can be shared by several Bootstrappers."""
+  #------------------
+  def __init__(
+    self,
+    NBins,
+    NSize=None,
+    NSamples=None,
+    seed=None,
+    NGroups=1,
+    indices=None,
+    nThreads=1,
+  ):
+    """
+    Bootstrap indices drawn from '[0, NBins)' given by a seed or by an array.
+    Bootstrappers constructed with 'indices=indexSet' share the indices: the
+    array is generated (or converted) once and the C++ routines of all
+    Bootstrappers read from the same buffer. Thus 'N' Bootstrappers with
+    shared indices need the memory of one index array.
+
+    Parameters
+    ----------
+    NBins : integer
+        The number of bins the indices are drawn from.
+
+    NSize, NSamples : integer or None
+        The number of indices of each sample and the number of samples (of
+        each group). Required if the indices are given by a seed.
+
+    seed : integer or None
+        The seed of the counter based random number generator (see
+        'Bootstrapper'). If None, 'indices' must be specified.
+
+    NGroups : integer, optional
+        The number of groups of variables with independent indices (see
+        'Bootstrapper').
+
+    indices : ndarray 'NGroups*NSamples x NSize' or None
+        The indices. If a seed is specified as well, they must be the indices
+        of this seed (they are not generated again).
+
+    nThreads : integer, optional
+        The number of threads used for generating the indices.
+
+    Examples
+    --------
+    >>> indexSet = boot.BootstrapIndices(400, NSize=400, NSamples=1000, seed=1)
+    >>> bootstrappers = [
+    >>>   boot.Bootstrapper(data, indices=indexSet, NBinSize=5)
+    >>>     for data in correlators
+    >>> ]
+    """
+    if seed is None and indices is None:
+      raise ValueError("Either specify the seed or the indices.")
+    ## The number of bins the indices are drawn from.
+    self.NBins    = int(NBins)
+    ## The number of groups of variables with independent indices.
+    self.NGroups  = int(NGroups)
+    ## The seed of the indices (or None).
+    self.seed     = None if seed is None else int(seed)
+    ## The number of threads used for generating the indices.
+    self.nThreads = nThreads
+    ## The read-only indices (None until generated from the seed).
+    self._array   = None
+    if not(indices is None):
+      self._array = PyBootstrap._indexBuffer(indices, self.NBins)
+      NSamples    = self._array.shape[0] // self.NGroups
+      NSize       = self._array.shape[1]
+      if self._array.shape[0] % self.NGroups != 0:
+        raise ValueError(
+          "The number of index rows must be a multiple of NGroups."
+          + " Received {} rows for {} groups".format(
+            self._array.shape[0], self.NGroups
+          )
+        )
+    ## The number of samples (of each group).
+    self.NSamples = int(NSamples)
+    ## The number of indices of each sample.
+    self.NSize    = int(NSize)
+
+  #------------------
+  @property
+  def array(self):
+    """
+    Returns the read-only indices of size 'NGroups*NSamples x NSize'. They are
+    generated from the seed on first access.
+    """
+    if self._array is None:
+      self._array = PyBootstrap.indicesFromSeed(
+        self.seed, self.NBins, self.NSize, 0, self.NGroups*self.NSamples,
+        self.nThreads
+      )
+      self._array.flags.writeable = False
+    return self._array
+
+  #------------------
+  def __str__(self):
+    """Returns name and parameters"""
+    return "BootstrapIndices(NBins={}, NSize={}, NSamples={}, seed={})".format(
+      self.NBins, self.NSize, self.NSamples, self.seed
+    )
+
+  #------------------
+  def __repr__(self):
+    """Returns str(self)"""
+    return str(self)
+
+  #------------------
+  def __eq__(self, other):
+    """
+    Compares the parameters and the seed (or the indices if the seed of
+    either is unknown).
+    """
+    if self is other:
+      return True
+    if not(isinstance(other, BootstrapIndices)):
+      return False
+    if (self.NBins, self.NSize, self.NSamples, self.NGroups) != \
+       (other.NBins, other.NSize, other.NSamples, other.NGroups):
+      return False
+    if self.seed is None or other.seed is None:
+      return np.array_equal(self.array, other.array)
+    return self.seed == other.seed
+
+
+#-------------------------------------------------------------------------------
+class BootstrapCache(object):
+  """Persistent cache of binned data and samples keyed by content hash."""
+  #------------------
+  def __init__(self, cacheDir, maxBytes=None):
+    """
+    Cache which stores the binned data and the samples of 'Bootstrapper'
+    instances as '.npy' files in the directory 'cacheDir'. Each entry is a
+    subdirectory named by its key.
+
+    Parameters
+    ----------
+    cacheDir : string
+        The directory of the cache (created if needed). It can be shared by
+        several processes.
+
+    maxBytes : integer or None, optional
+        The maximal size of the cache in bytes. If the size is exceeded after
+        storing an array, the least recently used entries are removed. If
+        None, the size is not bounded.
+
+    Examples
+    --------
+    >>> cache = boot.BootstrapCache("bootCache", maxBytes=10*2**30)
+    >>> bs = boot.Bootstrapper(data, NSamples=1000, NBinSize=5, seed=1, cache=cache)
+    >>> bs.samples # computed and stored
+    >>> bs = boot.Bootstrapper(data, NSamples=1000, NBinSize=5, seed=1, cache=cache)
+    >>> bs.samples # loaded
+    """
+    ## The directory of the cache.
+    self.cacheDir = cacheDir
+    ## The maximal size of the cache in bytes (or None).
+    self.maxBytes = maxBytes
+    os.makedirs(cacheDir, exist_ok=True)
+
+  #------------------
+  def key(self, data, parameters, indices=None):
+    """
+    Returns the key of the data and parameters.
+
+    Parameters
+    ----------
+    data : ndarray or 'h5py.Dataset'
+        The input data. It is hashed block by block along the first dimension
+        thus datasets are never read at once.
+
+    parameters : dictionary
+        Parameters which determine the binned data and samples (e.g.
+        'NBinSize' and the seed). Their 'repr' is hashed.
+
+    indices : ndarray or None, optional
+        The bootstrap indices (if not determined by a seed).
+
+    Returns
+    ----------
+    key : string
+        The hexadecimal BLAKE2 hash of the dtype, shape and values of the data,
+        the parameters and the indices.
+    """
+    # Integers read from files are NumPy integers: use the same representation
+    parameters = sorted(
+      (key, int(val) if isinstance(val, np.integer) else val)
+        for key, val in parameters.items()
+    )
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(repr((
+      np.dtype(data.dtype).str, tuple(data.shape), parameters
+    )).encode())
+    arrays = [data] if indices is None else [data, np.asarray(indices)]
+    for array in arrays:
+      # Blocks of about 2^24 bytes along the first dimension
+      rowBytes = max(int(np.prod(array.shape[1:])) * array.dtype.itemsize, 1)
+      blockRows = max((2**24) // rowBytes, 1)
+      for r0 in range(0, array.shape[0], blockRows):
+        block = np.ascontiguousarray(array[r0:r0 + blockRows])
+        digest.update(block.reshape(-1).view(np.uint8))
+    return digest.hexdigest()
+
+  #------------------
+  def _entryDir(self, key):
+    """Returns the directory of the entry 'key'."""
+    return os.path.join(self.cacheDir, key)
+
+  #------------------
+  def load(self, key):
+    """
+    Returns the cached arrays of the entry 'key' and marks it as recently
+    used.
+
+    Returns
+    ----------
+    arrays : dictionary
+        The arrays by name (e.g. 'data' and 'samples'), empty if the key is
+        not in the cache. The arrays are copy-on-write memory maps: they are
+        read from disk when accessed and modifications are not written back.
+    """
+    entryDir = self._entryDir(key)
+    arrays = {}
+    if not(os.path.isdir(entryDir)):
+      return arrays
+    for fileName in os.listdir(entryDir):
+      name, extension = os.path.splitext(fileName)
+      if extension == ".npy":
+        arrays[name] = np.load(os.path.join(entryDir, fileName), mmap_mode="c")
+    os.utime(entryDir)
+    return arrays
+
+  #------------------
+  def store(self, key, name, array):
+    """
+    Stores 'array' as 'name' in the entry 'key' and evicts the least recently
+    used entries if the cache exceeds 'self.maxBytes'.
+    """
+    entryDir = self._entryDir(key)
+    os.makedirs(entryDir, exist_ok=True)
+    # Write to a temporary file first such that readers never see partial files
+    tmpName = os.path.join(entryDir, "{}.{}.tmp".format(name, os.getpid()))
+    with open(tmpName, "wb") as f:
+      np.save(f, np.asarray(array))
+    os.replace(tmpName, os.path.join(entryDir, name + ".npy"))
+    os.utime(entryDir)
+    self._evict(keep=key)
+
+  #------------------
+  def _evict(self, keep=None):
+    """
+    Removes the least recently used entries (except 'keep') until the size of
+    the cache is at most 'self.maxBytes'.
+    """
+    if self.maxBytes is None:
+      return
+    entries = []
+    for key in os.listdir(self.cacheDir):
+      entryDir = self._entryDir(key)
+      if not(os.path.isdir(entryDir)):
+        continue
+      size = sum(
+        os.path.getsize(os.path.join(entryDir, fileName))
+          for fileName in os.listdir(entryDir)
+      )
+      entries.append((os.path.getmtime(entryDir), key, size))
+    totalBytes = sum(size for _, _, size in entries)
+    for _, key, size in sorted(entries): # least recently used first
+      if totalBytes <= self.maxBytes:
+        break
+      if key != keep:
+        shutil.rmtree(self._entryDir(key), ignore_errors=True)
+        totalBytes -= size
+
+  #------------------
+  def clear(self):
+    """Removes all entries of the cache."""
+    for key in os.listdir(self.cacheDir):
+      shutil.rmtree(self._entryDir(key), ignore_errors=True)
+
+
+#-------------------------------------------------------------------------------
+class Jackknife(object):
+  """Jackknife class for mean distribution estimation."""
+  #------------------
+  def __init__(self, data, NBinSize=1, nThreads=1):
+    """
+    Jackknife class which can be used to compute the jackknife distribution of
+    the means of input data 'data'. It has the same interface as
+    'Bootstrapper'. The samples are the means of all bins except one
+    (delete-1 jackknife). If 'NBinSize' is larger than one, the input data
+    will be binned before the samples are computed. This leaves out blocks of
+    'NBinSize' consecutive configurations (blocked jackknife).
+
+    Parameters
+    ----------
+    data : ndarray (varShape x NConfigs), float or complex
+        Input data which is used to compute the jackknife distribution of
+        the means. See 'Bootstrapper' (this includes 'h5py.Dataset' input and
+        dictionaries pointing to datasets).
+
+    NBinSize : integer, optional
+        The size of the Bins (and left out blocks) which is applied before
+        computing the jackknife samples.
+
+    nThreads : integer, optional
+        The number of threads used for computing the samples. If zero, all
+        available cores are used.
+
+    Notes
+    -----
+    Each sample is computed as
+    >>> samples[v, b] = (sum(data[v]) - data[v, b]) / (NBins - 1)
+    Thus the costs are 'O(NVars x NBins)' instead of 'O(NVars x NBins^2)'
+    for averaging explicit index lists.
+    The variances and covariances are the jackknife estimates
+    >>> cov[i, j] = (NBins-1)/NBins * sum_s (x[i, s] - mu[i]) * conj(x[j, s] - mu[j])
+    which are computed directly from the binned data.
+
+    Examples
+    --------
+    >>> data = np.random.normal(size=[128, 2000])
+    >>> jk = boot.Jackknife(data, NBinSize=5)
+    >>> jk
+    Jackknife(NSamples=400, NSize=399, NBinSize=5, NConfigs=2000, NVars=128,
+    NBins=400)
+    >>> mean, var = jk.moments()
+    """
+    # Open the dataset if data is given by file and dataset name
+    if isinstance(data, dict):
+      with _openData(data) as dataset:
+        self.__init__(dataset, NBinSize=NBinSize, nThreads=nThreads)
+      return
+
+    if not(isinstance(data, h5py.Dataset)):
+      data = np.asarray(data)
+    self._varShape = list(data.shape[:-1]) if len(data.shape) > 2 else None
+
+    # Bin the data (chunk by chunk for datasets)
+    self._data = PyBootstrap.binArray(data, NBinSize)
+    if self._data.shape[1] < 2:
+      raise ValueError(
+        "The jackknife needs at least two bins. Received {}".format(
+          self._data.shape[1]
+        )
+      )
+    self._data.flags.writeable = False
+
+    # set the members
+    ## The number of configurations contained in one bin.
+    self.NBinSize = NBinSize
+    ## The number of configurations in the ensemble.
+    self.NConfigs = data.shape[-1]
+    ## The number of variables in the ensemble.
+    self.NVars    = self._data.shape[0]
+    ## The number of bins given by 'NConfigs/NBinSize'.
+    self.NBins    = self._data.shape[1]
+    ## The number of jackknife samples (one for each left out bin).
+    self.NSamples = self.NBins
+    ## The number of bins contained in each individual jackknife sample.
+    self.NSize    = self.NBins - 1
+    ## The sums of the binned data over the bins.
+    self._totals  = self._data.sum(axis=1)
+    ## Returns the mean of the 'data'.
+    self._mean    = self._totals / self.NBins
+
+    ## The number of threads used for computing the samples.
+    self.nThreads = nThreads
+
+    ## Dictionary containing informative parameters
+    self.parameters = {
+      "NSamples": self.NSamples,
+      "NSize":    self.NSize,
+      "NBinSize": self.NBinSize,
+      "NConfigs": self.NConfigs,
+      "NVars":    self.NVars,
+      "NBins":    self.NBins,
+    }
+
+    ## The jackknife samples (computed when accessed)
+    self._samples = None
+
+  #------------------
+  @property
+  def samples(self):
+    """
+    Returns the jackknife samples.
+
+    Returns
+    ----------
+    out : ndarray
+        The jackknife samples of size 'varShape x self.NSamples'. Sample 'b'
+        is the mean of all bins except bin 'b'.
+    """
+    if self._samples is None:
+      self._samples = PyBootstrap.jackknifeMeans(
+        self._data, self._totals, nThreads=self.nThreads
+      )
+    if self._varShape is None:
+      return self._samples
+    else:
+      return self._samples.reshape(self._varShape + [self.NSamples])
+
+  #------------------
+  def iterSamples(self, blockVars=None, blockSamples=None):
+    """
+    Iterates the jackknife samples block by block.
+
+    See 'Bootstrapper.iterSamples'.
+    """
+    blockVars    = self.NVars    if blockVars    is None else blockVars
+    blockSamples = self.NSamples if blockSamples is None else blockSamples
+    if blockVars < 1 or blockSamples < 1:
+      raise ValueError(
+        "Block sizes must be larger then zero. Received {}".format(
+          (blockVars, blockSamples)
+        )
+      )
+    for s0 in range(0, self.NSamples, blockSamples):
+      s1 = min(s0 + blockSamples, self.NSamples)
+      for v0 in range(0, self.NVars, blockVars):
+        v1 = min(v0 + blockVars, self.NVars)
+        # Use the stored samples if already computed
+        if self._samples is None:
+          block = PyBootstrap.jackknifeMeans(
+            self._data, self._totals, v0, v1, s0, s1, nThreads=self.nThreads
+          )
+        else:
+          block = self._samples[v0:v1, s0:s1]
+        yield slice(v0, v1), slice(s0, s1), block
+
+  #------------------
+  getDerivedSamples = Bootstrapper.getDerivedSamples
+
+  #------------------
+  def variance(self, samples):
+    """
+    Returns the jackknife variance of (derived) jackknife samples.
+
+    Parameters
+    ----------
+    samples : ndarray 'shape x NSamples'
+        Jackknife samples, e.g., computed by 'self.getDerivedSamples'.
+
+    Returns
+    ----------
+    out : ndarray 'shape', float
+        >>> (NSamples-1)/NSamples * sum_s |x[..., s] - mean(x)|^2
+    """
+    samples = np.asarray(samples)
+    centered = samples - samples.mean(axis=-1, keepdims=True)
+    return np.sum(np.abs(centered)**2, axis=-1) * (
+      (self.NSamples - 1) / self.NSamples
+    )
+
+  #------------------
+  def getCov(self):
+    """
+    Returns the jackknife covariance matrix.
+
+    Returns
+    ----------
+    out : ndarray 'varShape x varShape'
+        The entries are
+        >>> cov[i, j] = (NSamples-1)/NSamples * sum_s (x[i, s] - mu[i]) * conj(x[j, s] - mu[j])
+        where 'x' are the samples of size 'NVars x NSamples'.
+
+    Notes
+    -----
+    The deviations of the samples are '-(data - mean)/(NBins-1)'. Thus the
+    covariance is computed from the binned data and the samples are not
+    needed.
+    """
+    centered = self._data - self._mean[:, None]
+    cov = centered @ centered.conj().T / (self.NBins * (self.NBins - 1))
+    if self._varShape is None:
+      return cov
+    else:
+      return cov.reshape(self._varShape + self._varShape)
+
+  #------------------
+  def moments(self, cov=False):
+    """
+    Returns the moments of the jackknife distribution.
+
+    Parameters
+    ----------
+    cov : boolean, optional
+        If True, also returns the covariance matrix.
+
+    Returns
+    ----------
+    mean : ndarray 'varShape'
+        The mean of the jackknife samples (equal to the mean of the data).
+
+    var : ndarray 'varShape', float
+        The jackknife variance. Its square root is the jackknife standard
+        error.
+
+    cov : ndarray 'varShape x varShape', optional
+        The jackknife covariance matrix (see 'getCov').
+    """
+    centered = self._data - self._mean[:, None]
+    var = np.sum(np.abs(centered)**2, axis=1) / (self.NBins * (self.NBins - 1))
+    moments = (self._mean, var) + ((self.getCov(),) if cov else ())
+    if self._varShape is None:
+      return moments
+    return tuple(
+      moment.reshape(self._varShape) for moment in moments[:2]
+    ) + moments[2:]
+
+  #------------------
+  getCorr = Bootstrapper.getCorr
+  data    = Bootstrapper.data
+  mean    = Bootstrapper.mean
+
+  #------------------
+  def __str__(self):
+    """Returns name and input parameters"""
+    return "Jackknife(" + ", ".join([
+      "{key}={val}".format(key=key, val=val)
+        for key, val in self.parameters.items()
+    ]) + ")"
+
+  #------------------
+  def __repr__(self):
+    """Returns str(self)"""
+    return str(self)
+
+  #------------------
+  def __eq__(self, other):
+    """
+    Compares wheter the other has the same input parameter and data.
+    """
+    if not(isinstance(other, Jackknife)):
+      return False
+    for key, val in self.parameters.items():
+      if other.parameters[key] != val:
+        return False
+    return np.array_equal(self._data, other._data)
+
+
+#-------------------------------------------------------------------------------
+class BlockBootstrapper(object):
+  """Block bootstrap class for autocorrelated chains."""
+  #------------------
+  def __init__(
+    self,
+    data,
+    NSamples,
+    blockLength,
+    scheme="stationary",
+    seed=None,
+    nThreads=1,
+  ):
+    """
+    Block bootstrap class which can be used to compute the bootstrapped
+    distribution of the means of autocorrelated input data 'data'. It has the
+    same interface as 'Bootstrapper'. Instead of binning, each sample is the
+    mean of contiguous runs (blocks) of configurations which are drawn with
+    replacement. The blocks wrap around the end of the chain (circular blocks)
+    and their lengths add up to 'NConfigs'. Thus no configurations are dropped.
+
+    Parameters
+    ----------
+    data : ndarray (varShape x NConfigs), float or complex
+        Input data which is used to compute the bootstrapped distribution of
+        the means. The data can also be a 'h5py.Dataset' or a dictionary with
+        values for the keys 'fileName' and 'datasetName' pointing to a dataset
+        in a HDF5 file. Unlike 'Bootstrapper', the whole dataset is read into
+        memory (the prefix sums are of the size of the data).
+
+    NSamples : integer
+        The number of bootstrap samples.
+
+    blockLength : float
+        The (mean) length of the blocks. It should be larger than the
+        autocorrelation time of the chain.
+
+    scheme : 'stationary' or 'moving', optional
+        'moving' draws blocks of fixed length 'round(blockLength)' (circular
+        moving-block bootstrap). 'stationary' draws blocks of geometrically
+        distributed length with mean 'blockLength' (stationary bootstrap).
+
+    seed : integer or None, optional
+        The 64 bit seed of the counter based random number generator which
+        draws the blocks (see 'Bootstrapper'). If None, a random seed is drawn.
+
+    nThreads : integer, optional
+        The number of threads used for computing the samples. If zero, all
+        available cores are used. The samples do not depend on the number of
+        threads.
+
+    Notes
+    -----
+    The data is stored as centered prefix sums of size 'NVars x (NConfigs+1)'
+    >>> prefix[v, c] = sum(data[v, :c] - mean[v])
+    Thus the sum of each block costs O(1) independent of its length, and
+    different block lengths can be analyzed without binning the data again.
+
+    Examples
+    --------
+    >>> data = np.random.normal(size=[128, 2000])
+    >>> bb = boot.BlockBootstrapper(data, NSamples=1000, blockLength=20)
+    >>> mean, var = bb.moments()
+    """
+    # The prefix sums need the whole chain: datasets are read completely
+    with _openData(data) as data:
+      if isinstance(data, h5py.Dataset):
+        data = data[()]
+
+    if NSamples < 1:
+      raise ValueError(
+        "NSamples must be larger then zero. Received {}".format(NSamples)
+      )
+    if blockLength < 1:
+      raise ValueError(
+        "blockLength must be at least one. Received {}".format(blockLength)
+      )
+
+    # Flatten the data for C++ module (no copy for strided ndarrays)
+    data = np.asarray(data)
+    self._varShape = list(data.shape[:-1]) if len(data.shape) > 2 else None
+    data = data.reshape([int(np.prod(data.shape[:-1])), data.shape[-1]])
+
+    # set the members
+    ## The number of to be generated bootstrap samples.
+    self.NSamples    = NSamples
+    ## The (mean) length of the blocks.
+    self.blockLength = blockLength
+    ## The block resampling scheme ('stationary' or 'moving').
+    self.scheme      = scheme
+    ## The seed of the blocks.
+    self.seed        = PyBootstrap.randomSeed() if seed is None else seed
+    ## The number of configurations in the ensemble.
+    self.NConfigs    = data.shape[1]
+    ## The number of variables in the ensemble.
+    self.NVars       = data.shape[0]
+    ## The number of threads used for computing the samples.
+    self.nThreads    = nThreads
+    ## The means and centered prefix sums of the data.
+    self._mean, self._prefix = PyBootstrap.getPrefixSums(data, nThreads)
+    self._mean.flags.writeable   = False
+    self._prefix.flags.writeable = False
+    PyBootstrap._blockScheme(scheme) # Check the scheme
+
+    ## Dictionary containing informative parameters
+    self.parameters = {
+      "NSamples":    self.NSamples,
+      "blockLength": self.blockLength,
+      "scheme":      self.scheme,
+      "NConfigs":    self.NConfigs,
+      "NVars":       self.NVars,
+    }
+
+    ## The bootstrap samples (computed when accessed)
+    self._samples = None
+
+  #------------------
+  def _getSampleBlock(self, v0, v1, s0, s1, out=None):
+    """Returns the samples '[s0, s1)' of the variables '[v0, v1)'."""
+    return PyBootstrap.getBlockSamples(
+      self._prefix, self._mean, self.blockLength, self.scheme, self.seed,
+      v0, v1, s0, s1, nThreads=self.nThreads, out=out
+    )
+
+  #------------------
+  def getBlocks(self, s):
+    """
+    Returns the blocks of sample 's'.
+
+    Returns
+    ----------
+    starts, lengths : ndarray, unsigned integer
+        The first configuration and the length of each block. Blocks wrap
+        around the end of the chain.
+    """
+    return PyBootstrap.getBlocks(
+      self.seed, self.NConfigs, self.blockLength, self.scheme, s
+    )
+
+  #------------------
+  @property
+  def samples(self):
+    """
+    Returns the bootstrap samples.
+
+    Returns
+    ----------
+    out : ndarray
+        The bootstrap samples of size 'varShape x self.NSamples'.
+    """
+    if self._samples is None:
+      self._samples = self._getSampleBlock(0, self.NVars, 0, self.NSamples)
+    if self._varShape is None:
+      return self._samples
+    else:
+      return self._samples.reshape(self._varShape + [self.NSamples])
+
+  #------------------
+  def iterSamples(self, blockVars=None, blockSamples=None):
+    """
+    Iterates the bootstrap samples block by block.
+
+    See 'Bootstrapper.iterSamples'.
+    """
+    blockVars    = self.NVars    if blockVars    is None else blockVars
+    blockSamples = self.NSamples if blockSamples is None else blockSamples
+    if blockVars < 1 or blockSamples < 1:
+      raise ValueError(
+        "Block sizes must be larger then zero. Received {}".format(
+          (blockVars, blockSamples)
+        )
+      )
+    for s0 in range(0, self.NSamples, blockSamples):
+      s1 = min(s0 + blockSamples, self.NSamples)
+      for v0 in range(0, self.NVars, blockVars):
+        v1 = min(v0 + blockVars, self.NVars)
+        # Use the stored samples if already computed
+        if self._samples is None:
+          block = self._getSampleBlock(v0, v1, s0, s1)
+        else:
+          block = self._samples[v0:v1, s0:s1]
+        yield slice(v0, v1), slice(s0, s1), block
+
+  #------------------
+  getDerivedSamples = Bootstrapper.getDerivedSamples
+
+  #------------------
+  def moments(self, cov=False):
+    """
+    Returns the moments of the bootstrap distribution.
+
+    See 'Bootstrapper.moments'.
+    """
+    samples  = self.samples.reshape([self.NVars, self.NSamples])
+    mean     = samples.mean(axis=1)
+    centered = samples - mean[:, None]
+    var = np.sum(np.abs(centered)**2, axis=1) / (self.NSamples - 1)
+    moments = (mean, var)
+    if cov:
+      moments += (centered @ centered.conj().T / (self.NSamples - 1),)
+    if self._varShape is None:
+      return moments
+    shapes = [self._varShape, self._varShape, self._varShape + self._varShape]
+    return tuple(
+      moment.reshape(shape) for moment, shape in zip(moments, shapes)
+    )
+
+  #------------------
+  def getCov(self):
+    """
+    Returns the covariance matrix of the bootstrap samples.
+
+    See 'Bootstrapper.getCov'.
+    """
+    return self.moments(cov=True)[2]
+
+  #------------------
+  getCorr = Bootstrapper.getCorr
+  mean    = Bootstrapper.mean
+
+  #------------------
+  def __str__(self):
+    """Returns name and input parameters"""
+    return "BlockBootstrapper(" + ", ".join([
+      "{key}={val}".format(key=key, val=val)
+        for key, val in self.parameters.items()
+    ]) + ")"
+
+  #------------------
+  def __repr__(self):
+    """Returns str(self)"""
+    return str(self)
+
+
+#-------------------------------------------------------------------------------
+## The number of bins weighted at once by 'PoissonBootstrapper.extend'.
+_POISSON_BIN_CHUNK = 256
+
+#-------------------------------------------------------------------------------
+class PoissonBootstrapper(object):
+  """Online bootstrap class for growing ensembles."""
+  #------------------
+  def __init__(self, data, NSamples, NBinSize=1, seed=None, nThreads=1):
+    """
+    Online bootstrap class which can be used to compute the bootstrapped
+    distribution of the means of input data 'data' which grows over time.
+    It has the same interface as 'Bootstrapper'. Instead of drawing 'NSize'
+    bins with replacement, each bin enters each sample with a Poisson
+    distributed weight of mean one. The samples are the weighted means of the
+    bins. Thus appended bins update the samples without computing them again
+    (see 'self.extend').
+
+    Parameters
+    ----------
+    data : ndarray (varShape x NConfigs), float or complex
+        Input data which is used to compute the bootstrapped distribution of
+        the means. The data can also be a 'h5py.Dataset' or a dictionary with
+        values for the keys 'fileName' and 'datasetName' pointing to a dataset
+        in a HDF5 file. Datasets are read and weighted chunk by chunk along
+        the configurations (see 'self.extend').
+
+    NSamples : integer
+        The number of bootstrap samples.
+
+    NBinSize : integer, optional
+        The size of the bins which are averaged before they are weighted.
+        Configurations which do not fill a bin are kept until the next call
+        of 'self.extend' (the remainder is not skipped at the beginning).
+
+    seed : integer or None, optional
+        The 64 bit seed of the counter based random number generator which
+        draws the weights. The weight of each bin in each sample is a pure
+        function of the seed, the sample and the bin. If None, a random seed
+        is drawn.
+
+    nThreads : integer, optional
+        The number of threads used for generating the weights. If zero, all
+        available cores are used. The samples do not depend on the number of
+        threads.
+
+    Notes
+    -----
+    The class stores the weighted sums of size 'NVars x NSamples' and the sum
+    of the weights of each sample instead of the binned data. Thus the memory
+    does not grow with the ensemble. The sums are accumulated in double
+    precision. For small numbers of bins, the sum of the weights of a sample
+    can vanish (with probability 'exp(-NBins)') and the sample is undefined.
+
+    Examples
+    --------
+    >>> data = np.random.normal(size=[128, 2000])
+    >>> pb = boot.PoissonBootstrapper(data[:, :1000], NSamples=1000)
+    >>> pb.extend(data[:, 1000:])
+    >>> mean, var = pb.moments()
+    """
+    # Only the shape and type are read here (datasets are read by 'extend')
+    with _openData(data) as dataset:
+      if not(isinstance(dataset, h5py.Dataset)):
+        data = dataset = np.asarray(dataset)
+      shape, dtype = list(dataset.shape), dataset.dtype
+
+    if NSamples < 1:
+      raise ValueError(
+        "NSamples must be larger then zero. Received {}".format(NSamples)
+      )
+    if NBinSize < 1:
+      raise ValueError(
+        "NBinSize must be larger then zero. Received {}".format(NBinSize)
+      )
+
+    if not(dtype in [np.float64, np.complex128, np.float32, np.complex64]):
+      raise TypeError("Input data needs to be of type 'float' or 'complex'")
+    self._varShape = shape[:-1] if len(shape) > 2 else None
+
+    # set the members
+    ## The number of to be generated bootstrap samples.
+    self.NSamples = NSamples
+    ## The number of configurations contained in one bin.
+    self.NBinSize = NBinSize
+    ## The seed of the weights.
+    self.seed     = PyBootstrap.randomSeed() if seed is None else seed
+    ## The number of configurations in the ensemble (including pending ones).
+    self.NConfigs = 0
+    ## The number of variables in the ensemble.
+    self.NVars    = int(np.prod(shape[:-1]))
+    ## The number of (weighted) bins.
+    self.NBins    = 0
+    ## The number of threads used for generating the weights.
+    self.nThreads = nThreads
+
+    ## Dictionary containing informative parameters
+    self.parameters = {
+      "NSamples": self.NSamples,
+      "NBinSize": self.NBinSize,
+      "NConfigs": self.NConfigs,
+      "NVars":    self.NVars,
+      "NBins":    self.NBins,
+    }
+
+    # Sums are accumulated in double precision
+    dtype = np.complex128 if np.issubdtype(dtype, np.complexfloating) \
+      else np.float64
+    ## The weighted sums of the bins of each sample.
+    self._sums    = np.zeros([self.NVars, self.NSamples], dtype=dtype)
+    ## The sum of the weights of each sample.
+    self._weights = np.zeros(self.NSamples)
+    ## The (unweighted) sum of the bins.
+    self._totals  = np.zeros(self.NVars, dtype=dtype)
+    ## The appended configurations which do not fill a bin yet.
+    self._pending = np.empty([self.NVars, 0], dtype=dtype)
+    ## The bootstrap samples (computed when accessed)
+    self._samples = None
+
+    self.extend(data)
+
+  #------------------
+  def extend(self, newConfigs):
+    """
+    Appends configurations to the ensemble and updates the samples with the
+    new bins. The weights of the existing bins do not change. Thus extending
+    the ensemble in pieces gives the same samples as initializing with the
+    concatenated data (up to rounding).
+
+    Parameters
+    ----------
+    newConfigs : ndarray (varShape x NNew), float or complex
+        The configurations which are appended. New configurations which do
+        not fill a bin are kept until the next call. The configurations can
+        also be a 'h5py.Dataset' or a dictionary with values for the keys
+        'fileName' and 'datasetName'. Datasets are read chunk by chunk.
+    """
+    with _openData(newConfigs) as newConfigs:
+      if isinstance(newConfigs, h5py.Dataset):
+        NChunk = max(
+          PyBootstrap._CHUNK_SIZE // max(self.NVars, 1), self.NBinSize
+        )
+        for c0 in range(0, newConfigs.shape[-1], NChunk):
+          self._extend(newConfigs[..., c0:c0 + NChunk])
+      else:
+        self._extend(np.asarray(newConfigs))
+
+  #------------------
+  def _extend(self, newConfigs):
+    """Appends the configurations of the array 'newConfigs'."""
+    varShape   = [self.NVars] if self._varShape is None else self._varShape
+    if list(newConfigs.shape[:-1]) != list(varShape):
+      raise ValueError(
+        "New configurations must be of shape 'varShape x NNew' = {}."
+        .format(list(varShape) + ["NNew"])
+        + " Received {}".format(list(newConfigs.shape))
+      )
+    newConfigs = newConfigs.reshape([self.NVars, newConfigs.shape[-1]])
+    self.NConfigs += newConfigs.shape[1]
+    newConfigs = np.concatenate(
+      [self._pending, newConfigs.astype(self._sums.dtype)], axis=1
+    )
+
+    # Bin the complete bins and keep the remainder
+    NNew = newConfigs.shape[1] // self.NBinSize
+    bins = PyBootstrap.binArray(
+      newConfigs[:, :NNew*self.NBinSize], self.NBinSize,
+      nThreads=self.nThreads,
+    )
+    self._pending = newConfigs[:, NNew*self.NBinSize:].copy()
+
+    # Add the weighted bins chunk by chunk to bound the memory of the weights
+    for b0 in range(0, NNew, _POISSON_BIN_CHUNK):
+      b1 = min(b0 + _POISSON_BIN_CHUNK, NNew)
+      weights = PyBootstrap.getPoissonWeights(
+        self.seed, 0, self.NSamples, self.NBins + b0, self.NBins + b1,
+        self.nThreads
+      )
+      self._sums    += bins[:, b0:b1] @ weights.T
+      self._weights += weights.sum(axis=1)
+    self._totals += bins.sum(axis=1)
+
+    self.NBins += NNew
+    self.parameters.update({"NConfigs": self.NConfigs, "NBins": self.NBins})
+    self._samples = None
+
+  #------------------
+  def _getSampleBlock(self, v0, v1, s0, s1):
+    """Returns the samples '[s0, s1)' of the variables '[v0, v1)'."""
+    return self._sums[v0:v1, s0:s1] / self._weights[s0:s1]
+
+  #------------------
+  def getWeights(self, s0=0, s1=None):
+    """
+    Returns the weights of the bins.
+
+    Returns
+    ----------
+    out : ndarray '(s1-s0) x NBins', float
+        The Poisson distributed weights of the bins in the samples '[s0, s1)'.
+    """
+    s1 = self.NSamples if s1 is None else s1
+    return PyBootstrap.getPoissonWeights(
+      self.seed, s0, s1, 0, self.NBins, self.nThreads
+    )
+
+  #------------------
+  @property
+  def _mean(self):
+    """The mean of the binned data."""
+    return self._totals / self.NBins
+
+  #------------------
+  @property
+  def samples(self):
+    """
+    Returns the bootstrap samples.
+
+    Returns
+    ----------
+    out : ndarray
+        The bootstrap samples of size 'varShape x self.NSamples'.
+    """
+    if self._samples is None:
+      self._samples = self._getSampleBlock(0, self.NVars, 0, self.NSamples)
+    if self._varShape is None:
+      return self._samples
+    else:
+      return self._samples.reshape(self._varShape + [self.NSamples])
+
+  #------------------
+  iterSamples       = BlockBootstrapper.iterSamples
+  getDerivedSamples = Bootstrapper.getDerivedSamples
+  moments           = BlockBootstrapper.moments
+  getCov            = BlockBootstrapper.getCov
+  getCorr           = Bootstrapper.getCorr
+  mean              = Bootstrapper.mean
+
+  #------------------
+  def __str__(self):
+    """Returns name and input parameters"""
+    return "PoissonBootstrapper(" + ", ".join([
+      "{key}={val}".format(key=key, val=val)
+        for key, val in self.parameters.items()
+    ]) + ")"
+
+  #------------------
+  def __repr__(self):
+    """Returns str(self)"""
+    return str(self)
+
+
+#-------------------------------------------------------------------------------
+def binningSweep(data, binSizes, NSamples=None, seed=None, nThreads=1):
+  """
+  Computes the standard error of the mean as a function of the bin size for
+  all variables at once (binning analysis).
+
+  Parameters
+  ----------
+  data : ndarray (varShape x NConfigs), float or complex
+      Input data (see 'Bootstrapper').
+
+  binSizes : iterable of integers
+      The bin sizes 'NBinSize' to analyze.
+
+  NSamples : integer or None, optional
+      If None, the error is the standard error of the binned data
+      'std(binned)/sqrt(NBins)'. Otherwise, the error is the bootstrap error
+      with 'NSamples' samples of size 'NBins' for each bin size.
+
+  seed : integer or None, optional
+      The seed of the bootstrap indices. The same seed (index stream) is used
+      for each bin size. If None, a random seed is drawn once.
+
+  nThreads : integer, optional
+      The number of threads used for computing the prefix sums and samples.
+
+  Returns
+  ----------
+  sweep : dictionary
+      'binSizes' : ndarray 'NBinSizes'
+          The bin sizes.
+      'errors' : ndarray 'NBinSizes x varShape', float
+          The error of the mean for each bin size.
+      'tauInt' : ndarray 'NBinSizes x varShape', float
+          The estimate of the integrated autocorrelation time
+          >>> tauInt = errors**2 / (2*error0**2)
+          where 'error0' is the standard error of the unbinned data. It
+          plateaus for bin sizes larger than the autocorrelation time.
+      'seed' : integer or None
+          The seed of the bootstrap indices.
+
+  Notes
+  -----
+  The centered prefix sums of the data are computed once. The bins of each
+  bin size are differences of prefix sums and cost 'O(NVars x NBins)'. As for
+  'Bootstrapper', the remainder 'NConfigs % NBinSize' is skipped at the
+  beginning.
+
+  Examples
+  --------
+  >>> sweep = boot.binningSweep(data, [1, 2, 4, 8, 16, 32])
+  >>> sweep["errors"][:, 0], sweep["tauInt"][:, 0]
+  """
+  data = np.asarray(data)
+  varShape = list(data.shape[:-1])
+  NConfigs = data.shape[-1]
+  mean, prefix = PyBootstrap.getPrefixSums(
+    data.reshape([int(np.prod(varShape)), NConfigs]), nThreads
+  )
+  binSizes = np.array(binSizes, dtype=int)
+  if (binSizes < 1).any() or (binSizes > NConfigs//2).any():
+    raise ValueError(
+      "Bin sizes must be in [1, NConfigs//2]. Received {}".format(binSizes)
+    )
+  if not(NSamples is None) and seed is None:
+    seed = PyBootstrap.randomSeed()
+
+  # Error of the mean of the binned data from the centered prefix sums
+  def binnedError(NBinSize, bootstrap):
+    edges  = prefix[:, NConfigs % NBinSize::NBinSize]
+    binned = np.diff(edges, axis=1) / NBinSize
+    NBins  = binned.shape[1]
+    if not(bootstrap):
+      centered = binned - binned.mean(axis=1, keepdims=True)
+      return np.sqrt(
+        np.sum(np.abs(centered)**2, axis=1) / (NBins * (NBins - 1))
+      )
+    # The binned data is centered which does not change the variance
+    bs = Bootstrapper(
+      binned, NSamples=NSamples, NSize=NBins, NBinSize=1, seed=seed,
+      nThreads=nThreads, storeIndices=False
+    )
+    return np.sqrt(bs.moments()[1])
+
+  errors = np.array([
+    binnedError(NBinSize, not(NSamples is None)) for NBinSize in binSizes
+  ])
+  tauInt = errors**2 / (2 * binnedError(1, False)**2)
+
+  return {
+    "binSizes": binSizes,
+    "errors":   errors.reshape([len(binSizes)] + varShape),
+    "tauInt":   tauInt.reshape([len(binSizes)] + varShape),
+    "seed":     seed,
+  }
+
+
+#-------------------------------------------------------------------------------
+def _bootstrapTask(data, NSize, seed, indices, s0, s1, moments, nThreads):
+  """
+  Computes the samples '[s0, s1)' of the binned data 'data' (see
+  'Bootstrapper.distributedSamples'). Executed by the workers.
+
+  Parameters
+  ----------
+  data : ndarray 'NVars x NBins'
+      The binned data of the variables of the block.
+
+  NSize, seed : integer
+      The parameters of the 'Bootstrapper'.
+
+  indices : ndarray '(s1-s0) x NSize' or None
+      The indices of the samples. Only used if the seed is None.
+
+  s0, s1 : integer
+      The range of the index rows of the samples.
+
+  moments : boolean
+      If True, returns the mean and variance of the samples instead.
+
+  nThreads : integer
+      The number of threads of the worker.
+  """
+  if seed is None:
+    bs = Bootstrapper(data, indices=indices, NBinSize=1, nThreads=nThreads)
+    samples = bs._getSamples()
+  else: # regenerate the indices of the samples from the seed
+    bs = Bootstrapper(
+      data, NSamples=s1, NSize=NSize, NBinSize=1, seed=seed,
+      nThreads=nThreads, storeIndices=False
+    )
+    samples = bs.boot._getSampleBlock(0, bs.NVars, s0, s1, nThreads)
+  if not(moments):
+    return samples
+  # The moments are computed from the samples of size 'NVars x (s1-s0)'
+  return bs.boot.getMoments(samples, nThreads=nThreads)
+
+
+#-------------------------------------------------------------------------------
+## The number of samples of one chunk of exported samples.
+_H5_SAMPLE_CHUNK = 1024
+## The (maximal) size of one chunk of exported datasets in bytes.
+_H5_CHUNK_BYTES  = 2**18
+
+#-------------------------------------------------------------------------------
+def _chunkShape(shape, itemsize, lastChunk):
+  """
+  Returns the chunk shape of a HDF5 dataset of given shape which contains at
+  most 'lastChunk' entries of the last dimension. The leading dimensions are
+  filled from the back until the chunk holds about '_H5_CHUNK_BYTES' bytes.
+  Returns None (no chunks) for empty datasets.
+  """
+  if 0 in shape:
+    return None
+  chunks = [min(shape[-1], lastChunk)]
+  budget = max(_H5_CHUNK_BYTES // (chunks[0] * itemsize), 1)
+  for size in reversed(shape[:-1]):
+    chunks.insert(0, min(size, budget))
+    budget = max(budget // chunks[0], 1)
+  return tuple(int(chunk) for chunk in chunks)
+
+
+#-------------------------------------------------------------------------------
+def _getBootGroup(f, groupName=None):
+  """
+  Returns the 'bootstrap' group of the group 'groupName' of the open HDF5 file
+  'f'. Raises a 'KeyError' if the group does not exist.
+  """
+  baseAddress = "/" if groupName is None else os.path.join("/", groupName)
+  bootAddress = os.path.join(baseAddress, "bootstrap")
+  bootGroup = f.get(bootAddress)
+  # Check wether group exists
+  if bootGroup is None:
+    raise KeyError("Could not open group: {}".format(bootAddress))
+  return bootGroup
+
+
+#-------------------------------------------------------------------------------
+def _readParameters(bootGroup):
+  """
+  Returns the parameters and seed of the 'bootstrap' group as dictionary.
+  Parameters are attributes -- files of older versions store them as scalar
+  datasets.
+  """
+  parameters = {
+    key: dataset[()] for key, dataset in bootGroup.items()
+      if isinstance(dataset, h5py.Dataset) and dataset.shape == ()
+  }
+  parameters.update(bootGroup.attrs)
+  return parameters
+
+
+#-------------------------------------------------------------------------------
+def readSamples(fileName, groupName=None, variables=Ellipsis, samples=None):
+  """
+  Reads (a part of) the samples exported by 'Bootstrapper.exportHDF5'.
+
+  Parameters
+  ----------
+  fileName : string
+      Address pointing to the HDF5 file.
+
+  groupName : string, optional
+      Group name (can include subgroups) of the exported 'bootstrap' group.
+
+  variables : index, optional
+      Index of the variables (integers, slices or a tuple of these for
+      multi-dimensional variables). By default all variables are read.
+
+  samples : index, optional
+      Index of the samples (integer or slice). By default all samples are read.
+
+  Returns
+  -------
+  samples : ndarray 'varShape x NSamples' (or the selected part)
+      Only the chunks of the selection are read.
+
+  Examples
+  --------
+  >>> boot.readSamples("bootstrap.h5", "ensemble1", variables=3)
+  >>> boot.readSamples("bootstrap.h5", "ensemble1", samples=slice(0, 100))
+  """
+  variables = variables if isinstance(variables, tuple) else (variables,)
+  samples = slice(None) if samples is None else samples
+  if not(Ellipsis in variables):
+    variables = variables + (Ellipsis,)
+  with h5py.File(fileName, "r") as f:
+    dataset = _getBootGroup(f, groupName).get("samples")
+    if dataset is None:
+      raise KeyError("No samples exported to group: {}".format(groupName))
+    return dataset[variables + (samples,)]
+
+
+#-------------------------------------------------------------------------------
+def readIndices(fileName, groupName=None, samples=None):
+  """
+  Reads (a part of) the indices exported by 'Bootstrapper.exportHDF5'. If
+  only the seed was exported, the indices are regenerated.
+
+  Parameters
+  ----------
+  fileName : string
+      Address pointing to the HDF5 file.
+
+  groupName : string, optional
+      Group name (can include subgroups) of the exported 'bootstrap' group.
+
+  samples : integer, slice or None, optional
+      The rows of the indices ('NGroups*NSamples x NSize'). An integer selects
+      one row (the result keeps two dimensions). Slices must have a positive
+      step. By default all indices are read.
+
+  Returns
+  -------
+  indices : ndarray
+      The same rows are returned for stored and regenerated indices.
+  """
+  with h5py.File(fileName, "r") as f:
+    bootGroup = _getBootGroup(f, groupName)
+    parameters = _readParameters(bootGroup)
+    stored = bootGroup.get("indices")
+    if stored is None:
+      NRows = int(parameters.get("NGroups", 1)) * int(parameters["NSamples"])
+    else:
+      NRows = stored.shape[0]
+
+    # Normalize the rows to a slice with positive step
+    if samples is None:
+      samples = slice(None)
+    elif isinstance(samples, (int, np.integer)):
+      row = int(samples) + NRows if samples < 0 else int(samples)
+      if not(0 <= row < NRows):
+        raise IndexError(
+          "Row {} out of range for {} rows".format(samples, NRows)
+        )
+      samples = slice(row, row + 1)
+    elif not(isinstance(samples, slice)):
+      raise TypeError(
+        "Samples must be an integer, a slice or None. Received {}".format(
+          type(samples)
+        )
+      )
+    if not(samples.step is None) and samples.step < 1:
+      raise ValueError(
+        "The step of the samples must be positive. Received {}".format(
+          samples.step
+        )
+      )
+    s0, s1, step = samples.indices(NRows)
+    s1 = max(s1, s0)
+
+    if not(stored is None):
+      return stored[s0:s1:step]
+  indices = PyBootstrap.indicesFromSeed(
+    int(parameters["seed"]), int(parameters["NBins"]),
+    int(parameters["NSize"]), s0, s1
+  )
+  return indices[::step]
+
+
+#-------------------------------------------------------------------------------
+@contextlib.contextmanager
+def _openData(data):
+  """
+  Yields the input data 'data'. A dictionary with values for the keys
+  'fileName' and 'datasetName' is opened as 'h5py.Dataset' for the time of
+  the context (the data is not read).
+  """
+  if not(isinstance(data, dict)):
+    yield data
+    return
+  fileName    = data.get("fileName")
+  datasetName = data.get("datasetName")
+  if fileName is None or datasetName is None:
+    raise KeyError(
+      "To read the data from a HDF5 file, you must specify the keys"
+      + " 'fileName' and 'datasetName'."
+    )
+  with h5py.File(fileName, "r") as f:
+    yield f[datasetName]
+
+
+#-------------------------------------------------------------------------------
+def _openMemmap(mmapDir, fileName, dtype, shape):
+  """
+  Creates the '.npy' file 'fileName' in the directory 'mmapDir' and returns it
+  as writable 'np.memmap' of given type and shape.
+  """
+  os.makedirs(mmapDir, exist_ok=True)
+  return np.lib.format.open_memmap(
+    os.path.join(mmapDir, fileName), mode="w+", dtype=dtype, shape=tuple(shape)
+  )
+
+
 #-------------------------------------------------------------------------------
 def bootstrapperInHDF5(fileName, groupName=None):
   """
@@ -2,291 +2,701 @@
 
 //---------------------------------------------
 // List constructor
-template<typename T>
-Bootstrapper<T>::Bootstrapper(
-  const mat<T> &Indata,
+template<typename T, typename A>
+Bootstrapper<T, A>::Bootstrapper(
+  const T *Indata,
+  const size_t NVars,
+  const size_t NConfigs,
+  const std::ptrdiff_t varStride,
+  const std::ptrdiff_t configStride,
   const size_t NSamples,
   const size_t NSize,
-  const size_t NBinSize
+  const size_t NBinSize,
+  const uint64_t seed,
+  T *binnedBuffer,
+  void *indicesBuffer,
+  const size_t nThreads,
+  const bool storeIndices,
+  const size_t NGroups
 ) : 
   NSamples(NSamples),
   NSize(NSize),
   NBinSize(NBinSize),
-  NConfigs(Indata[0].size()),
-  NVars(Indata.size()),
+  NConfigs(NConfigs),
+  NVars(NVars),
   NBins(NConfigs/NBinSize),
-  data([&](){
-    // Bin data according to shape NVars x NBins
-    if(NBins != 1){
-      mat<T> binnedData(NVars, vec<T>(NBins, 0));
-      std::transform( // Iterate NVars
-        Indata.begin(),
-        Indata.end(),
-        binnedData.begin(),
-        [&](const vec<T> &rowData){ // Output is binned vector of size NBins
-          vec<T> binnedRow(NBins, 0);
-          size_t mod(NConfigs%NBinSize); // Initial offset
-          for(size_t nb=0; nb<NBins; nb++){ // Execute binning
-            for(size_t nc=0; nc<NBinSize; nc++){ // Average bins
-              binnedRow[nb] += rowData[mod+nb*NBinSize+nc]/static_cast<T>(NBinSize);
-            };
-          };
-          return binnedRow;
-        }
-      );
-      return binnedData;
-    } else { // Return just data if no bins.
-      return Indata;
-    };
-  }()),
-  dist([&](){
-    // Start engine with random seed
-    std::random_device seed;
-    std::mt19937 engine(seed());
-    // Get distribution in range of number of bins
-    std::uniform_int_distribution<size_t> distribution(0, NBins-1);
-    // Bind distribution to engine
-    return std::make_shared< std::function<size_t()> >( 
-      std::bind( distribution, engine ) 
-    );
-  }()),
-  indices([&](){
-    // Set indicies of matrix using random uniform distribution
-    mat<size_t> temp(NSamples, vec<size_t>(NSize, 0));
-    std::for_each(
-      temp.begin(), 
-      temp.end(), 
-      [&](vec<size_t> &rowIndices){
-        std::for_each(
-          rowIndices.begin(),
-          rowIndices.end(),
-          [&](size_t &val){val=(*dist)();}
-        );
-      }
-    );
-    return temp;
-  }())
+  NGroups(NGroups),
+  data(initData(Indata, varStride, configStride, binnedBuffer, nThreads)),
+  seed(seed),
+  storeIndices(storeIndices),
+  indexType(smallestIndexType(NBins)),
+  indices16(initIndices<uint16_t>(indicesBuffer, nThreads)),
+  indices32(initIndices<uint32_t>(indicesBuffer, nThreads)),
+  indices64(initIndices<size_t>(indicesBuffer, nThreads))
 {}
 
 //---------------------------------------------
 // List constructor from indices
-template<typename T>
-Bootstrapper<T>::Bootstrapper(
-    const mat<T> &Indata,
-    const mat<size_t> &inIndices,
-    const size_t NBinSize
+template<typename T, typename A>
+Bootstrapper<T, A>::Bootstrapper(
+    const T *Indata,
+    const size_t NVars,
+    const size_t NConfigs,
+    const std::ptrdiff_t varStride,
+    const std::ptrdiff_t configStride,
+    const void *inIndices,
+    const IndexType indexType,
+    const size_t NSamples,
+    const size_t NSize,
+    const size_t NBinSize,
+    T *binnedBuffer,
+    const size_t nThreads,
+    const size_t NGroups
 ) : 
-  NSamples(inIndices.size()),
-  NSize(inIndices[0].size()),
+  NSamples(NSamples),
+  NSize(NSize),
   NBinSize(NBinSize),
-  NConfigs(Indata[0].size()),
-  NVars(Indata.size()),
+  NConfigs(NConfigs),
+  NVars(NVars),
   NBins(NConfigs/NBinSize),
-  data([&](){
-    // Bin data according to shape NVars x NBins
-    if(NBins != 1){
-      mat<T> binnedData(NVars, vec<T>(NBins, 0));
-      std::transform( // Iterate NVars
-        Indata.begin(),
-        Indata.end(),
-        binnedData.begin(),
-        [&](const vec<T> &rowData){ // Output is binned vector of size NBins
-          vec<T> binnedRow(NBins, 0);
-          size_t mod(NConfigs%NBinSize); // Initial offset
-          for(size_t nb=0; nb<NBins; nb++){ // Execute binning
-            for(size_t nc=0; nc<NBinSize; nc++){ // Average bins
-              binnedRow[nb] += rowData[mod+nb*NBinSize+nc]/static_cast<T>(NBinSize);
-            };
-          };
-          return binnedRow;
-        }
-      );
-      return binnedData;
-    } else { // Return just data if no bins.
-      return Indata;
-    };
-  }()),
-  dist([&](){
-    // Start engine with random seed
-    std::random_device seed;
-    std::mt19937 engine(seed());
-    // Get distribution in range of number of bins
-    std::uniform_int_distribution<size_t> distribution(0, NBins-1);
-    // Bind distribution to engine
-    return std::make_shared< std::function<size_t()> >( 
-      std::bind( distribution, engine ) 
-    );
-  }()),
-  indices(inIndices)
+  NGroups(NGroups),
+  data(initData(Indata, varStride, configStride, binnedBuffer, nThreads)),
+  seed(0),
+  storeIndices(true),
+  indexType(indexType),
+  // Views on the row-major index buffer of shape (NGroups*NSamples) x NSize
+  indices16(viewIndices<uint16_t>(inIndices)),
+  indices32(viewIndices<uint32_t>(inIndices)),
+  indices64(viewIndices<size_t>(inIndices))
 {}
 
 
 //---------------------------------------------
-// getMean
-template<typename T>
-const inline vec<T> Bootstrapper<T>::getMean(const mat<T> &vals) const {
-  vec<T> meanVec(vals.size());
-  std::transform( // Iterate over variables
-    vals.begin(), 
-    vals.end(), 
-    meanVec.begin(), 
-    [&](const vec<T> &rowData){ // And return mean of the rows
-      return this->getMean(rowData);
-    }
+// initData
+template<typename T, typename A>
+mat<T> Bootstrapper<T, A>::initData(
+  const T *Indata,
+  const std::ptrdiff_t varStride,
+  const std::ptrdiff_t configStride,
+  T *binnedBuffer,
+  const size_t nThreads
+) const {
+  // Bin data according to shape NVars x NBins
+  mat<T> binnedData = (binnedBuffer == nullptr) ?
+    mat<T>(NVars, NBins) : mat<T>(binnedBuffer, NVars, NBins, NBins);
+  if(Indata != nullptr){ // Otherwise the buffer is already binned
+    binData(
+      Indata, NVars, NConfigs, varStride, configStride, NBinSize,
+      binnedData.data(), NBins, nThreads
+    );
+  }
+  return binnedData;
+}
+
+//---------------------------------------------
+// initIndices
+template<typename T, typename A>
+template<typename I>
+mat<I> Bootstrapper<T, A>::initIndices(void *buffer, const size_t nThreads) const {
+  if(!storeIndices || indexType != indexTypeOf<I>()){
+    return mat<I>(0, 0);
+  }
+  // Set indicies of matrix using the counter based random generator
+  mat<I> temp = (buffer == nullptr) ?
+    mat<I>(NGroups*NSamples, NSize) :
+    mat<I>(static_cast<I*>(buffer), NGroups*NSamples, NSize, NSize);
+  generateIndices(temp.data(), 0, NGroups*NSamples, nThreads);
+  return temp;
+}
+
+
+//---------------------------------------------
+// viewIndices
+template<typename T, typename A>
+template<typename I>
+mat<I> Bootstrapper<T, A>::viewIndices(const void *buffer) const {
+  if(indexType != indexTypeOf<I>()){
+    return mat<I>(0, 0);
+  }
+  return mat<I>(
+    const_cast<I*>(static_cast<const I*>(buffer)),
+    NGroups*NSamples, NSize, NSize
   );
+}
+
+
+//---------------------------------------------
+// getMean
+template<typename T, typename A>
+const inline vec<A> Bootstrapper<T, A>::getMean(const mat<T> &vals) const {
+  vec<A> meanVec(vals.rows());
+  for(size_t nr=0; nr<vals.rows(); nr++){ // Iterate over rows
+    meanVec[nr] = getMean(vals.row(nr), vals.cols());
+  };
   return meanVec;
 }
 
 
 //---------------------------------------------
 // getMean
-template<typename T>
-const inline T Bootstrapper<T>::getMean(const vec<T> &vals) const {
-  return std::accumulate(
-    vals.begin(), 
-    vals.end(), 
-    T(0)
-  )/static_cast<T>(vals.size());
+template<typename T, typename A>
+template<typename V>
+const inline A Bootstrapper<T, A>::getMean(const V *vals, const size_t size) const {
+  A sum(0);
+  for(size_t n=0; n<size; n++){
+    sum += static_cast<A>(vals[n]);
+  };
+  return sum/static_cast<A>(size);
 }
 
 
 //---------------------------------------------
-// getSamples
-template<typename T>
-const mat<T> Bootstrapper<T>::getSamples() const {
-  // declare temporary variables
-  mat<T> VarSampleMat(NVars, vec<T>(NSamples, 0));
-  mat<T> SampleSizeMat(NSamples, vec<T>(NSize, 0));
-  vec<T> SizeVec(NSize, 0);
-
-  std::transform( // iterate variables
-    data.begin(),
-    data.end(),
-    VarSampleMat.begin(),
-    [&](const vec<T> &dataConfigs) ->vec<T> { // outputs are  averaged vecs of size NSample
-
-      std::transform( // iterate samples
-        indices.begin(),
-        indices.end(),
-        SampleSizeMat.begin(),
-        [&](const vec<size_t> &indexRow) ->vec<T>& { // outputs are random vecs of size NSize
-
-            std::transform(
-              indexRow.begin(),
-              indexRow.end(),
-              SizeVec.begin(),
-              [&](const size_t index) ->const T& {  // Set entry data[index]
-                return dataConfigs[index];
-              }
-            );
-            return SizeVec;
-
-        }
+// getData
+template<typename T, typename A>
+void Bootstrapper<T, A>::getData(T *out) const {
+  for(size_t nv=0; nv<NVars; nv++){ // iterate variables
+    out = std::copy(data.row(nv), data.row(nv) + NBins, out);
+  };
+}
+
+
+//---------------------------------------------
+// getIndices
+template<typename T, typename A>
+void Bootstrapper<T, A>::getIndices(size_t *out) const {
+  if(!storeIndices){
+    generateIndices(out, 0, NGroups*NSamples);
+    return;
+  }
+  auto copyRows = [&](const auto &indices){ // widen to size_t
+    for(size_t ns=0; ns<NGroups*NSamples; ns++){ // iterate samples
+      out = std::copy(indices.row(ns), indices.row(ns) + NSize, out);
+    };
+  };
+  switch(indexType){
+    case index16:
+      copyRows(indices16);
+      break;
+    case index32:
+      copyRows(indices32);
+      break;
+    default:
+      copyRows(indices64);
+  };
+}
+
+
+//---------------------------------------------
+// generateIndices of type indexType
+template<typename T, typename A>
+void Bootstrapper<T, A>::generateIndices(
+  void *out,
+  const size_t s0,
+  const size_t s1,
+  const size_t nThreads
+) const {
+  switch(indexType){
+    case index16:
+      generateIndices(static_cast<uint16_t*>(out), s0, s1, nThreads);
+      break;
+    case index32:
+      generateIndices(static_cast<uint32_t*>(out), s0, s1, nThreads);
+      break;
+    default:
+      generateIndices(static_cast<size_t*>(out), s0, s1, nThreads);
+  };
+}
+
+
+//---------------------------------------------
+// getIndexBlock
+template<typename T, typename A>
+template<typename I>
+const I *Bootstrapper<T, A>::getIndexBlock(
+  const size_t s0,
+  const size_t s1,
+  I *buffer
+) const {
+  if(storeIndices){
+    return getIndexMat(I(0)).row(s0);
+  }
+  generateIndices(buffer, s0, s1);
+  return buffer;
+}
+
+
+//---------------------------------------------
+// getMean
+template<typename T, typename A>
+void Bootstrapper<T, A>::getMean(A *out) const {
+  for(size_t nv=0; nv<NVars; nv++){ // Iterate over variables
+    out[nv] = getMean(data.row(nv), NBins);
+  };
+}
+
+
+//---------------------------------------------
+// getSampleKernel
+template<typename T, typename A>
+SampleKernel Bootstrapper<T, A>::getSampleKernel(const SampleKernel kernel) const {
+  if(kernel != automaticKernel){
+    return kernel;
+  }
+  return (NBins <= 2*NSize) ? denseKernel : gatherKernel;
+}
+
+
+//---------------------------------------------
+// getSampleBlock
+template<typename T, typename A>
+void Bootstrapper<T, A>::getSampleBlock(
+  T *out,
+  const size_t ldOut,
+  const size_t v0,
+  const size_t v1,
+  const size_t s0,
+  const size_t s1,
+  const SampleKernel kernel
+) const {
+  const size_t NGroupVars(NVars/NGroups);
+  for(size_t va=v0; va<v1;){ // split the variables at group boundaries
+    const size_t group(va/NGroupVars);
+    const size_t vb(std::min(v1, (group+1)*NGroupVars));
+    T *outGroup(out + (va-v0)*ldOut);
+    const size_t sOffset(group*NSamples);
+    switch(indexType){
+      case index16:
+        getKernelBlock<uint16_t>(
+          outGroup, ldOut, va, vb, s0, s1, sOffset, kernel
+        );
+        break;
+      case index32:
+        getKernelBlock<uint32_t>(
+          outGroup, ldOut, va, vb, s0, s1, sOffset, kernel
+        );
+        break;
+      default:
+        getKernelBlock<size_t>(
+          outGroup, ldOut, va, vb, s0, s1, sOffset, kernel
+        );
+    };
+    va = vb;
+  };
+}
+
+
+//---------------------------------------------
+// getKernelBlock for index type I
+template<typename T, typename A>
+template<typename I>
+void Bootstrapper<T, A>::getKernelBlock(
+  T *out,
+  const size_t ldOut,
+  const size_t v0,
+  const size_t v1,
+  const size_t s0,
+  const size_t s1,
+  const size_t sOffset,
+  const SampleKernel kernel
+) const {
+  switch(kernel){
+    case denseKernel:
+      denseSamples<I>(out, ldOut, v0, v1, s0, s1, sOffset);
+      break;
+    default:
+      gatherSamples<I>(out, ldOut, v0, v1, s0, s1, sOffset);
+  };
+}
+
+
+//---------------------------------------------
+// gatherSamples
+template<typename T, typename A>
+template<typename I>
+void Bootstrapper<T, A>::gatherSamples(
+  T *out,
+  const size_t ldOut,
+  const size_t v0,
+  const size_t v1,
+  const size_t s0,
+  const size_t s1,
+  const size_t sOffset
+) const {
+  const A norm(static_cast<A>(NSize));
+  // Number of samples sharing one block of indices
+  const size_t NBlock(std::max<size_t>((size_t(1) << 15)/NSize, 1));
+  // Thread local indices (only used if generated on the fly)
+  vec<I> indexBuffer(storeIndices ? 0 : std::min(NBlock, s1-s0)*NSize);
+
+  for(size_t sb=s0; sb<s1; sb+=NBlock){ // iterate sample blocks
+    const size_t se(std::min(sb+NBlock, s1));
+    const I *indexBlock(
+      getIndexBlock(sb+sOffset, se+sOffset, indexBuffer.data())
+    );
+    for(size_t nv=v0; nv<v1; nv++){ // iterate variables
+      const T *dataConfigs(data.row(nv)); // one row of size NBins
+      T *outRow(out + (nv-v0)*ldOut);
+      for(size_t ns=sb; ns<se; ns++){ // iterate samples
+        // indices are streamed row by row
+        const I *indexRow(indexBlock + (ns-sb)*NSize);
+        A sum(0);
+        for(size_t nk=0; nk<NSize; nk++){ // Add entries data[index]
+          sum += static_cast<A>(dataConfigs[indexRow[nk]]);
+        };
+        outRow[ns-s0] = static_cast<T>(sum/norm); // average over NSize
+      };
+    };
+  };
+}
+
+
+//---------------------------------------------
+// denseSamples
+template<typename T, typename A>
+template<typename I>
+void Bootstrapper<T, A>::denseSamples(
+  T *out,
+  const size_t ldOut,
+  const size_t v0,
+  const size_t v1,
+  const size_t s0,
+  const size_t s1,
+  const size_t sOffset
+) const {
+  const size_t NTile(4); // Register tile size (variables and samples)
+  const size_t NBlock(64); // Number of samples sharing one count matrix
+  const A norm(static_cast<A>(NSize));
+  // Thread local multiplicities of size NBlock x NBins
+  mat<R> counts(std::min(NBlock, s1-s0), NBins);
+  // Thread local indices of one sample (only used if generated on the fly)
+  vec<I> indexBuffer(storeIndices ? 0 : NSize);
+
+  for(size_t sb=s0; sb<s1; sb+=NBlock){ // iterate sample blocks
+    const size_t se(std::min(sb+NBlock, s1));
+    // Count multiplicities of bins in samples
+    std::fill(counts.data(), counts.data() + counts.rows()*NBins, R(0));
+    for(size_t ns=sb; ns<se; ns++){
+      const I *indexRow(
+        getIndexBlock(ns+sOffset, ns+sOffset+1, indexBuffer.data())
       );
-      return getMean(SampleSizeMat); // average over size to get Sample vecs
-    }
-  );
+      R *countRow(counts.row(ns-sb));
+      for(size_t nk=0; nk<NSize; nk++){
+        countRow[indexRow[nk]] += R(1);
+      };
+    };
+
+    // out[v, s] = sum_b data[v, b] * counts[s, b] / NSize in register tiles
+    for(size_t nv=v0; nv<v1; nv+=NTile){ // iterate variable tiles
+      // Rows outside of the range are clamped to the last row (discarded)
+      const T *dataRows[NTile];
+      for(size_t i=0; i<NTile; i++){
+        dataRows[i] = data.row(std::min(nv+i, v1-1));
+      };
+      for(size_t ns=sb; ns<se; ns+=NTile){ // iterate sample tiles
+        const R *countRows[NTile];
+        for(size_t j=0; j<NTile; j++){
+          countRows[j] = counts.row(std::min(ns+j, se-1)-sb);
+        };
+        A acc[NTile][NTile] = {};
+        for(size_t nb=0; nb<NBins; nb++){ // stream through bins
+          for(size_t i=0; i<NTile; i++){
+            for(size_t j=0; j<NTile; j++){
+              acc[i][j] += static_cast<A>(dataRows[i][nb])*countRows[j][nb];
+            };
+          };
+        };
+        // Store valid entries of the tile
+        for(size_t i=0; i<NTile && nv+i<v1; i++){
+          T *outRow(out + (nv+i-v0)*ldOut);
+          for(size_t j=0; j<NTile && ns+j<se; j++){
+            outRow[ns+j-s0] = static_cast<T>(acc[i][j]/norm);
+          };
+        };
+      };
+    };
+  };
+}
+
+
+//---------------------------------------------
+// getSamples
+template<typename T, typename A>
+const mat<T> Bootstrapper<T, A>::getSamples(
+  const size_t nThreads,
+  const SampleKernel kernel
+) const {
+  mat<T> VarSampleMat(NVars, NSamples);
+  getSamples(VarSampleMat.data(), nThreads, kernel);
   return VarSampleMat;
 }
 
 
+//---------------------------------------------
+// getSamples into buffer
+template<typename T, typename A>
+void Bootstrapper<T, A>::getSamples(
+  T *out,
+  const size_t nThreads,
+  const SampleKernel kernel
+) const {
+  getSamples(out, 0, NVars, 0, NSamples, nThreads, kernel);
+}
+
+
+//---------------------------------------------
+// getSamples of a block into buffer
+template<typename T, typename A>
+void Bootstrapper<T, A>::getSamples(
+  T *out,
+  const size_t v0,
+  const size_t v1,
+  const size_t s0,
+  const size_t s1,
+  const size_t nThreads,
+  const SampleKernel kernel
+) const {
+  const SampleKernel blockKernel(getSampleKernel(kernel));
+  const size_t ldOut(s1-s0);
+  if(v1-v0 >= getNThreads(nThreads)){ // distribute variables
+    parallelFor(v1-v0, nThreads, [&](size_t, size_t vb, size_t ve){
+      getSampleBlock(out + vb*ldOut, ldOut, v0+vb, v0+ve, s0, s1, blockKernel);
+    });
+  } else { // distribute samples
+    parallelFor(s1-s0, nThreads, [&](size_t, size_t sb, size_t se){
+      getSampleBlock(out + sb, ldOut, v0, v1, s0+sb, s0+se, blockKernel);
+    });
+  };
+}
+
+
 //---------------------------------------------
 // getCov
-template<typename T>
-const mat<T> Bootstrapper<T>::getCov() const {
-  return getCov(getSamples()); // call method which takes input
+template<typename T, typename A>
+const mat<A> Bootstrapper<T, A>::getCov(const size_t nThreads) const {
+  mat<A> cov(NVars, NVars);
+  getCov(cov.data(), nThreads);
+  return cov;
 }
 
 
 //---------------------------------------------
 // getCov
-template<typename T>
-const mat<T> Bootstrapper<T>::getCov(const mat<T> &samples) const {
-  mat<T> cov(NVars, vec<T>(NVars, 0));
-  const T zero(0);
-  const T NSm1(NSamples-1);
-  const vec<T> muVec(getMean(samples));
-
-  std::transform(  // iterate NVars (row)
-    samples.begin(),
-    samples.end(),
-    muVec.begin(),
-    cov.begin(),
-    [&](const vec<T> &sampleRow, const T muRow){  // output is vec of size NVars (row var)
-      vec<T> covRow(NVars, 0);
-      
-      std::transform(  // iterate NVars (cols)
-        samples.begin(),
-        samples.end(),
-        muVec.begin(),
-        covRow.begin(),
-        [&](const vec<T> &sampleCol, const T muCol){  // output is entry of covariance matrix
-
-          return std::inner_product( // iterate samples
-            sampleRow.begin(),
-            sampleRow.end(),
-            sampleCol.begin(),
-            zero,
-            std::plus<>(),
-            [&](const T &elRow, const T &elCol){ // return covariance el over NSamples
-              return (elCol - muCol)*(elRow - muRow)/NSm1;
-            }
-          );
-
-        }
-      );
-      return covRow;
+template<typename T, typename A>
+const mat<A> Bootstrapper<T, A>::getCov(
+  const mat<T> &samples,
+  const size_t nThreads
+) const {
+  mat<A> cov(NVars, NVars);
+  accumulateMoments(samples.cols(), nullptr, nullptr, cov.data(), nThreads,
+    [&](T *block, const size_t s0, const size_t s1){
+      for(size_t nv=0; nv<NVars; nv++){
+        std::copy(samples.row(nv) + s0, samples.row(nv) + s1, block);
+        block += s1-s0;
+      };
     }
   );
-
   return cov;
 }
 
+
 //---------------------------------------------
-// getCov for complex overload
-template<>
-const mat<cdouble> Bootstrapper<cdouble>::getCov(const mat<cdouble> &samples) const {
-  mat<cdouble> cov(NVars, vec<cdouble>(NVars, 0));
-  const cdouble zero(0);
-  const cdouble NSm1(NSamples-1);
-  const vec<cdouble> muVec(getMean(samples));
-
-  std::transform(  // iterate NVars (row)
-    samples.begin(),
-    samples.end(),
-    muVec.begin(),
-    cov.begin(),
-    [&](const vec<cdouble> &sampleRow, const cdouble &muRow){  // output is vec of size NVars (row var)
-      vec<cdouble> covRow(NVars, 0);
-      
-      std::transform(  // iterate NVars (cols)
-        samples.begin(),
-        samples.end(),
-        muVec.begin(),
-        covRow.begin(),
-        [&](const vec<cdouble> &sampleCol, const cdouble &muCol){  // output is entry of covariance matrix
-
-          return std::inner_product( // iterate samples
-            sampleRow.begin(),
-            sampleRow.end(),
-            sampleCol.begin(),
-            zero,
-            std::plus<>(),
-            [&](const cdouble &elRow, const cdouble &elCol){ // return covariance el over NSamples
-              return std::conj(elCol - muCol)*(elRow - muRow)/NSm1;
-            }
-          );
-
-        }
-      );
-      return covRow;
+// getCov into buffer (fused with sampling)
+template<typename T, typename A>
+void Bootstrapper<T, A>::getCov(
+  A *out,
+  const size_t nThreads,
+  const SampleKernel kernel
+) const {
+  getMoments(nullptr, nullptr, out, nThreads, kernel);
+}
+
+
+//---------------------------------------------
+// getCov of samples buffer into buffer
+template<typename T, typename A>
+void Bootstrapper<T, A>::getCov(
+  const T *samples,
+  A *out,
+  const size_t nThreads
+) const {
+  getMoments(samples, NSamples, nullptr, nullptr, out, nThreads);
+}
+
+
+//---------------------------------------------
+// getMoments (fused with sampling)
+template<typename T, typename A>
+void Bootstrapper<T, A>::getMoments(
+  A *mean,
+  R *var,
+  A *cov,
+  const size_t nThreads,
+  const SampleKernel kernel
+) const {
+  accumulateMoments(NSamples, mean, var, cov, nThreads,
+    [&](T *block, const size_t s0, const size_t s1){
+      getSamples(block, 0, NVars, s0, s1, nThreads, kernel);
     }
   );
+}
 
-  return cov;
+
+//---------------------------------------------
+// getMoments of samples buffer
+template<typename T, typename A>
+void Bootstrapper<T, A>::getMoments(
+  const T *samples,
+  const size_t NS,
+  A *mean,
+  R *var,
+  A *cov,
+  const size_t nThreads
+) const {
+  accumulateMoments(NS, mean, var, cov, nThreads,
+    [&](T *block, const size_t s0, const size_t s1){
+      for(size_t nv=0; nv<NVars; nv++){
+        std::copy(samples + nv*NS + s0, samples + nv*NS + s1, block);
+        block += s1-s0;
+      };
+    }
+  );
+}
+
+
+//---------------------------------------------
+// accumulateMoments
+template<typename T, typename A>
+template<typename F>
+void Bootstrapper<T, A>::accumulateMoments(
+  const size_t NS,
+  A *mean,
+  R *var,
+  A *cov,
+  const size_t nThreads,
+  F getBlock
+) const {
+  const size_t NBlock(256); // Number of samples per block
+  vec<A> meanAcc(NVars, A(0)); // Mean of the merged blocks
+  vec<R> M2(NVars, R(0)); // Sum of squared deviations of the merged blocks
+  vec<A> delta(NVars); // Difference of the block mean and meanAcc
+  vec<T> buffer(NVars*std::min(NBlock, NS));
+  // Samples of the block in the accumulation type
+  vec<A> accBuffer(std::is_same<T, A>::value ? 0 : buffer.size());
+  if(cov != nullptr){
+    std::fill(cov, cov + NVars*NVars, A(0));
+  };
+
+  for(size_t s0=0; s0<NS; s0+=NBlock){ // iterate sample blocks
+    const size_t s1(std::min(s0+NBlock, NS));
+    const R nA(static_cast<R>(s0)), nB(static_cast<R>(s1-s0));
+    const R n(nA+nB);
+    getBlock(buffer.data(), s0, s1);
+    mat<A> centered(getAccBlock(buffer, accBuffer), NVars, s1-s0, s1-s0);
+    for(size_t nv=0; nv<NVars; nv++){ // center the block and merge moments
+      A *row(centered.row(nv));
+      const A meanB(getMean(row, s1-s0));
+      R M2B(0);
+      for(size_t ns=0; ns<s1-s0; ns++){
+        row[ns] -= meanB;
+        M2B += absSquare(row[ns]);
+      };
+      delta[nv]    = meanB - meanAcc[nv];
+      meanAcc[nv] += delta[nv]*(nB/n);
+      M2[nv]      += M2B + absSquare(delta[nv])*(nA*nB/n);
+    };
+    if(cov != nullptr){
+      addCovBlock(centered, cov, nThreads);
+      const R weight(nA*nB/n);
+      for(size_t nr=0; nr<NVars; nr++){ // correction of the merge
+        const A deltaRow(delta[nr]*weight);
+        A *covRow(cov + nr*NVars);
+        for(size_t nc=0; nc<=nr; nc++){
+          covRow[nc] += deltaRow*conjugate(delta[nc]);
+        };
+      };
+    };
+  };
+
+  // Normalize and fill the upper triangle
+  const R NSm1(static_cast<R>(NS-1));
+  if(mean != nullptr){
+    std::copy(meanAcc.begin(), meanAcc.end(), mean);
+  };
+  if(var != nullptr){
+    for(size_t nv=0; nv<NVars; nv++){
+      var[nv] = M2[nv]/NSm1;
+    };
+  };
+  if(cov != nullptr){
+    for(size_t nr=0; nr<NVars; nr++){
+      for(size_t nc=0; nc<=nr; nc++){
+        const A covEl(cov[nr*NVars+nc]/NSm1);
+        cov[nr*NVars+nc] = covEl;
+        cov[nc*NVars+nr] = conjugate(covEl);
+      };
+    };
+  };
+}
+
+
+//---------------------------------------------
+// addCovBlock
+template<typename T, typename A>
+void Bootstrapper<T, A>::addCovBlock(
+  const mat<A> &centered,
+  A *out,
+  const size_t nThreads
+) const {
+  const size_t NTile(4); // Register tile size
+  const size_t NTiles((NVars+NTile-1)/NTile);
+  const size_t NS(centered.cols());
+
+  // Computes the tiles (t, u <= t) of tile row t
+  auto tileRow = [&](const size_t t){
+    const size_t r0(t*NTile);
+    // Rows outside of the range are clamped to the last row (discarded)
+    const A *rows[NTile];
+    for(size_t i=0; i<NTile; i++){
+      rows[i] = centered.row(std::min(r0+i, NVars-1));
+    };
+    for(size_t u=0; u<=t; u++){ // iterate column tiles
+      const size_t c0(u*NTile);
+      const A *cols[NTile];
+      for(size_t j=0; j<NTile; j++){
+        cols[j] = centered.row(std::min(c0+j, NVars-1));
+      };
+      A acc[NTile][NTile] = {};
+      for(size_t ns=0; ns<NS; ns++){ // stream through samples
+        for(size_t i=0; i<NTile; i++){
+          for(size_t j=0; j<NTile; j++){
+            acc[i][j] += rows[i][ns]*conjugate(cols[j][ns]);
+          };
+        };
+      };
+      // Store valid entries of the tile
+      for(size_t i=0; i<NTile && r0+i<NVars; i++){
+        A *outRow(out + (r0+i)*NVars);
+        for(size_t j=0; j<NTile && c0+j<NVars; j++){
+          outRow[c0+j] += acc[i][j];
+        };
+      };
+    };
+  };
+
+  // Pairs of tile rows (t, NTiles-1-t) have equal work
+  parallelFor((NTiles+1)/2, nThreads, [&](size_t, size_t p0, size_t p1){
+    for(size_t p=p0; p<p1; p++){
+      tileRow(p);
+      if(NTiles-1-p != p){
+        tileRow(NTiles-1-p);
+      };
+    };
+  });
 }
 
 //---------------------------------------------
 // template instantiations
 template class Bootstrapper<double>;
-template class Bootstrapper<cdouble>;
\ No newline at end of file
+template class Bootstrapper<cdouble>;
+template class Bootstrapper<float>;
+template class Bootstrapper< std::complex<float> >;
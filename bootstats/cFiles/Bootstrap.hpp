@@ -4,32 +4,617 @@
 // Includes
 #include <complex>
 #include <vector>
-#include <random>
 #include <algorithm>
 #include <functional>
 #include <numeric>
 #include <iostream>
 #include <memory>
+#include <cstddef>
+#include <cstdint>
+#include <thread>
+#include <cmath>
+#include <type_traits>
 
-/// std::vector 
+/// std::vector
 template <typename T>
 using vec = std::vector<T>;
 
-/// Matrix type as #vec of #vec
+/// Row-major matrix type stored in one contiguous block of memory
+/** The matrix either owns its memory (one allocation of size rows x cols) or
+ *  is a view on an external buffer, e.g., a NumPy array. Consecutive rows are
+ *  #stride() elements apart.
+ *  \note Views do not manage the lifetime of the external buffer.
+ */
 template <typename T>
-using mat = vec<vec<T>>;
+class mat {
+//---------Members--------------
+  /// The number of rows.
+  size_t nRows;
+  /// The number of columns.
+  size_t nCols;
+  /// The distance between two rows in units of T.
+  size_t ld;
+  /// The owned memory (empty for views).
+  vec<T> storage;
+  /// Pointer to the first element.
+  T *ptr;
+
+//---------Public access--------------
+public:
+//---------Member access--------------
+  /// Returns the number of rows.
+  size_t rows()   const {return nRows;};
+  /// Returns the number of columns.
+  size_t cols()   const {return nCols;};
+  /// Returns the distance between two rows.
+  size_t stride() const {return ld;   };
+  /// Returns the pointer to the first element.
+  T       *data()       {return ptr;};
+  /// Returns the pointer to the first element.
+  const T *data() const {return ptr;};
+  /// Returns the pointer to the first element of row `i`.
+  T       *row(const size_t i)       {return ptr + i*ld;};
+  /// Returns the pointer to the first element of row `i`.
+  const T *row(const size_t i) const {return ptr + i*ld;};
+  /// Returns the element in row `i` and column `j`.
+  T       &operator()(const size_t i, const size_t j)       {return ptr[i*ld+j];};
+  /// Returns the element in row `i` and column `j`.
+  const T &operator()(const size_t i, const size_t j) const {return ptr[i*ld+j];};
+  /// Returns true if the matrix owns its memory.
+  bool ownsData() const {return ptr == storage.data();};
+
+//---------Constructors--------------
+  /// Empty matrix.
+  mat() : nRows(0), nCols(0), ld(0), storage(), ptr(nullptr) {};
+  /// Allocates a matrix of size `nRows x nCols` initialized with `val`.
+  mat(const size_t nRows, const size_t nCols, const T &val = T(0)) :
+    nRows(nRows), nCols(nCols), ld(nCols),
+    storage(nRows*nCols, val), ptr(storage.data()) {};
+  /// View on an external buffer of size `nRows x nCols` with row stride `ld`.
+  mat(T *buffer, const size_t nRows, const size_t nCols, const size_t ld) :
+    nRows(nRows), nCols(nCols), ld(ld), storage(), ptr(buffer) {};
+  /// Copy constructor (copies owned memory, views stay views).
+  mat(const mat &other) :
+    nRows(other.nRows), nCols(other.nCols), ld(other.ld),
+    storage(other.storage),
+    ptr(other.ownsData() ? storage.data() : other.ptr) {};
+  /// Move constructor.
+  mat(mat &&other) :
+    nRows(other.nRows), nCols(other.nCols), ld(other.ld),
+    storage(std::move(other.storage)), ptr(other.ptr) {};
+  /// Copy and move assignment operator.
+  mat & operator=(mat other){
+    std::swap(nRows, other.nRows);
+    std::swap(nCols, other.nCols);
+    std::swap(ld, other.ld);
+    std::swap(storage, other.storage);
+    std::swap(ptr, other.ptr);
+    return *this;
+  };
+  /// Destructor.
+  ~mat() = default;
+};
 
 /// std::complex<double>
 typedef std::complex<double> cdouble;
 
+/// The real type of T (T itself or the value type of std::complex<T>).
+template <typename T>
+struct realType {typedef T type;};
+/// The real type of std::complex<T>.
+template <typename T>
+struct realType< std::complex<T> > {typedef T type;};
+
+/// The accumulation type of T.
+/** Single precision types are accumulated in double precision.*/
+template <typename T>
+struct accType {typedef T type;};
+/// float is accumulated in double.
+template <>
+struct accType<float> {typedef double type;};
+/// std::complex<float> is accumulated in std::complex<double>.
+template <>
+struct accType< std::complex<float> > {typedef cdouble type;};
+
+/// Absolute square of a real number.
+inline double absSquare(const double x){return x*x;}
+/// Absolute square of a complex number.
+inline double absSquare(const cdouble &x){return std::norm(x);}
+
+/// Complex conjugate of a real number (the number itself).
+inline double conjugate(const double x){return x;}
+/// Complex conjugate of a complex number.
+inline cdouble conjugate(const cdouble &x){return std::conj(x);}
+
+/// Mixing function of the SplitMix64 generator.
+/** Bijective mapping of 64 bit integers with good avalanche properties.*/
+inline uint64_t mix64(uint64_t z){
+  z = (z ^ (z >> 30)) * 0xbf58476d1ce4e5b9ULL;
+  z = (z ^ (z >> 27)) * 0x94d049bb133111ebULL;
+  return z ^ (z >> 31);
+}
+
+/// Counter based generator of uniformly distributed bootstrap indices.
+/** The index `k` of sample `s` is a pure function of (`seed`, `s`, `k`):
+ *  each sample has its own SplitMix64 stream which is keyed by the seed and
+ *  the sample number. Thus indices can be generated in any order, in
+ *  parallel or on demand, and do not have to be stored.
+ */
+class IndexGenerator {
+  /// Golden ratio increment of the SplitMix64 generator.
+  static const uint64_t golden = 0x9e3779b97f4a7c15ULL;
+  /// Key derived from the seed.
+  const uint64_t seedKey;
+  /// Indices are generated in the range [0, NBins).
+  const uint64_t NBins;
+
+public:
+  /// Generator for indices in [0, `NBins`) for given `seed`.
+  IndexGenerator(const uint64_t seed, const uint64_t NBins) :
+    seedKey(mix64(seed + golden)), NBins(NBins) {};
+  /// Returns the key of the stream of sample `s`.
+  uint64_t getKey(const uint64_t s) const {
+    return mix64(seedKey + (s+1)*golden);
+  };
+  /// Returns the index `k` of the sample with stream `key`.
+  /** Maps the 64 bit random number to [0, #NBins) using the upper half of
+   *  the 128 bit product with #NBins (multiply-shift).
+   */
+  size_t operator()(const uint64_t key, const uint64_t k) const {
+    const uint64_t x(mix64(key + (k+1)*golden));
+    // High 64 bits of x*NBins
+    const uint64_t xLo(x & 0xffffffffULL), xHi(x >> 32);
+    const uint64_t nLo(NBins & 0xffffffffULL), nHi(NBins >> 32);
+    const uint64_t mid(xHi*nLo + ((xLo*nLo) >> 32));
+    return static_cast<size_t>(
+      xHi*nHi + (mid >> 32) + (((mid & 0xffffffffULL) + xLo*nHi) >> 32)
+    );
+  };
+  /// Returns the random number `k` of the sample with stream `key` in (0, 1].
+  double uniform(const uint64_t key, const uint64_t k) const {
+    const uint64_t x(mix64(key + (k+1)*golden));
+    return static_cast<double>((x >> 11) + 1)*(1./9007199254740992.);
+  };
+  /// Writes the `NSize` indices of sample `s` to `out`.
+  /** The index type `I` must be able to hold #NBins-1.*/
+  template <typename I>
+  void getSample(const uint64_t s, const size_t NSize, I *out) const {
+    const uint64_t key(getKey(s));
+    for(size_t nk=0; nk<NSize; nk++){
+      out[nk] = static_cast<I>((*this)(key, nk));
+    };
+  }
+};
+
+/// Types of the stored bootstrap indices
+/** Indices are stored in the smallest unsigned type which holds #NBins-1.*/
+enum IndexType {
+  /// Indices of type uint16_t.
+  index16,
+  /// Indices of type uint32_t.
+  index32,
+  /// Indices of type size_t.
+  index64
+};
+
+/// Returns the #IndexType of the unsigned integer type `I`.
+template <typename I>
+constexpr IndexType indexTypeOf(){
+  return (sizeof(I) == 2) ? index16 : ((sizeof(I) == 4) ? index32 : index64);
+}
+
+/// Returns the smallest #IndexType for indices in [0, `NBins`).
+inline IndexType smallestIndexType(const size_t NBins){
+  if(NBins <= size_t(UINT16_MAX)+1){
+    return index16;
+  }
+  if(NBins <= size_t(UINT32_MAX)+1){
+    return index32;
+  }
+  return index64;
+}
+
+/// Kernels for computing the bootstrap samples
+/** All kernels compute the same samples up to rounding.
+ */
+enum SampleKernel {
+  /// Select the kernel according to #NSize and #NBins.
+  automaticKernel,
+  /// Gathers and averages the #NSize data entries of each sample.
+  gatherKernel,
+  /// Multiplies the data with the (dense) bin multiplicities of each sample.
+  denseKernel
+};
+
+/// Returns the number of threads to use for a requested `nThreads`.
+/** Zero requests all available hardware threads.*/
+inline size_t getNThreads(const size_t nThreads){
+  if(nThreads == 0){
+    return std::max<size_t>(std::thread::hardware_concurrency(), 1);
+  }
+  return nThreads;
+}
+
+/// Executes `func(nt, begin, end)` on contiguous chunks of [0, NItems).
+/** The range is split into at most `nThreads` chunks of equal size which are
+ *  processed by separate `std::thread`s. The calling thread processes the
+ *  first chunk. The chunk number `nt` can be used to select thread local
+ *  scratch memory.
+ * \param NItems the number of items to distribute
+ * \param nThreads the number of threads (zero uses all hardware threads)
+ * \param func callable with signature `void(size_t nt, size_t begin, size_t end)`
+ */
+template <typename F>
+void parallelFor(const size_t NItems, const size_t nThreads, F func){
+  const size_t nChunks(std::min(getNThreads(nThreads), NItems));
+  if(nChunks <= 1){ // Nothing to distribute
+    func(size_t(0), size_t(0), NItems);
+    return;
+  };
+  vec<std::thread> threads;
+  threads.reserve(nChunks-1);
+  for(size_t nt=1; nt<nChunks; nt++){
+    threads.emplace_back(func, nt, nt*NItems/nChunks, (nt+1)*NItems/nChunks);
+  };
+  func(size_t(0), size_t(0), NItems/nChunks);
+  for(std::thread &thread : threads){
+    thread.join();
+  };
+}
+
+/// Generates the bootstrap indices of the samples [`s0`, `s1`) from `seed`.
+/** Writes the row-major indices in [0, `NBins`) of size (`s1`-`s0`) x `NSize`
+ *  to `out`. Each sample is an independent stream of the #IndexGenerator,
+ *  thus the indices do not depend on the number of threads. The type `I` must
+ *  be able to hold `NBins`-1.
+ * \param nThreads the number of threads (zero uses all hardware threads)
+ */
+template <typename I>
+void seedIndices(
+  const uint64_t seed,
+  const size_t NBins,
+  const size_t NSize,
+  const size_t s0,
+  const size_t s1,
+  I *out,
+  const size_t nThreads = 1
+){
+  const IndexGenerator generator(seed, NBins);
+  parallelFor(s1-s0, nThreads, [&](size_t, size_t begin, size_t end){
+    for(size_t ns=begin; ns<end; ns++){ // each sample is an independent stream
+      generator.getSample(s0+ns, NSize, out + ns*NSize);
+    };
+  });
+}
+
+/// Generates the Poisson weights of the online bootstrap.
+/** Writes the row-major weights of the samples [`s0`, `s1`) for the bins
+ *  [`b0`, `b1`) of size (`s1`-`s0`) x (`b1`-`b0`) to `out`. The weight of bin
+ *  `b` in sample `s` is Poisson distributed with mean one and is drawn by
+ *  inversion from the random number `b` of the stream of sample `s`. Thus the
+ *  weights of appended bins do not change the weights of earlier bins.
+ * \param nThreads the number of threads (zero uses all hardware threads)
+ */
+template <typename R>
+void poissonWeights(
+  const uint64_t seed,
+  const size_t s0,
+  const size_t s1,
+  const size_t b0,
+  const size_t b1,
+  R *out,
+  const size_t nThreads = 1
+){
+  const IndexGenerator generator(seed, 1);
+  const double pZero(std::exp(-1.)); // P(0) = 1/e
+  const size_t kMax(32); // P(k >= 32) is below double precision
+  parallelFor(s1-s0, nThreads, [&](size_t, size_t begin, size_t end){
+    for(size_t ns=begin; ns<end; ns++){ // each sample is an independent stream
+      const uint64_t key(generator.getKey(s0+ns));
+      R *outRow(out + ns*(b1-b0));
+      for(size_t nb=b0; nb<b1; nb++){
+        // Invert the cumulative distribution using P(k) = P(k-1)/k
+        const double u(generator.uniform(key, nb));
+        double p(pZero), cdf(pZero);
+        size_t k(0);
+        while(u > cdf && k < kMax){
+          k++;
+          p   /= static_cast<double>(k);
+          cdf += p;
+        };
+        outRow[nb-b0] = static_cast<R>(k);
+      };
+    };
+  });
+}
+
+/// Bins the ensemble data `Indata` of shape `NVars` x `NConfigs`.
+/** Averages `NBinSize` consecutive configurations and writes the
+ *  `NConfigs`/`NBinSize` bins of each variable to the row-major buffer `out`.
+ *  The remainder mod(`NConfigs`, `NBinSize`) is skipped at the beginning of
+ *  each variable. Chunks of configurations which contain whole bins can be
+ *  binned independently by offsetting `Indata` and `out`.
+ *  Each bin is accumulated in the accumulation type of `T` (see #accType) and
+ *  multiplied by the reciprocal bin size. The input type `In` can have a lower
+ *  precision, e.g., float input is binned into double bins. Variables are
+ *  distributed over threads.
+ * \param varStride distance between two variables in `Indata` in units of In
+ * \param configStride distance between two configurations in `Indata`
+ * \param ldOut distance between two variables in `out`
+ * \param nThreads the number of threads (zero uses all hardware threads)
+ */
+template <typename In, typename T>
+void binData(
+  const In *Indata,
+  const size_t NVars,
+  const size_t NConfigs,
+  const std::ptrdiff_t varStride,
+  const std::ptrdiff_t configStride,
+  const size_t NBinSize,
+  T *out,
+  const size_t ldOut,
+  const size_t nThreads = 1
+){
+  typedef typename accType<T>::type A;
+  const size_t NBins(NConfigs/NBinSize);
+  const size_t mod(NConfigs%NBinSize); // Initial offset
+  const A norm(A(1)/static_cast<A>(NBinSize));
+  parallelFor(NVars, nThreads, [&](size_t, size_t begin, size_t end){
+    for(size_t nv=begin; nv<end; nv++){ // Iterate NVars
+      // Output is binned row of size NBins
+      const In *rowData(
+        Indata + static_cast<std::ptrdiff_t>(nv)*varStride
+               + static_cast<std::ptrdiff_t>(mod)*configStride
+      );
+      T *binnedRow(out + nv*ldOut);
+      if(configStride == 1){ // Contiguous reduction of each bin
+        for(size_t nb=0; nb<NBins; nb++){
+          const In *bin(rowData + nb*NBinSize);
+          A sum(0);
+          for(size_t nc=0; nc<NBinSize; nc++){
+            sum += static_cast<A>(bin[nc]);
+          };
+          binnedRow[nb] = static_cast<T>(sum*norm);
+        };
+      } else {
+        for(size_t nb=0; nb<NBins; nb++){
+          const In *bin(
+            rowData + static_cast<std::ptrdiff_t>(nb*NBinSize)*configStride
+          );
+          A sum(0);
+          for(size_t nc=0; nc<NBinSize; nc++){
+            sum += static_cast<A>(
+              bin[static_cast<std::ptrdiff_t>(nc)*configStride]
+            );
+          };
+          binnedRow[nb] = static_cast<T>(sum*norm);
+        };
+      };
+    };
+  });
+}
+
+/// Computes the jackknife (leave-one-out) means of the binned data.
+/** The mean of all bins except bin `s` is computed by subtracting the bin from
+ *  the total sum of the variable
+ *  `out[v-v0][s-s0] = (totals[v] - data[v][s])/(NBins-1)`
+ *  for variables in [`v0`, `v1`) and samples in [`s0`, `s1`). Thus the costs
+ *  are O(1) per sample instead of O(`NBins`). The work is distributed over
+ *  variables (or samples if there are less variables than threads).
+ * \param data the binned data of shape `NVars` x `NBins`
+ * \param ldData distance between two variables in `data`
+ * \param totals the sums over all bins of each variable
+ * \param out row-major buffer of size (`v1`-`v0`) x (`s1`-`s0`)
+ */
+template <typename T>
+void jackknifeSamples(
+  const T *data,
+  const size_t ldData,
+  const size_t NBins,
+  const T *totals,
+  const size_t v0,
+  const size_t v1,
+  const size_t s0,
+  const size_t s1,
+  T *out,
+  const size_t nThreads = 1
+){
+  const size_t NOut(s1-s0);
+  const T norm(T(1)/static_cast<T>(NBins-1));
+  auto leaveOut = [&](size_t vBegin, size_t vEnd, size_t sBegin, size_t sEnd){
+    for(size_t nv=vBegin; nv<vEnd; nv++){
+      const T *row(data + nv*ldData);
+      T *outRow(out + (nv-v0)*NOut - s0);
+      for(size_t ns=sBegin; ns<sEnd; ns++){
+        outRow[ns] = (totals[nv] - row[ns])*norm;
+      };
+    };
+  };
+  if(v1-v0 >= getNThreads(nThreads)){
+    parallelFor(v1-v0, nThreads, [&](size_t, size_t begin, size_t end){
+      leaveOut(v0+begin, v0+end, s0, s1);
+    });
+  } else {
+    parallelFor(NOut, nThreads, [&](size_t, size_t begin, size_t end){
+      leaveOut(v0, v1, s0+begin, s0+end);
+    });
+  };
+}
+
+/// Block resampling schemes for autocorrelated chains
+/** Blocks are contiguous runs of configurations which wrap around the end
+ *  of the chain (circular blocks). The lengths of the blocks of each sample
+ *  add up to the number of configurations.
+ */
+enum BlockScheme {
+  /// Blocks of fixed length (circular moving-block bootstrap).
+  movingBlocks,
+  /// Blocks of geometrically distributed length (stationary bootstrap).
+  stationaryBlocks
+};
+
+/// Draws the blocks of sample `s` of a block bootstrap.
+/** The start of each block is uniformly distributed in [0, `NConfigs`).
+ *  For #stationaryBlocks, the length is geometrically distributed with mean
+ *  `blockLength`. The last block is truncated such that the lengths add up to
+ *  `NConfigs`. The blocks are a pure function of (`seed`, `s`).
+ * \param starts the first configuration of each block (appended)
+ * \param lengths the length of each block (appended)
+ */
+inline void drawBlocks(
+  const uint64_t seed,
+  const size_t NConfigs,
+  const double blockLength,
+  const BlockScheme scheme,
+  const size_t s,
+  vec<size_t> &starts,
+  vec<size_t> &lengths
+){
+  const IndexGenerator gen(seed, NConfigs);
+  const uint64_t key(gen.getKey(s));
+  const size_t fixedLength(
+    std::max<size_t>(static_cast<size_t>(std::round(blockLength)), 1)
+  );
+  // log(1-p) for the stop probability p = 1/blockLength of each step
+  const double logQ(std::log1p(-1./std::max(blockLength, 1.)));
+  size_t total(0);
+  for(uint64_t nk=0; total<NConfigs; nk++){
+    size_t length(fixedLength);
+    if(scheme == stationaryBlocks){
+      const double tail(std::log(gen.uniform(key, 2*nk+1))/logQ);
+      length = 1 + static_cast<size_t>(
+        std::min(tail, static_cast<double>(NConfigs))
+      );
+    };
+    length = std::min(length, NConfigs-total);
+    starts.push_back(gen(key, 2*nk));
+    lengths.push_back(length);
+    total += length;
+  };
+}
+
+/// Computes the means and the centered prefix sums of the ensemble data.
+/** The prefix sums of variable `v` are
+ *  `prefix[v][c] = sum_{c' < c} (Indata[v][c'] - mean[v])`
+ *  for c in [0, `NConfigs`]. Centering avoids the loss of precision of
+ *  differences of large sums.
+ * \param varStride distance between two variables in `Indata` in units of T
+ * \param configStride distance between two configurations in `Indata`
+ * \param mean buffer of size `NVars`
+ * \param prefix row-major buffer of size `NVars` x (`NConfigs`+1)
+ */
+template <typename T>
+void prefixSums(
+  const T *Indata,
+  const size_t NVars,
+  const size_t NConfigs,
+  const std::ptrdiff_t varStride,
+  const std::ptrdiff_t configStride,
+  T *mean,
+  T *prefix,
+  const size_t nThreads = 1
+){
+  parallelFor(NVars, nThreads, [&](size_t, size_t begin, size_t end){
+    for(size_t nv=begin; nv<end; nv++){
+      const T *row(Indata + static_cast<std::ptrdiff_t>(nv)*varStride);
+      T *prefixRow(prefix + nv*(NConfigs+1));
+      T sum(0);
+      for(size_t nc=0; nc<NConfigs; nc++){
+        sum += row[static_cast<std::ptrdiff_t>(nc)*configStride];
+      };
+      mean[nv] = sum/static_cast<T>(NConfigs);
+      prefixRow[0] = T(0);
+      for(size_t nc=0; nc<NConfigs; nc++){
+        prefixRow[nc+1] = prefixRow[nc] +
+          (row[static_cast<std::ptrdiff_t>(nc)*configStride] - mean[nv]);
+      };
+    };
+  });
+}
+
+/// Computes block bootstrap samples from the centered prefix sums.
+/** Each sample is the mean of the concatenated blocks of #drawBlocks().
+ *  The sum of each block costs O(1) as the difference of two prefix sums.
+ *  Computes the samples [`s0`, `s1`) of the variables [`v0`, `v1`).
+ *  The samples do not depend on the number of threads.
+ * \param prefix the prefix sums of #prefixSums() (`NVars` x (`NConfigs`+1))
+ * \param mean the means of #prefixSums()
+ * \param out row-major buffer of size (`v1`-`v0`) x (`s1`-`s0`)
+ */
+template <typename T>
+void blockSamples(
+  const T *prefix,
+  const T *mean,
+  const size_t NConfigs,
+  const double blockLength,
+  const BlockScheme scheme,
+  const uint64_t seed,
+  const size_t v0,
+  const size_t v1,
+  const size_t s0,
+  const size_t s1,
+  T *out,
+  const size_t nThreads = 1
+){
+  const size_t NOut(s1-s0);
+  // Number of samples whose blocks are drawn at once
+  const size_t NGroup(64);
+  auto compute = [&](size_t vBegin, size_t vEnd, size_t sBegin, size_t sEnd){
+    vec<size_t> starts, lengths, offsets;
+    for(size_t g0=sBegin; g0<sEnd; g0+=NGroup){
+      const size_t g1(std::min(g0+NGroup, sEnd));
+      starts.clear();
+      lengths.clear();
+      offsets.assign(1, 0);
+      for(size_t ns=g0; ns<g1; ns++){
+        drawBlocks(seed, NConfigs, blockLength, scheme, ns, starts, lengths);
+        offsets.push_back(starts.size());
+      };
+      for(size_t nv=vBegin; nv<vEnd; nv++){
+        const T *row(prefix + nv*(NConfigs+1));
+        T *outRow(out + (nv-v0)*NOut - s0);
+        for(size_t ns=g0; ns<g1; ns++){
+          T sum(0);
+          for(size_t nb=offsets[ns-g0]; nb<offsets[ns-g0+1]; nb++){
+            const size_t first(starts[nb]), last(starts[nb]+lengths[nb]);
+            if(last <= NConfigs){
+              sum += row[last] - row[first];
+            } else { // wraps around the end of the chain
+              sum += (row[NConfigs] - row[first]) + row[last-NConfigs];
+            };
+          };
+          outRow[ns] = mean[nv] + sum/static_cast<T>(NConfigs);
+        };
+      };
+    };
+  };
+  if(NOut >= getNThreads(nThreads)){
+    parallelFor(NOut, nThreads, [&](size_t, size_t begin, size_t end){
+      compute(v0, v1, s0+begin, s0+end);
+    });
+  } else {
+    parallelFor(v1-v0, nThreads, [&](size_t, size_t begin, size_t end){
+      compute(v0+begin, v0+end, s0, s1);
+    });
+  };
+}
+
 /// Class used for bootstrapping data ensembles of several variables
 /**
+ *  The binned data and the samples are stored in type `T`. Sums, means and
+ *  (co)variances are accumulated in type `A` (double precision for single
+ *  precision `T`).
  *  \note that this class does not provide any type of checks, e.g.,
- *  if all #vec in the input #mat have the same length. Thus you have to know
+ *  if the input buffers have the specified shapes. Thus you have to know
  *  what you are doing.
  */
-template <typename T>
+template <typename T, typename A = typename accType<T>::type>
 class Bootstrapper {
+public:
+  /// The real type of the accumulation type A.
+  typedef typename realType<A>::type R;
+
+private:
 //---------Members--------------
   /// The number of to be generated bootstrap samples.
   const size_t NSamples;
@@ -42,36 +627,176 @@ class Bootstrapper {
   /// The number of variables in the ensemble. Second dimension of the input array.
   const size_t NVars;
   /// The number of bins given by #NConfigs/#NBinSize.
-  /** In case mod(#NConfigs, #NBinSize) != 0, the remainder is skipped at the 
+  /** In case mod(#NConfigs, #NBinSize) != 0, the remainder is skipped at the
    *  beginning of the input data array.
    */
   const size_t NBins;
+  /// The number of groups of variables with independent indices.
+  /** The variables are split into #NGroups consecutive groups of equal size.
+   *  Group `g` uses the indices of the samples [`g`*#NSamples,
+   *  (`g`+1)*#NSamples) of the index stream. Thus one instance can bootstrap
+   *  a batch of ensembles with independent indices. One group shares the
+   *  indices among all variables.
+   */
+  const size_t NGroups;
   /// The binned data of size #NVars x #NBins.
   /** Note that this is not the input data.*/
   const mat<T> data;
-  /// Random number generator pointer.
+  /// The seed of the random bootstrap indices.
   /** Random numbers of type size_t are generated in the range from 0 to
-    * #NBins -1.
-    * Uses the `mt19937` engine and a uniform distribution.
+    * #NBins -1 by the counter based #IndexGenerator.
+    * Zero if the class was constructed from indices.
     */
-  std::shared_ptr< std::function<size_t()> > dist;
-  /// The bootstrap indicies of size #NSamples x #NSize.
-  const mat<size_t> indices;
+  const uint64_t seed;
+  /// Whether the indices are stored or generated on the fly from the #seed.
+  const bool storeIndices;
+  /// The type of the bootstrap indices.
+  const IndexType indexType;
+  /// The bootstrap indicies of size (#NGroups*#NSamples) x #NSize if #indexType is #index16.
+  /** Empty for other types or if the indices are generated on the fly
+   *  (see #storeIndices). Same for #indices32 and #indices64.
+   */
+  const mat<uint16_t> indices16;
+  /// The bootstrap indicies of size (#NGroups*#NSamples) x #NSize if #indexType is #index32.
+  const mat<uint32_t> indices32;
+  /// The bootstrap indicies of size (#NGroups*#NSamples) x #NSize if #indexType is #index64.
+  const mat<size_t>   indices64;
 
 //---------Private member functions--------------
-  /// Compute the mean of a vector.
-  /** Averages over all entries of the vector and divides by the length.
-   * \param vals Input #vec
+  /// Compute the mean of a contiguous array.
+  /** Averages over all entries of the array and divides by the length.
+   * \param vals Pointer to the first entry
+   * \param size The number of entries
    */
-  const T    getMean(const vec<T> &vals) const;
+  template <typename V>
+  const A getMean(const V *vals, const size_t size) const;
   /// Compute the mean of a matrix.
-  /** Iterates the zeroth dimension of the matrix and calls 
-   * #getMean() for the contains vectors. In other words,
-   * keeps the zeroth dimension and averages the first.
+  /** Iterates the rows of the matrix and calls #getMean() for each row.
+   * In other words, keeps the zeroth dimension and averages the first.
    * \param vals Input #mat
    */
-  const vec<T> getMean(const mat<T> &vals) const;
-
+  const vec<A> getMean(const mat<T> &vals) const;
+  /// Returns the binned data of the constructors.
+  /** Bins `Indata` with #binData() into `binnedBuffer` (or into owned memory
+   *  if nullptr). If `Indata` is nullptr, `binnedBuffer` is already binned.
+   */
+  mat<T> initData(
+    const T *Indata,
+    const std::ptrdiff_t varStride,
+    const std::ptrdiff_t configStride,
+    T *binnedBuffer,
+    const size_t nThreads
+  ) const;
+  /// Returns the stored indices of type `uint16_t`.
+  const mat<uint16_t> &getIndexMat(uint16_t) const {return indices16;};
+  /// Returns the stored indices of type `uint32_t`.
+  const mat<uint32_t> &getIndexMat(uint32_t) const {return indices32;};
+  /// Returns the stored indices of type `size_t`.
+  const mat<size_t>   &getIndexMat(size_t)   const {return indices64;};
+  /// Initializes the stored indices of type `I` in the seed constructor.
+  /** Returns an empty #mat if `I` does not match #indexType or if the indices
+   *  are not stored.
+   */
+  template <typename I>
+  mat<I> initIndices(void *buffer, const size_t nThreads) const;
+  /// Returns the view on the input indices of type `I` (indices constructor).
+  /** Returns an empty #mat if `I` does not match #indexType.*/
+  template <typename I>
+  mat<I> viewIndices(const void *buffer) const;
+  /// Returns the row-major indices of type `I` of the samples [`s0`, `s1`).
+  /** Returns a pointer into the stored indices if they are stored.
+   * Otherwise, the indices are generated from the #seed into `buffer` of size
+   * (`s1`-`s0`) x #NSize, which is returned.
+   */
+  template <typename I>
+  const I *getIndexBlock(const size_t s0, const size_t s1, I *buffer) const;
+  /// Compute a block of the bootstrap samples.
+  /** Computes the samples for the variables [`v0`, `v1`) and samples
+   * [`s0`, `s1`) and writes them to `out`. The block does not use any shared
+   * scratch memory, thus different blocks can be computed concurrently.
+   * \param out Pointer to the entry (`v0`, `s0`) of the output buffer
+   * \param ldOut Distance between two variables in `out`
+   * \param kernel The (non automatic) kernel used for the computation
+   */
+  void getSampleBlock(
+    T *out,
+    const size_t ldOut,
+    const size_t v0,
+    const size_t v1,
+    const size_t s0,
+    const size_t s1,
+    const SampleKernel kernel
+  ) const;
+  /// Compute a block of the bootstrap samples with indices of type `I`.
+  /** The variables [`v0`, `v1`) must belong to one group, which uses the
+   * index rows shifted by `sOffset` (see #NGroups).
+   */
+  template <typename I>
+  void getKernelBlock(
+    T *out,
+    const size_t ldOut,
+    const size_t v0,
+    const size_t v1,
+    const size_t s0,
+    const size_t s1,
+    const size_t sOffset,
+    const SampleKernel kernel
+  ) const;
+  /// Accumulates the moments of the samples block by block.
+  /** For each block of the `NS` samples, `getBlock(block, s0, s1)` must
+   * write the samples [`s0`, `s1`) of all variables to the row-major buffer
+   * `block` of size #NVars x (`s1`-`s0`). Each block is centered by its own mean and
+   * merged with the moments of the previous blocks (pairwise update of
+   * Chan et al.), thus there are no cancellations. The lower triangle of
+   * the covariance is accumulated with #addCovBlock().
+   * Output buffers which are nullptr are not computed.
+   * \param mean Output buffer of size #NVars for the mean
+   * \param var Output buffer of size #NVars for the variance
+   * \param cov Output buffer of size #NVars x #NVars (both triangles are set)
+   */
+  template <typename F>
+  void accumulateMoments(
+    const size_t NS, A *mean, R *var, A *cov, const size_t nThreads, F getBlock
+  ) const;
+  /// Returns the block of samples `buffer` in the accumulation type.
+  /** If T is the accumulation type, the block itself is returned.*/
+  A *getAccBlock(vec<A> &buffer, vec<A> &) const {return buffer.data();};
+  /// Converts the block of samples `buffer` into `accBuffer` and returns it.
+  template <typename V>
+  A *getAccBlock(const vec<V> &buffer, vec<A> &accBuffer) const {
+    std::transform(buffer.begin(), buffer.end(), accBuffer.begin(),
+      [](const V &x){return static_cast<A>(x);}
+    );
+    return accBuffer.data();
+  }
+  /// Adds the lower triangle of `centered` x `centered`^H to `out`.
+  /** Rank-k update for a block of centered samples of size #NVars x k. The
+   * triangle is computed in register tiles of 4 x 4 variables; rows of tiles
+   * are distributed over threads in pairs (t, NTiles-1-t) of equal work.
+   */
+  void addCovBlock(const mat<A> &centered, A *out, const size_t nThreads) const;
+  /// Block kernel which gathers the data of each sample (see #gatherKernel).
+  /** Samples are processed in blocks of about 2^15 indices which are shared
+   * by all variables of the block.
+   */
+  template <typename I>
+  void gatherSamples(
+    T *out, const size_t ldOut,
+    const size_t v0, const size_t v1, const size_t s0, const size_t s1,
+    const size_t sOffset
+  ) const;
+  /// Block kernel which multiplies the data with the bin multiplicities.
+  /** For blocks of samples, the multiplicity of each bin in each sample is
+   * counted once. The samples of the block are the product of the #data with
+   * these counts, which is computed in register tiles of 4 variables x 4
+   * samples streaming contiguously through the bins (see #denseKernel).
+   */
+  template <typename I>
+  void denseSamples(
+    T *out, const size_t ldOut,
+    const size_t v0, const size_t v1, const size_t s0, const size_t s1,
+    const size_t sOffset
+  ) const;
 
 //---------Public access--------------
 public:
@@ -88,45 +813,178 @@ public:
   size_t getNVars()    const {return NVars;   };
   /// Returns #NBins.
   size_t getNBins()    const {return NBins;   };
+  /// Returns #NGroups.
+  size_t getNGroups()  const {return NGroups; };
+  /// Returns #seed.
+  uint64_t getSeed()   const {return seed;    };
   /// Returns #data.
   /** \note This array is the binned data --- and not the input data. */
   const mat<T>      &getData()    const {return data;   };
-  /// Returns #indices.
-  const mat<size_t> &getIndices() const {return indices;};
+  /// Returns #storeIndices.
+  bool getStoreIndices() const {return storeIndices;};
+  /// Returns #indexType.
+  IndexType getIndexType() const {return indexType;};
+  /// Copies #data to the row-major buffer `out` of size #NVars x #NBins.
+  void getData(T *out) const;
+  /// Copies the indices to the row-major buffer `out` of size (#NGroups*#NSamples) x #NSize.
+  /** Generates the indices if they are not stored.*/
+  void getIndices(size_t *out) const;
+  /// Generates the indices of the samples [`s0`, `s1`) from the #seed.
+  /** Writes the row-major indices of size (`s1`-`s0`) x #NSize to `out`.
+   *  This reproduces the stored indices if the class was constructed from a
+   *  seed. The type `I` must be able to hold #NBins-1.
+   * \param nThreads the number of threads (zero uses all hardware threads)
+   */
+  template <typename I>
+  void generateIndices(
+    I *out,
+    const size_t s0,
+    const size_t s1,
+    const size_t nThreads = 1
+  ) const {
+    seedIndices(seed, NBins, NSize, s0, s1, out, nThreads);
+  }
+  /// Generates the indices of type #indexType into the buffer `out`.
+  /** Same as the typed #generateIndices() for a buffer of type #indexType.*/
+  void generateIndices(
+    void *out,
+    const size_t s0,
+    const size_t s1,
+    const size_t nThreads = 1
+  ) const;
 
 //---------Public member functions--------------
   /// Returns the mean of the #data.
-  /** \note This mean is also equal to the mean of the input data modulo the 
+  /** \note This mean is also equal to the mean of the input data modulo the
    *  binning cutoff.
    */
-  const vec<T> getMean() const {return getMean(data);};
+  const vec<A> getMean() const {return getMean(data);};
+  /// Writes the mean of the #data to the buffer `out` of size #NVars.
+  void getMean(A *out) const;
+  /// Returns the kernel used by #getSamples() for the input `kernel`.
+  /** Resolves #automaticKernel: if #NBins is at most twice #NSize, most
+   *  bins are drawn in each sample and the #denseKernel is used. Otherwise
+   *  the #gatherKernel reads less data. Other kernels are returned as they are.
+   */
+  SampleKernel getSampleKernel(const SampleKernel kernel = automaticKernel) const;
   /// Compute the bootstrap samples of size #NVars x #NSamples.
-  /** This routines uses #indices to reshape #data.
+  /** This routines uses the indices to reshape #data.
    *  The averaged out dimension is #NSize.
    *  \note
    *  This is the most expensive computation. The output array is not stored
    *  within this class. Make sure, if you want to use it, to store it elsewhere.
+   *  \param nThreads the number of threads used for the computation. The work
+   *  is distributed over variables (or over samples if there are less
+   *  variables than threads). Zero uses all hardware threads.
+   *  \param kernel the kernel used for the computation (see #SampleKernel).
+   */
+  const mat<T> getSamples(
+    const size_t nThreads = 1,
+    const SampleKernel kernel = automaticKernel
+  ) const;
+  /// Compute the bootstrap samples into the buffer `out`.
+  /** Same as #getSamples() but writes the result to the row-major buffer
+   *  `out` of size #NVars x #NSamples instead of allocating a new #mat.
    */
-  const mat<T> getSamples() const;
+  void getSamples(
+    T *out,
+    const size_t nThreads = 1,
+    const SampleKernel kernel = automaticKernel
+  ) const;
+  /// Compute a block of the bootstrap samples into the buffer `out`.
+  /** Computes the samples of the variables [`v0`, `v1`) and samples
+   *  [`s0`, `s1`) and writes them to the row-major buffer `out` of size
+   *  (`v1`-`v0`) x (`s1`-`s0`). The entries are equal to the corresponding
+   *  entries of #getSamples(). This allows to process the samples block by
+   *  block if they do not fit into memory.
+   *  \param nThreads the number of threads used for the computation.
+   *  \param kernel the kernel used for the computation (see #SampleKernel).
+   */
+  void getSamples(
+    T *out,
+    const size_t v0,
+    const size_t v1,
+    const size_t s0,
+    const size_t s1,
+    const size_t nThreads = 1,
+    const SampleKernel kernel = automaticKernel
+  ) const;
   /// Computes the covariance matrix form the bootstrap samples.
-  /** \note 
-   * This function also calls #getSamples() in case you do not specify the
-   * covariance matrix. Thus, in case you are interested in the samples as well,
-   * better call #getSamples() and feed it to this method.
+  /** The entries are cov[r, c] = sum_s (x_r[s] - mu_r) conj(x_c[s] - mu_c)
+   *  / (#NSamples - 1). The samples are computed block by block and are
+   *  never stored (see #getCov(T*, size_t, SampleKernel)).
    */
-  const mat<T> getCov() const;
+  const mat<A> getCov(const size_t nThreads = 1) const;
   /// Computes the covariance matrix for given bootstrap samples.
   /** \param samples Bootstrap samples computed by #getSamples().*/
-  const mat<T> getCov(const mat<T> & samples) const;
+  const mat<A> getCov(const mat<T> & samples, const size_t nThreads = 1) const;
+  /// Computes the covariance matrix into the buffer `out` of size #NVars x #NVars.
+  /** The samples are computed in blocks of 256 samples which are fused with
+   *  the rank-k update of the covariance (see #getMoments()). Thus the
+   *  samples are never stored.
+   *  Only the lower triangle is computed, the upper triangle is its
+   *  (complex) conjugate.
+   *  \param nThreads the number of threads used for the computation.
+   *  \param kernel the kernel used for computing the samples.
+   */
+  void getCov(
+    A *out,
+    const size_t nThreads = 1,
+    const SampleKernel kernel = automaticKernel
+  ) const;
+  /// Computes the covariance matrix for the row-major `samples` buffer.
+  /** \param samples Bootstrap samples of size #NVars x #NSamples
+   *  \param out Output buffer of size #NVars x #NVars
+   *  \param nThreads the number of threads used for the computation.
+   */
+  void getCov(const T *samples, A *out, const size_t nThreads = 1) const;
+  /// Computes the moments of the bootstrap distribution.
+  /** Computes the mean, the variance (the squared standard error) and
+   *  optionally the covariance of the bootstrap samples in one pass. The
+   *  samples are computed in blocks of 256 samples which are directly reduced
+   *  and never stored. This requires O(#NVars) memory (O(#NVars^2) for the
+   *  covariance). Buffers which are nullptr are not computed.
+   *  \param mean Output buffer of size #NVars
+   *  \param var Output buffer of size #NVars
+   *  \param cov Output buffer of size #NVars x #NVars
+   *  \param nThreads the number of threads used for the computation.
+   *  \param kernel the kernel used for computing the samples.
+   */
+  void getMoments(
+    A *mean,
+    R *var,
+    A *cov = nullptr,
+    const size_t nThreads = 1,
+    const SampleKernel kernel = automaticKernel
+  ) const;
+  /// Computes the moments for the row-major `samples` buffer.
+  /** Same as #getMoments() for samples of size #NVars x `NS`, e.g., a block
+   *  of the samples.
+   */
+  void getMoments(
+    const T *samples,
+    const size_t NS,
+    A *mean,
+    R *var,
+    A *cov = nullptr,
+    const size_t nThreads = 1
+  ) const;
 
 //---------Constructors--------------
   /// Empty constructor (not available).
   Bootstrapper() = delete;
   /// Destructor.
   ~Bootstrapper() = default;
-  /// List constructor (default constructor)
+  /// Buffer constructor (default constructor)
   /** Constructs the class from data input and bootstrap parameters
-   * \param Indata mat containing the ensemble dara of shape #NVars x #NConfigs
+   * \param Indata pointer to the ensemble data of shape #NVars x #NConfigs.
+   *        If nullptr, `binnedBuffer` must already contain the binned data
+   *        (e.g. binned chunk by chunk with #binData()).
+   * \param NVars the number of variables (rows) of `Indata`
+   * \param NConfigs the number of configurations (columns) of `Indata`
+   * \param varStride distance between two variables in `Indata` in units of T
+   * \param configStride distance between two configurations in `Indata` in
+   *        units of T
    * \param NSamples the number of bootstrap samples after binning and
    *        averaging, e.g., the resulting array after bootstrapping is of size
    *        #NVars x #NSamples
@@ -136,38 +994,92 @@ public:
    *        Before bootstrapping, the data will be reshaped to size
    *        #Nvars x #NBins, where #NBins = #NConfigs / #NBinSize.
    *        The remainder is dropped at the beginning of the array.
-   * 
+   * \param seed the seed of the random indices. Equal seeds (and #NBins)
+   *        generate equal indices.
+   * \param binnedBuffer optional row-major buffer of size #NVars x #NBins.
+   *        If specified, the binned #data is stored in this buffer.
+   * \param indicesBuffer optional row-major buffer of size
+   *        #NSamples x #NSize and type #smallestIndexType(#NBins). If specified,
+   *        the indices are stored in this buffer.
+   * \param nThreads the number of threads used for generating the indices.
+   * \param storeIndices if false, the indices are never stored but generated
+   *        on the fly for each block of samples in #getSamples(). This reduces
+   *        the memory from #NSamples x #NSize to the size of one block.
+   *        `indicesBuffer` is ignored in this case.
+   * \param NGroups the number of groups of variables with independent
+   *        indices (see #NGroups). #NVars must be a multiple of `NGroups`.
+   *        `indicesBuffer` must be of size (`NGroups`*#NSamples) x #NSize.
+   *
    * \note
    * This initialisation provides no checks, e.g., shape of #Input data,
    * size of bins or what so ever. Make sure you input makes sense.
+   * Specified buffers must outlive the class instance.
    */
   Bootstrapper(
-    const mat<T> &Indata,
+    const T *Indata,
+    const size_t NVars,
+    const size_t NConfigs,
+    const std::ptrdiff_t varStride,
+    const std::ptrdiff_t configStride,
     const size_t NSamples,
     const size_t NSize,
-    const size_t NBinSize
+    const size_t NBinSize,
+    const uint64_t seed,
+    T *binnedBuffer = nullptr,
+    void *indicesBuffer = nullptr,
+    const size_t nThreads = 1,
+    const bool storeIndices = true,
+    const size_t NGroups = 1
   );
-  /// List constructor (from bootstrap indices)
+  /// Buffer constructor (from bootstrap indices)
   /** Constructs the class from data input bin size and indices
-   * \param Indata mat containing the ensemble dara of shape #NVars x #NConfigs
-   * \param inIndices a set of bootstrap indices for given data of size
-            #NSamples x #NSize. #NSamples is the number of bootstrap 
+   * \param Indata pointer to the ensemble data of shape #NVars x #NConfigs.
+   *        If nullptr, `binnedBuffer` must already contain the binned data
+   *        (e.g. binned chunk by chunk with #binData()).
+   * \param NVars the number of variables (rows) of `Indata`
+   * \param NConfigs the number of configurations (columns) of `Indata`
+   * \param varStride distance between two variables in `Indata` in units of T
+   * \param configStride distance between two configurations in `Indata` in
+   *        units of T
+   * \param inIndices row-major buffer of bootstrap indices for given data of
+            size #NSamples x #NSize. #NSamples is the number of bootstrap
             samples after binning and averaging. #NSize is the size of
             individual bootstrap samples. This array is used to compute the
             bootstrap samples of size #NVars x #NSamples.
+   * \param indexType the type of `inIndices`
+   * \param NSamples the number of rows of `inIndices`
+   * \param NSize the number of columns of `inIndices`
    * \param NBinSize size of the bins will be grouped before storing.
    *        Before bootstrapping, the data will be reshaped to size
    *        #Nvars x #NBins, where #NBins = #NConfigs / #NBinSize.
    *        The remainder is dropped at the beginning of the array.
-   * 
+   * \param binnedBuffer optional row-major buffer of size #NVars x #NBins.
+   *        If specified, the binned #data is stored in this buffer.
+   * \param nThreads the number of threads used for binning
+   * \param NGroups the number of groups of variables with independent
+   *        indices (see #NGroups). `inIndices` contains the indices of all
+   *        groups and is of size (`NGroups`*#NSamples) x #NSize.
+   *
    * \note
    * This initialisation provides no checks, e.g., shape of #Input data,
    * size of bins or what so ever. Make sure you input makes sense.
+   * The indices are not copied: `inIndices` and `binnedBuffer` must outlive
+   * the class instance.
    */
   Bootstrapper(
-    const mat<T> &Indata,
-    const mat<size_t> &inIndices,
-    const size_t NBinSize
+    const T *Indata,
+    const size_t NVars,
+    const size_t NConfigs,
+    const std::ptrdiff_t varStride,
+    const std::ptrdiff_t configStride,
+    const void *inIndices,
+    const IndexType indexType,
+    const size_t NSamples,
+    const size_t NSize,
+    const size_t NBinSize,
+    T *binnedBuffer = nullptr,
+    const size_t nThreads = 1,
+    const size_t NGroups = 1
   );
   /// Copy constructor.
   Bootstrapper(const Bootstrapper &boot) = default;
@@ -177,4 +1089,4 @@ public:
   Bootstrapper(Bootstrapper &&boot) = default;
 };
 
-#endif /* BOOT_HPP */
\ No newline at end of file
+#endif /* BOOT_HPP */
@@ -8,11 +8,13 @@ int main() {
   const size_t NSize(NConfigs/NBinSize);
   const size_t NTimes(50);
 
-  // Initialize data
-  const mat<double> dData(NConfigs, vec<double>(NVars, 1));
+  // Initialize row-major data of shape NVars x NConfigs
+  const vec<double> dData(NVars*NConfigs, 1);
 
   // Create Bootstrapper instance
-  Bootstrapper<double> dBs(dData, NSamples, NSize, NBinSize);
+  Bootstrapper<double> dBs(
+    dData.data(), NVars, NConfigs, NConfigs, 1, NSamples, NSize, NBinSize, 42
+  );
 
   // Create vector for time measurements
   vec<double> timings(NTimes, 0);
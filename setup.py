@@ -8,13 +8,32 @@ import os
 # Requirements
 installRequires = ["numpy", "cython", "h5py"]
 
+#-------Generating the typed wrappers---------
+def renderTemplate(fileName):
+  """
+  Renders the Tempita template 'fileName.in' to 'fileName'. The file is only
+  written if the content changed (Cython rebuilds on changed includes).
+  """
+  from Cython import Tempita
+  with open(fileName + ".in") as f:
+    content = Tempita.sub(f.read())
+  if os.path.isfile(fileName):
+    with open(fileName) as f:
+      if f.read() == content:
+        return
+  with open(fileName, "w") as f:
+    f.write(content)
+
+renderTemplate(os.path.join("bootstats", "Bootstrapper.pxi"))
+
 #-------Building the C++ extension---------
 sources          = [
   os.path.join("bootstats", "PyBootstrap.pyx"), 
   os.path.join("bootstats", "cFiles", "Bootstrap.cpp"),
 ]
 language         = "c++"
-extraCompileArgs = ["-std=c++14", "-pedantic", "-Wno-c++1z-extensions"]
+extraCompileArgs = ["-std=c++14", "-pedantic", "-Wno-c++1z-extensions", "-pthread"]
+extraLinkArgs    = ["-pthread"]
 
 ext_modules=[
   Extension(
@@ -22,6 +41,7 @@ ext_modules=[
     sources            = sources,
     language           = language,
     extra_compile_args = extraCompileArgs,
+    extra_link_args    = extraLinkArgs,
   ),
 ]
 
@@ -59,6 +59,20 @@ class AbstractBootstrapper(object):
     self.assertEqual(boot.NSize,    self.boot.NSize   )
     self.assertEqual(boot.NBins,    self.boot.NBins   )
 
+    # Parameters out of range are rejected with and without NSize
+    for NSamples, NSize, NBinSize in [
+      (self.NSamples, self.NSize, self.NConfigs + 1),
+      (self.NSamples, self.NSize, 0),
+      (self.NSamples, None, 0),
+      (0, self.NSize, self.NBinSize),
+      (0, None, self.NBinSize),
+      (self.NSamples, 0, self.NBinSize),
+    ]:
+      with self.assertRaises(ValueError):
+        type(self.boot)(
+          self.data, NSamples=NSamples, NSize=NSize, NBinSize=NBinSize
+        )
+
 
   #-------------------------------
   def test2_ConstructorIndices(self):
@@ -106,6 +120,14 @@ class AbstractBootstrapper(object):
       msg="Parameter constructor indices different from indicies constructor data."
     )
 
+    # Indices out of [0, NBins) and non-integer indices are rejected
+    for indices in [
+      np.full([3, 4], 10**6), -np.ones([3, 4], dtype=int),
+      np.full([3, 4], self.NBins), np.zeros([3, 4]),
+    ]:
+      with self.assertRaises(ValueError):
+        type(self.boot)(self.data, NBinSize=self.NBinSize, indices=indices)
+
   #-------------------------------
   def test3_Binning(self):
     """
@@ -177,5 +199,386 @@ class AbstractBootstrapper(object):
     samplesDiff = np.average(np.abs( numpySamples - cppSamples ))
     self.assertLess(samplesDiff, NUMPREC)
 
+  #-------------------------------
+  def test9_ThreadedSampling(self):
+    """
+    Test wether the multithreaded sampling reproduces the serial sampling.
+    """
+    cppSamples = self.boot._getSamples()
+    for nThreads in [2, 3, self.NVars+1, 0]:
+      boot = type(self.boot)(
+        self.data,
+        NBinSize=self.NBinSize,
+        indices=self.boot.indices,
+        nThreads=nThreads,
+      )
+      threadSamples = boot._getSamples()
+      self.assertTrue(
+        (cppSamples == threadSamples).all(),
+        msg="Threaded samples (nThreads={}) differ from serial samples".format(
+          nThreads
+        )
+      )
+
+  #-------------------------------
+  def test10_SampleKernels(self):
+    """
+    Test wether all sample kernels compute the same samples.
+    """
+    gatherSamples = self.boot.boot._getSamples(1, "gather")
+    for kernel in ["auto", "dense"]:
+      kernelSamples = self.boot.boot._getSamples(1, kernel)
+      samplesDiff = np.average(np.abs( gatherSamples - kernelSamples ))
+      self.assertLess(
+        samplesDiff,
+        NUMPREC,
+        msg="Samples of kernel '{}' differ from gathered samples".format(kernel)
+      )
+
+  #-------------------------------
+  def test11_Seed(self):
+    """
+    Test wether the seed reproduces the indices independent of the number of
+    threads and wether indices can be regenerated for sub ranges of samples.
+    """
+    pars = {
+      "NSamples": self.NSamples,
+      "NSize":    self.NSize,
+      "NBinSize": self.NBinSize,
+    }
+    boot = type(self.boot)(self.data, seed=self.boot.seed, nThreads=3, **pars)
+    self.assertEqual(boot.seed, self.boot.seed)
+    self.assertTrue(
+      (boot.indices == self.boot.indices).all(),
+      msg="Same seed did not reproduce indices"
+    )
+    boot = type(self.boot)(self.data, seed=self.boot.seed+1, **pars)
+    self.assertFalse(
+      (boot.indices == self.boot.indices).all(),
+      msg="Different seeds produced the same indices"
+    )
+    # Regenerate a sub range of samples
+    s0, s1 = 3, self.NSamples//2
+    indices = self.boot.boot.generateIndices(s0, s1, nThreads=2)
+    self.assertTrue(
+      (indices == self.boot.indices[s0:s1]).all(),
+      msg="Regenerated indices differ from stored indices"
+    )
+
+  #-------------------------------
+  def test12_OnTheFlyIndices(self):
+    """
+    Test wether samples with indices generated on the fly reproduce the samples
+    with stored indices.
+    """
+    boot = type(self.boot)(
+      self.data,
+      NSamples=self.NSamples,
+      NSize=self.NSize,
+      NBinSize=self.NBinSize,
+      seed=self.boot.seed,
+      storeIndices=False,
+    )
+    self.assertTrue(
+      (boot.indices == self.boot.indices).all(),
+      msg="Generated indices differ from stored indices"
+    )
+    for kernel in ["gather", "dense"]:
+      for nThreads in [1, 3]:
+        self.assertTrue(
+          (
+            boot.boot._getSamples(nThreads, kernel) ==
+            self.boot.boot._getSamples(nThreads, kernel)
+          ).all(),
+          msg="Samples of kernel '{}' differ for generated indices".format(
+            kernel
+          )
+        )
+
+  #-------------------------------
+  def test13_IndexDtype(self):
+    """
+    Test wether indices are stored in the smallest unsigned type which holds
+    NBins-1 and wether samples are correct for each type.
+    """
+    self.assertEqual(self.boot.indices.dtype, np.uint16)
+    # Construction from int64 indices
+    boot = type(self.boot)(
+      self.data,
+      NBinSize=self.NBinSize,
+      indices=self.boot.indices.astype(np.int64),
+    )
+    self.assertEqual(boot.indices.dtype, np.uint16)
+    self.assertTrue((boot._getSamples() == self.boot._getSamples()).all())
+    # More than 2^16 bins require uint32 indices
+    data = self.data.reshape(-1)[:2**16+10].reshape([1, -1])
+    for kernel in ["gather", "dense"]:
+      boot = type(self.boot)(data, NSamples=5, NSize=100, NBinSize=1)
+      self.assertEqual(boot.indices.dtype, np.uint32)
+      numpySamples = np.average(boot.data[:,boot.indices], axis=2)
+      samplesDiff = np.average(np.abs(
+        numpySamples - boot.boot._getSamples(1, kernel)
+      ))
+      self.assertLess(samplesDiff, NUMPREC)
+
+  #-------------------------------
+  def test14_IterSamples(self):
+    """
+    Test wether the sample blocks reproduce the full samples.
+    """
+    cppSamples = self.boot._getSamples()
+    for blockVars, blockSamples in [(None, None), (7, 33), (1, 1000)]:
+      nBlocks = 0
+      samples = np.zeros_like(cppSamples)
+      for varSlice, sampleSlice, block in self.boot.iterSamples(
+        blockVars=blockVars, blockSamples=blockSamples
+      ):
+        samples[varSlice, sampleSlice] = block
+        nBlocks += 1
+      self.assertTrue(
+        (samples == cppSamples).all(),
+        msg="Blocks of size {} differ from samples".format(
+          (blockVars, blockSamples)
+        )
+      )
+      self.assertEqual(
+        nBlocks,
+        -(-self.NVars // (blockVars or self.NVars)) *
+        -(-self.NSamples // (blockSamples or self.NSamples))
+      )
+
+  #-------------------------------
+  def test17_Covariance(self):
+    """
+    Test wether the (fused) covariance and correlation reproduce numpy.
+    """
+    samples = self.boot._getSamples()
+    numpyCov = np.cov(samples)
+    numpyCorr = np.corrcoef(samples)
+    scale = np.max(np.abs(numpyCov))
+    covFused = self.boot.boot.getCov()
+    covSamples = self.boot.boot.getCov(samples)
+    for cov in [covFused, covSamples]:
+      self.assertLess(np.max(np.abs(cov - numpyCov))/scale, NUMPREC)
+    # Result does not depend on the number of threads
+    for nThreads in [3, 0]:
+      self.assertTrue(
+        (self.boot.boot.getCov(nThreads=nThreads) == covFused).all()
+      )
+      self.assertTrue(
+        (self.boot.boot.getCov(samples, nThreads=nThreads) == covSamples).all()
+      )
+    # Block of samples and samples of wrong shape
+    block = samples[:, 10:110]
+    self.assertLess(
+      np.max(np.abs(self.boot.boot.getCov(block) - np.cov(block)))/scale,
+      NUMPREC
+    )
+    for shape in [[2, 3], [self.NVars, 1], [self.NVars+1, self.NSamples]]:
+      with self.assertRaises(ValueError):
+        self.boot.boot.getCov(np.zeros(shape, dtype=samples.dtype))
+    # Wrapper methods
+    corr = self.boot.getCorr().reshape(numpyCorr.shape)
+    self.assertLess(np.max(np.abs(corr - numpyCorr)), NUMPREC)
+
+  #-------------------------------
+  def test18_Moments(self):
+    """
+    Test wether the streamed moments reproduce numpy.
+    """
+    samples = self.boot._getSamples()
+    numpyMean = np.mean(samples, axis=1)
+    numpyVar = np.var(samples, axis=1, ddof=1)
+    numpyCov = np.cov(samples)
+    for moments in [
+      self.boot.boot.getMoments(cov=True),
+      self.boot.boot.getMoments(samples, cov=True, nThreads=3),
+    ]:
+      mean, var, cov = moments
+      self.assertLess(np.max(np.abs(mean - numpyMean)), NUMPREC)
+      self.assertLess(np.max(np.abs(var - numpyVar)/numpyVar), NUMPREC)
+      self.assertLess(
+        np.max(np.abs(cov - numpyCov))/np.max(np.abs(numpyCov)), NUMPREC
+      )
+    # Wrapper method
+    mean, var = self.boot.moments()
+    self.assertEqual(var.dtype, np.float64)
+    self.assertLess(
+      np.max(np.abs(mean.reshape(numpyMean.shape) - numpyMean)), NUMPREC
+    )
+
+  #-------------------------------
+  def test19_DerivedSamples(self):
+    """
+    Test wether estimators applied block by block reproduce the estimators
+    applied to the full samples.
+    """
+    samples = self.boot.samples
+    estimators = {
+      "ratio": lambda x: x[0] / x[1],
+      "logRatio": lambda x: np.log(np.abs(x[:-1] / x[1:])),
+    }
+    derived = self.boot.getDerivedSamples(estimators, blockSamples=33)
+    for key, estimator in estimators.items():
+      self.assertTrue(
+        (derived[key] == estimator(samples)).all(),
+        msg="Derived samples of estimator '{}' differ".format(key)
+      )
+    ratio = self.boot.getDerivedSamples(estimators["ratio"])
+    self.assertTrue((ratio == derived["ratio"]).all())
+
+  #-------------------------------
+  def test20_Distributed(self):
+    """
+    Test wether samples and moments distributed over workers are bit for bit
+    equal to the samples and moments computed in one process.
+    """
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    samples = self.boot.samples
+    mean, var = self.boot.moments()
+    byIndices = type(self.boot)(
+      self.data, indices=self.boot.indices, NBinSize=self.NBinSize
+    )
+    with ThreadPoolExecutor(3) as executor:
+      for bs in [self.boot, byIndices]:
+        for blockVars, blockSamples in [(None, None), (50, 70), (7, None)]:
+          self.assertTrue(
+            (bs.distributedSamples(
+              executor, blockVars=blockVars, blockSamples=blockSamples
+            ) == samples).all(),
+            msg="Distributed samples differ for blocks {}".format(
+              (blockVars, blockSamples)
+            )
+          )
+        moments = bs.distributedMoments(executor=executor, blockVars=50)
+        self.assertTrue((moments[0] == mean).all() and (moments[1] == var).all())
+    # Moments of a block of samples (computed by the workers)
+    block = samples.reshape([self.NVars, self.NSamples])[:, 10:110]
+    blockMean, blockVar = self.boot.boot.getMoments(block)
+    self.assertLess(np.max(np.abs(blockMean - block.mean(1))), NUMPREC)
+    self.assertLess(np.max(np.abs(blockVar - block.var(1, ddof=1))), NUMPREC)
+    bs = type(self.boot)(
+      self.data, NSamples=self.NSamples, NSize=self.NSize,
+      NBinSize=self.NBinSize, seed=self.boot.seed, storeIndices=False
+    )
+    with ProcessPoolExecutor(2) as executor:
+      moments = bs.distributedMoments(executor=executor, NTasks=2)
+      self.assertTrue((moments[0] == mean).all() and (moments[1] == var).all())
+      self.assertTrue((bs.distributedSamples(executor) == samples).all())
+
+  #-------------------------------
+  def test21_Lazy(self):
+    """
+    Test wether lazy construction defers binning and index generation until
+    first use and wether released members are recomputed.
+    """
+    boot = type(self.boot)(
+      self.data,
+      NSamples=self.NSamples,
+      NSize=self.NSize,
+      NBinSize=self.NBinSize,
+      seed=self.boot.seed,
+      lazy=True,
+    )
+    self.assertEqual(boot.parameters, self.boot.parameters)
+    # Indices are generated without binning
+    self.assertTrue((boot.indices == self.boot.indices).all())
+    self.assertTrue(boot._boot is None, msg="Data binned for indices")
+    self.assertTrue((boot.samples == self.boot.samples).all())
+    self.assertFalse(boot._boot is None)
+    for names in [["samples"], ["mean", "data"], ["indices"], []]:
+      boot.release(*names)
+      if "data" in names or "indices" in names or not(names):
+        self.assertTrue(boot._boot is None)
+      if "samples" in names or not(names):
+        self.assertTrue(boot._samples is None)
+      self.assertTrue((boot.mean == self.boot.mean).all())
+      self.assertTrue((boot.data == self.boot.data).all())
+      self.assertTrue((boot.samples == self.boot.samples).all())
+    self.assertTrue(boot == self.boot)
+    with self.assertRaises(ValueError):
+      self.boot.release("data")
+    with self.assertRaises(ValueError):
+      boot.release("binned")
+
+  #-------------------------------
+  def test22_SharedIndices(self):
+    """
+    Test wether 'BootstrapIndices' are shared by Bootstrappers without copies.
+    """
+    indexSet = self.boot.indexSet
+    self.assertTrue(indexSet is self.boot.indexSet)
+    self.assertTrue(np.shares_memory(indexSet.array, self.boot.indices))
+    scaled = type(self.boot)(
+      2*self.data, indices=indexSet, NBinSize=self.NBinSize
+    )
+    self.assertTrue(np.shares_memory(scaled.indices, indexSet.array))
+    self.assertTrue(scaled.indexSet is indexSet)
+    self.assertEqual(scaled.seed, self.boot.seed)
+    self.assertLess(
+      np.max(np.abs(scaled.samples - 2*self.boot.samples)), NUMPREC
+    )
+    self.assertTrue(type(self.boot)(
+      self.data, indices=indexSet, NBinSize=self.NBinSize
+    ) == self.boot)
+    # Indices generated once from the seed
+    indexSet = type(indexSet)(
+      self.NBins, NSize=self.NSize, NSamples=self.NSamples, seed=self.boot.seed
+    )
+    self.assertEqual(indexSet, self.boot.indexSet)
+    bootstrappers = [
+      type(self.boot)(self.data, indices=indexSet, NBinSize=self.NBinSize)
+        for _ in range(2)
+    ]
+    self.assertTrue(
+      np.shares_memory(bootstrappers[0].indices, bootstrappers[1].indices)
+    )
+    self.assertTrue((bootstrappers[1].samples == self.boot.samples).all())
+    with self.assertRaises(ValueError):
+      type(self.boot)(self.data, indices=indexSet, NBinSize=self.NBinSize+1)
+
+  #-------------------------------
+  def test23_Extend(self):
+    """
+    Test wether extending the ensemble bins only the new configurations and
+    is equal to bootstrapping the concatenated data with the same seed.
+    """
+    NFirst = self.NConfigs//2 + 1
+    boot = type(self.boot)(
+      self.data[..., :NFirst],
+      NSamples=self.NSamples,
+      NBinSize=self.NBinSize,
+      seed=self.boot.seed,
+    )
+    first = boot.data.copy()
+    boot.samples
+    # Two bins and one pending configuration
+    boot.extend(self.data[..., NFirst:NFirst + 2*self.NBinSize + 1])
+    self.assertEqual(boot.NBins, NFirst//self.NBinSize + 2)
+    self.assertTrue((boot.data[..., :first.shape[-1]] == first).all())
+    # Equal to the fresh Bootstrapper without the pending configuration
+    fresh = type(self.boot)(
+      self.data[..., :NFirst + 2*self.NBinSize],
+      NSamples=self.NSamples,
+      NBinSize=self.NBinSize,
+      seed=self.boot.seed,
+    )
+    self.assertEqual(boot.parameters, fresh.parameters)
+    self.assertTrue(boot == fresh)
+    self.assertTrue((boot.samples == fresh.samples).all())
+    boot.extend(self.data[..., NFirst + 2*self.NBinSize + 1:])
+    self.assertEqual(boot.parameters, self.boot.parameters)
+    self.assertTrue((boot.indices == self.boot.indices).all())
+    self.assertTrue(boot == self.boot)
+    self.assertLess(
+      np.max(np.abs(boot.samples - self.boot.samples)), NUMPREC
+    )
+    with self.assertRaises(ValueError):
+      boot.extend(self.data[:1])
+    with self.assertRaises(ValueError):
+      type(self.boot)(
+        self.data, indices=self.boot.indices, NBinSize=self.NBinSize
+      ).extend(self.data)
+
 
 #===============================================================================
\ No newline at end of file
@@ -2,6 +2,8 @@ import unittest
 from . import core
 import bootstats as boot
 import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 
 #===============================================================================
@@ -131,7 +133,7 @@ class AbstractBootstrapper(core.AbstractBootstrapper):
     with boot.h5py.File(h5Info["fileName"], "r") as f:
       bootGroup = f.get(bootAddress)
       ## Read NBinSize
-      samples = bootGroup.get("samples").value
+      samples = bootGroup.get("samples")[()]
 
     # Compute difference
     diff = core.np.mean(core.np.abs( samples - bs.samples ))/core.np.mean(
@@ -139,6 +141,179 @@ class AbstractBootstrapper(core.AbstractBootstrapper):
     )
     self.assertLess(diff, core.NUMPREC, msg="Exportation of samples failed.")
 
+  #-------------------------------
+  def test15_streamHDF5(self):
+    """
+    Checks wether binning a HDF5 dataset chunk by chunk reproduces the binned
+    data of the in memory data.
+    """
+    h5Data = {
+      "fileName": "testStream.h5",
+      "datasetName": "ensemble1/data",
+    }
+    with boot.h5py.File(h5Data["fileName"], "w") as f:
+      f.create_dataset(h5Data["datasetName"], data=self.data)
+    pars = {
+      "NSamples": self.NSamples,
+      "NSize":    self.NSize,
+      "NBinSize": self.NBinSize,
+      "seed":     self.boot.seed,
+    }
+    # Use small chunks to test the chunk boundaries
+    chunkSize = boot.PyBootstrap._CHUNK_SIZE
+    boot.PyBootstrap._CHUNK_SIZE = self.NVars*self.NBinSize*7
+    try:
+      bs = type(self.boot)(h5Data, **pars)
+      with boot.h5py.File(h5Data["fileName"], "r") as f:
+        bsDataset = type(self.boot)(f[h5Data["datasetName"]], **pars)
+    finally:
+      boot.PyBootstrap._CHUNK_SIZE = chunkSize
+    for bootstrapper in [bs, bsDataset]:
+      self.assertTrue(
+        (bootstrapper.data == self.boot.data).all(),
+        msg="Binning of HDF5 dataset differs from binning of data"
+      )
+      self.assertEqual(bootstrapper, self.boot)
+
+  #-------------------------------
+  def test16_memoryMap(self):
+    """
+    Checks wether the binned data and samples are written to memory mapped
+    files which can be loaded by other processes.
+    """
+    with tempfile.TemporaryDirectory() as mmapDir:
+      bs = type(self.boot)(
+        self.data,
+        NSamples=self.NSamples,
+        NSize=self.NSize,
+        NBinSize=self.NBinSize,
+        seed=self.boot.seed,
+        mmapDir=mmapDir,
+      )
+      self.assertEqual(bs, self.boot)
+      self.assertTrue((bs.samples == self.boot.samples).all())
+      for fileName, array in [("data.npy", bs.data), ("samples.npy", bs.samples)]:
+        mapped = core.np.load(
+          os.path.join(mmapDir, fileName), mmap_mode="r"
+        )
+        self.assertTrue(
+          (mapped == array.reshape(mapped.shape)).all(),
+          msg="Memory mapped file '{}' differs from array".format(fileName)
+        )
+
+  #-------------------------------
+  def test17_singlePrecision(self):
+    """
+    Checks that single precision input is stored in single precision and
+    agrees with the double precision bootstrap of the same data and seed.
+    """
+    np = core.np
+    for single in [
+      self.data.astype(np.float32)[..., ::-1], # strided input
+      (self.data + 1j*self.data[..., ::-1]).astype(np.complex64),
+    ]:
+      kwargs = {
+        "NSamples": self.NSamples, "NSize": self.NSize,
+        "NBinSize": self.NBinSize, "seed": self.boot.seed, "nThreads": 3,
+      }
+      bs = type(self.boot)(single, **kwargs)
+      bsDouble = type(self.boot)(
+        single.astype(np.result_type(single.dtype, np.float64)), **kwargs
+      )
+      self.assertEqual(bs.data.dtype, single.dtype)
+      self.assertEqual(bs.samples.dtype, single.dtype)
+      self.assertLess(np.max(np.abs(bs.data - bsDouble.data)), 1.e-6)
+      self.assertLess(np.max(np.abs(bs.samples - bsDouble.samples)), 1.e-6)
+      mean, var, cov = bs.moments(cov=True)
+      meanDouble, varDouble, covDouble = bsDouble.moments(cov=True)
+      self.assertEqual(mean.dtype, meanDouble.dtype)
+      self.assertLess(np.max(np.abs(mean - meanDouble)), 1.e-6)
+      self.assertLess(np.max(np.abs(var/varDouble - 1)), 1.e-4)
+      self.assertLess(np.max(np.abs(cov - covDouble)), 1.e-6)
+
+  #-------------------------------
+  def test18_chunkedHDF5(self):
+    """
+    Checks wether compressed and chunked exports are read completely and
+    partially and wether files with parameter datasets can be read.
+    """
+    np = core.np
+    with tempfile.TemporaryDirectory() as tmpDir:
+      fileName = os.path.join(tmpDir, "export.h5")
+      for groupName, compression in [("gzip", "gzip"), ("lzf", "lzf")]:
+        self.boot.exportHDF5(
+          fileName, groupName, writeSamples=True, compression=compression
+        )
+        with boot.h5py.File(fileName, "r") as f:
+          bootGroup = f[groupName + "/bootstrap"]
+          self.assertEqual(bootGroup.attrs["NSamples"], self.NSamples)
+          self.assertEqual(bootGroup.attrs["seed"], self.boot.seed)
+          self.assertEqual(bootGroup["indices"].compression, compression)
+          self.assertTrue(bootGroup["indices"].shuffle)
+          self.assertEqual(bootGroup["indices"].chunks[-1], self.NSize)
+          self.assertFalse(bootGroup["samples"].chunks is None)
+        self.assertEqual(
+          type(self.boot)(self.data, h5Info={
+            "fileName": fileName, "groupName": groupName
+          }),
+          self.boot
+        )
+        self.assertTrue(
+          (boot.readSamples(fileName, groupName) == self.boot.samples).all()
+        )
+        self.assertTrue((
+          boot.readSamples(fileName, groupName, 3, slice(10, 50)) ==
+          self.boot.samples[3, ..., 10:50]
+        ).all())
+        self.assertTrue((
+          boot.readIndices(fileName, groupName, slice(7, 9)) ==
+          self.boot.indices[7:9]
+        ).all())
+
+      # Samples which are not stored are written block by block
+      bs = type(self.boot)(
+        self.data, NSamples=self.NSamples, NSize=self.NSize,
+        NBinSize=self.NBinSize, seed=self.boot.seed, storeIndices=False
+      )
+      bs.exportHDF5(fileName, "blocks", writeSamples=True, writeIndices=False)
+      self.assertTrue(bs._samples is None)
+      self.assertTrue(
+        (boot.readSamples(fileName, "blocks") == self.boot.samples).all()
+      )
+      self.assertTrue((
+        boot.readIndices(fileName, "blocks", slice(7, 9)) ==
+        self.boot.indices[7:9]
+      ).all())
+      # Stored and regenerated indices accept the same rows
+      for samples in [
+        None, 3, -1, slice(7, 9), slice(2, 40, 3), slice(-5, None),
+        slice(9, 7)
+      ]:
+        stored = boot.readIndices(fileName, "gzip", samples)
+        self.assertEqual(stored.ndim, 2)
+        self.assertTrue(
+          (boot.readIndices(fileName, "blocks", samples) == stored).all(),
+          msg="Rows {}".format(samples)
+        )
+      for groupName in ["gzip", "blocks"]:
+        with self.assertRaises(ValueError):
+          boot.readIndices(fileName, groupName, slice(9, 7, -1))
+        with self.assertRaises(IndexError):
+          boot.readIndices(fileName, groupName, self.NSamples)
+
+      # Parameters stored as datasets
+      with boot.h5py.File(fileName, "a") as f:
+        bootGroup = f.create_group("datasets/bootstrap")
+        for key, val in self.boot.parameters.items():
+          bootGroup.create_dataset(key, data=val)
+        bootGroup.create_dataset("seed", data=np.uint64(self.boot.seed))
+      self.assertEqual(
+        type(self.boot)(self.data, h5Info={
+          "fileName": fileName, "groupName": "datasets"
+        }),
+        self.boot
+      )
+
 
 #===============================================================================
 #     Tests
@@ -196,11 +371,413 @@ class TestBootstrapperComplex(unittest.TestCase, core.AbstractBootstrapper):
 #===============================================================================
 
 
+#===============================================================================
+class TestJackknife(unittest.TestCase):
+  "Test the (blocked) 'Jackknife' for double and complex data."
+  NConfigs = 1001
+  NBinSize = 5
+  #-------------------------------
+  def setUp(self):
+    """Allocates random normal data arrays of type double and complex."""
+    tmp = core.np.random.normal(size=[2, 4, 8, self.NConfigs])
+    self.data = {"double": tmp[0], "complex": tmp[0] + 1j*tmp[1]}
+
+  #-------------------------------
+  def test1_Samples(self):
+    """
+    Compares the leave-one-out means with explicitly averaged bins.
+    """
+    np = core.np
+    for key, data in self.data.items():
+      jk = boot.Jackknife(data, NBinSize=self.NBinSize, nThreads=2)
+      NBins  = self.NConfigs // self.NBinSize
+      binned = data[..., self.NConfigs % self.NBinSize:].reshape(
+        [4, 8, NBins, self.NBinSize]
+      ).mean(axis=-1)
+      samples = np.stack([
+        np.delete(binned, b, axis=-1).mean(axis=-1) for b in range(NBins)
+      ], axis=-1)
+      self.assertEqual(jk.NSamples, NBins)
+      self.assertEqual(jk.samples.shape, samples.shape)
+      self.assertLess(
+        np.max(np.abs(jk.samples - samples)), core.NUMPREC, msg=key
+      )
+      # Blocks are equal to the samples
+      flat = jk.samples.reshape([jk.NVars, jk.NSamples])
+      jk2 = boot.Jackknife(data, NBinSize=self.NBinSize)
+      for varSlice, sampleSlice, block in jk2.iterSamples(5, 17):
+        self.assertTrue((block == flat[varSlice, sampleSlice]).all())
+
+  #-------------------------------
+  def test2_Moments(self):
+    """
+    Compares the jackknife variance and covariance with the samples.
+    """
+    np = core.np
+    for key, data in self.data.items():
+      jk = boot.Jackknife(data, NBinSize=self.NBinSize)
+      samples = jk.samples.reshape([jk.NVars, jk.NSamples])
+      centered = samples - samples.mean(axis=1, keepdims=True)
+      cov = centered @ centered.conj().T * (jk.NSamples - 1) / jk.NSamples
+      mean, var, covJk = jk.moments(cov=True)
+      self.assertLess(
+        np.max(np.abs(covJk.reshape(cov.shape) - cov)), core.NUMPREC, msg=key
+      )
+      self.assertLess(
+        np.max(np.abs(var - jk.variance(jk.samples))), core.NUMPREC, msg=key
+      )
+      self.assertLess(
+        np.max(np.abs(mean - samples.mean(axis=1).reshape(mean.shape))),
+        core.NUMPREC,
+        msg=key
+      )
+      ratio = jk.getDerivedSamples(lambda x: x[0] / x[1], blockSamples=33)
+      self.assertTrue((ratio == jk.samples[0] / jk.samples[1]).all())
+#===============================================================================
+
+
+#===============================================================================
+class TestBlockBootstrapper(unittest.TestCase):
+  "Test the moving-block and stationary 'BlockBootstrapper'."
+  NConfigs = 1001
+  NSamples = 200
+  #-------------------------------
+  def setUp(self):
+    """Allocates random normal data arrays of type double and complex."""
+    tmp = core.np.random.normal(size=[2, 4, 8, self.NConfigs])
+    self.data = {"double": tmp[0] + 3., "complex": tmp[0] + 1j*tmp[1]}
+
+  #-------------------------------
+  def test1_Samples(self):
+    """
+    Compares the samples with the means of the explicitly concatenated blocks
+    and checks that the samples do not depend on the number of threads.
+    """
+    np = core.np
+    for scheme in ["moving", "stationary"]:
+      for key, data in self.data.items():
+        bb = boot.BlockBootstrapper(
+          data, self.NSamples, 7.5, scheme=scheme, seed=42, nThreads=3
+        )
+        for s in [0, 1, self.NSamples-1]:
+          starts, lengths = bb.getBlocks(s)
+          self.assertEqual(lengths.sum(), self.NConfigs)
+          if scheme == "moving":
+            self.assertTrue((lengths[:-1] == 8).all())
+          configs = np.concatenate([
+            np.arange(int(start), int(start + length)) % self.NConfigs
+              for start, length in zip(starts, lengths)
+          ])
+          self.assertLess(
+            np.max(np.abs(bb.samples[..., s] - data[..., configs].mean(-1))),
+            core.NUMPREC,
+            msg="{} {}".format(scheme, key)
+          )
+        # Independent of threads and blocks
+        bb1 = boot.BlockBootstrapper(
+          data, self.NSamples, 7.5, scheme=scheme, seed=42
+        )
+        flat = bb.samples.reshape([bb.NVars, bb.NSamples])
+        for varSlice, sampleSlice, block in bb1.iterSamples(5, 33):
+          self.assertTrue((block == flat[varSlice, sampleSlice]).all())
+
+  #-------------------------------
+  def test2_StationaryLengths(self):
+    """
+    Checks that the lengths of the stationary blocks have the requested mean.
+    """
+    np = core.np
+    bb = boot.BlockBootstrapper(self.data["double"], 100, 10.)
+    lengths = np.concatenate([bb.getBlocks(s)[1][:-1] for s in range(100)])
+    self.assertLess(abs(lengths.mean() - 10.), 1.)
+#===============================================================================
+
+
+#===============================================================================
+class TestPoissonBootstrapper(unittest.TestCase):
+  "Test the online 'PoissonBootstrapper'."
+  NConfigs = 1001
+  NSamples = 200
+  #-------------------------------
+  def setUp(self):
+    """Allocates random normal data arrays of type double and complex."""
+    tmp = core.np.random.normal(size=[2, 4, 8, self.NConfigs])
+    self.data = {"double": tmp[0] + 3., "complex": tmp[0] + 1j*tmp[1]}
+
+  #-------------------------------
+  def test1_Samples(self):
+    """
+    Compares the samples with the explicitly weighted means of the bins and
+    checks that extending in pieces equals constructing with all data.
+    """
+    np = core.np
+    for key, data in self.data.items():
+      pb = boot.PoissonBootstrapper(
+        data, self.NSamples, NBinSize=3, seed=42, nThreads=3
+      )
+      self.assertEqual(pb.NBins, self.NConfigs//3)
+      weights = pb.getWeights()
+      self.assertTrue((weights == np.round(weights)).all())
+      bins = boot.PyBootstrap.binArray(
+        data[..., :pb.NBins*3].reshape([32, -1]), 3
+      )
+      self.assertLess(np.max(np.abs(
+        pb.samples.reshape([32, -1]) - bins @ weights.T / weights.sum(1)
+      )), core.NUMPREC, msg=key)
+      self.assertLess(
+        np.max(np.abs(pb.mean.reshape(32) - bins.mean(1))), core.NUMPREC
+      )
+      # Extend in pieces (with pending configurations)
+      pieces = boot.PoissonBootstrapper(
+        data[..., :100], self.NSamples, NBinSize=3, seed=42
+      )
+      for c0, c1 in [(100, 101), (101, 400), (400, self.NConfigs)]:
+        pieces.extend(data[..., c0:c1])
+      self.assertEqual(pieces.parameters, pb.parameters)
+      self.assertLess(
+        np.max(np.abs(pieces.samples - pb.samples)), core.NUMPREC, msg=key
+      )
+      mean, var = pieces.moments()
+      self.assertLess(np.max(np.abs(mean - pb.samples.mean(-1))), core.NUMPREC)
+
+  #-------------------------------
+  def test2_Variance(self):
+    """
+    Checks that the bootstrap variance estimates the variance of the mean.
+    """
+    np = core.np
+    pb = boot.PoissonBootstrapper(self.data["double"], 1000, seed=1)
+    mean, var = pb.moments()
+    expected = self.data["double"].var(-1) / self.NConfigs
+    self.assertLess(abs(np.mean(var / expected) - 1), 0.1)
+
+  #-------------------------------
+  def test3_Dataset(self):
+    """
+    Checks that HDF5 datasets are weighted chunk by chunk and give the same
+    samples as arrays (also for the 'BlockBootstrapper').
+    """
+    np = core.np
+    data = self.data["complex"]
+    pb = boot.PoissonBootstrapper(data, self.NSamples, NBinSize=3, seed=42)
+    bb = boot.BlockBootstrapper(data, self.NSamples, 7.5, seed=42)
+    chunkSize = boot.PyBootstrap._CHUNK_SIZE
+    with tempfile.TemporaryDirectory() as tmpDir:
+      h5Data = {
+        "fileName": os.path.join(tmpDir, "data.h5"),
+        "datasetName": "data",
+      }
+      with boot.h5py.File(h5Data["fileName"], "w") as f:
+        f.create_dataset(h5Data["datasetName"], data=data)
+      try: # chunks of 100 configurations
+        boot.PyBootstrap._CHUNK_SIZE = 100*32
+        with boot.h5py.File(h5Data["fileName"], "r") as f:
+          pbDataset = boot.PoissonBootstrapper(
+            f["data"], self.NSamples, NBinSize=3, seed=42
+          )
+        pbDict = boot.PoissonBootstrapper(
+          h5Data, self.NSamples, NBinSize=3, seed=42
+        )
+      finally:
+        boot.PyBootstrap._CHUNK_SIZE = chunkSize
+      bbDict = boot.BlockBootstrapper(h5Data, self.NSamples, 7.5, seed=42)
+    for pbFile in [pbDataset, pbDict]:
+      self.assertEqual(pbFile.parameters, pb.parameters)
+      self.assertLess(
+        np.max(np.abs(pbFile.samples - pb.samples)), core.NUMPREC
+      )
+    self.assertTrue((bbDict.samples == bb.samples).all())
+#===============================================================================
+
+
+#===============================================================================
+class TestBinningSweep(unittest.TestCase):
+  "Test the binning analysis 'binningSweep'."
+  NConfigs = 1001
+  binSizes = [1, 2, 5, 10]
+  #-------------------------------
+  def setUp(self):
+    """Allocates autocorrelated (moving average) random normal data."""
+    noise = core.np.random.normal(size=[3, 4, self.NConfigs + 3])
+    self.data = noise[..., 3:] + noise[..., 2:-1] + noise[..., 1:-2]
+
+  #-------------------------------
+  def test1_Errors(self):
+    """
+    Compares the errors with the errors of the binned data and of the
+    'Bootstrapper' for each bin size.
+    """
+    np = core.np
+    sweep = boot.binningSweep(self.data, self.binSizes)
+    self.assertEqual(sweep["errors"].shape, (len(self.binSizes), 3, 4))
+    for n, NBinSize in enumerate(self.binSizes):
+      NBins = self.NConfigs // NBinSize
+      binned = self.data[..., self.NConfigs % NBinSize:].reshape(
+        [3, 4, NBins, NBinSize]
+      ).mean(axis=-1)
+      error = binned.std(axis=-1, ddof=1) / np.sqrt(NBins)
+      self.assertLess(np.max(np.abs(sweep["errors"][n] - error)), 1.e-10)
+    # Errors and tauInt increase for correlated data
+    self.assertTrue((sweep["tauInt"][-1] > sweep["tauInt"][0]).all())
+    self.assertLess(np.max(np.abs(sweep["tauInt"][0] - 0.5)), 1.e-10)
+
+    sweep = boot.binningSweep(self.data, self.binSizes, NSamples=50, seed=3)
+    for n, NBinSize in enumerate(self.binSizes):
+      bs = boot.Bootstrapper(
+        self.data, NSamples=50, NSize=self.NConfigs // NBinSize,
+        NBinSize=NBinSize, seed=3
+      )
+      self.assertLess(
+        np.max(np.abs(sweep["errors"][n] - np.sqrt(bs.moments()[1]))), 1.e-10
+      )
+#===============================================================================
+
+
+#===============================================================================
+class TestBatchBootstrapper(unittest.TestCase):
+  "Test the batched bootstrap 'BatchBootstrapper'."
+  NBatch   = 5
+  NConfigs = 60
+  NSamples = 40
+  seed     = 11
+  #-------------------------------
+  def setUp(self):
+    """Allocates a batch of random normal ensembles."""
+    self.data = core.np.random.normal(size=[self.NBatch, 3, 2, self.NConfigs])
+
+  #-------------------------------
+  def test1_IndependentIndices(self):
+    """
+    Compares the samples of each member with the samples of a 'Bootstrapper'
+    with 'NBatch*NSamples' samples and with the same seed.
+    """
+    np = core.np
+    for storeIndices in [True, False]:
+      bs = boot.BatchBootstrapper(
+        list(self.data), NSamples=self.NSamples, NBinSize=2, seed=self.seed,
+        storeIndices=storeIndices, nThreads=3
+      )
+      self.assertEqual(bs.samples.shape, (self.NBatch, 3, 2, self.NSamples))
+      self.assertEqual(bs.indices.shape, (self.NBatch*self.NSamples, 30))
+      for b in range(self.NBatch):
+        ref = boot.Bootstrapper(
+          self.data[b], NSamples=self.NBatch*self.NSamples, NBinSize=2,
+          seed=self.seed
+        )
+        sampleSlice = slice(b*self.NSamples, (b+1)*self.NSamples)
+        self.assertTrue((bs.samples[b] == ref.samples[..., sampleSlice]).all())
+      # Blocks crossing the members
+      for varSlice, sampleSlice, block in bs.iterSamples(4, 7):
+        self.assertTrue((block == bs._samples[varSlice, sampleSlice]).all())
+      # Indices initialization
+      bs2 = boot.BatchBootstrapper(self.data, indices=bs.indices, NBinSize=2)
+      self.assertTrue((bs2.samples == bs.samples).all())
+      # Distributed blocks do not cross the members
+      with ThreadPoolExecutor(2) as executor:
+        samples = bs2.distributedSamples(executor, blockVars=4, blockSamples=9)
+      self.assertTrue((samples == bs.samples).all())
+
+  #-------------------------------
+  def test2_SharedIndices(self):
+    """
+    Compares the samples of each member with the samples of a 'Bootstrapper'
+    with the same seed if the indices are shared.
+    """
+    np = core.np
+    bs = boot.BatchBootstrapper(
+      self.data, NSamples=self.NSamples, NBinSize=1, seed=self.seed,
+      shareIndices=True
+    )
+    self.assertEqual(bs.indices.shape, (self.NSamples, self.NConfigs))
+    cov = bs.getCov()
+    for b in range(self.NBatch):
+      ref = boot.Bootstrapper(
+        self.data[b], NSamples=self.NSamples, NBinSize=1, seed=self.seed
+      )
+      self.assertTrue((bs.samples[b] == ref.samples).all())
+      # The diagonal blocks of the covariance are the member covariances
+      self.assertLess(np.max(np.abs(cov[b, :, :, b] - ref.getCov())), 1.e-12)
+#===============================================================================
+
+
+#===============================================================================
+class TestBootstrapCache(unittest.TestCase):
+  "Test the persistent cache 'BootstrapCache'."
+  #-------------------------------
+  def setUp(self):
+    """Allocates random normal data and an empty cache directory."""
+    self.data = core.np.random.normal(size=[4, 3, 500])
+    self.tmpDir = tempfile.TemporaryDirectory()
+    self.cacheDir = os.path.join(self.tmpDir.name, "cache")
+
+  #-------------------------------
+  def tearDown(self):
+    """Removes the cache directory."""
+    self.tmpDir.cleanup()
+
+  #-------------------------------
+  def test1_Hit(self):
+    """
+    Test wether the binned data and samples are loaded from the cache for
+    equal data and parameters and wether other data or seeds miss.
+    """
+    pars = {"NSamples": 50, "NBinSize": 2, "seed": 5}
+    bs = boot.Bootstrapper(self.data, cache=self.cacheDir, **pars)
+    samples = bs.samples
+    cached = boot.Bootstrapper(self.data, cache=self.cacheDir, **pars)
+    self.assertFalse(cached._samples is None, msg="Samples not loaded")
+    self.assertTrue((cached.samples == samples).all())
+    self.assertTrue((cached.data == bs.data).all())
+    self.assertTrue((cached.mean == bs.mean).all())
+    self.assertTrue(cached == bs)
+    # Indices initialization
+    byIndices = boot.Bootstrapper(
+      self.data, indices=bs.indices, NBinSize=2, cache=self.cacheDir
+    )
+    self.assertTrue(byIndices._samples is None)
+    self.assertTrue((byIndices.samples == samples).all())
+    # Different data and seeds miss
+    data = self.data.copy()
+    data[0, 0, 0] += 1
+    for missed in [
+      boot.Bootstrapper(data, cache=self.cacheDir, **pars),
+      boot.Bootstrapper(self.data, cache=self.cacheDir, **dict(pars, seed=6)),
+    ]:
+      self.assertTrue(missed._samples is None)
+
+  #-------------------------------
+  def test2_Eviction(self):
+    """
+    Test wether the least recently used entries are evicted once the cache
+    exceeds its size.
+    """
+    cache = boot.BootstrapCache(self.cacheDir, maxBytes=3*60000)
+    keys = []
+    for seed in range(3): # each entry is about 2 x 4 x 3 x 250 x 8 bytes
+      bs = boot.Bootstrapper(
+        self.data, NSamples=250, NBinSize=2, seed=seed, cache=cache
+      )
+      bs.samples
+      keys.append(bs._cacheKey)
+      os.utime(cache._entryDir(bs._cacheKey), (seed, seed))
+    # Loading marks the first entry as recently used
+    self.assertTrue("samples" in cache.load(keys[0]))
+    bs = boot.Bootstrapper(
+      self.data, NSamples=250, NBinSize=2, seed=3, cache=cache
+    )
+    bs.samples
+    self.assertEqual(
+      sorted(os.listdir(self.cacheDir)), sorted([keys[0], keys[2], bs._cacheKey])
+    )
+#===============================================================================
+
+
 #===============================================================================
 def tearDownModule():
   """Remove temporary files"""
-  if os.path.exists('testExport.h5'):
-    os.remove('testExport.h5')
+  for fileName in ['testExport.h5', 'testStream.h5']:
+    if os.path.exists(fileName):
+      os.remove(fileName)
 #===============================================================================
 
 